@@ -0,0 +1,195 @@
+import asyncio
+import math
+import re
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Sequence, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.exceptions import AdmissionRejectedError
+
+
+class AdmissionBudget:
+    """
+    Бюджет одновременно обрабатываемых запросов группы маршрутов.
+
+    Одновременно обрабатывается не более `max_concurrent` запросов, еще не более `max_queue` ждут своей очереди
+    в порядке поступления. Запрос отклоняется сразу, если очередь заполнена или если по текущему времени обработки
+    он не дождется очереди за `max_wait` секунд, а ожидающий запрос — по истечении `max_wait`. Так при всплеске
+    нагрузки задержка принятых запросов ограничена, а клиенты получают отказ с `Retry-After` раньше, чем
+    истекут их собственные тайм-ауты. `max_concurrent=0` отключает ограничение.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait: float) -> None:
+        """
+        Инициализация бюджета.
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.service_time = 0.0
+        self.__waiters: Deque[asyncio.Future] = deque()
+        self.__running = 0
+        self.__admitted = 0
+        self.__rejected = 0
+        self.__timed_out = 0
+
+    def expected_wait(self) -> float:
+        """
+        Оценивает ожидание нового запроса: число запросов впереди, деленное на число одновременно обрабатываемых,
+        умноженное на сглаженное время обработки одного запроса.
+        """
+        return (len(self.__waiters) + 1) / self.max_concurrent * self.service_time
+
+    def __retry_after(self) -> int:
+        """
+        Возвращает число секунд для заголовка `Retry-After`: оценку времени, за которое очередь освободится.
+        """
+        return max(1, math.ceil(self.expected_wait()))
+
+    def __reject(self) -> AdmissionRejectedError:
+        self.__rejected += 1
+        return AdmissionRejectedError(self.name, self.__retry_after())
+
+    async def acquire(self) -> None:
+        """
+        Допускает запрос к обработке или ждет своей очереди. Если запрос не может быть допущен,
+        выбрасывает `AdmissionRejectedError`.
+        """
+        if self.__running < self.max_concurrent and not self.__waiters:
+            self.__running += 1
+            self.__admitted += 1
+            return
+        if len(self.__waiters) >= self.max_queue or self.expected_wait() > self.max_wait:
+            raise self.__reject()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.__waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                self.__admitted += 1
+                return
+            self.__waiters.remove(waiter)
+            waiter.cancel()
+            self.__timed_out += 1
+            raise self.__reject()
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release()
+            else:
+                self.__waiters.remove(waiter)
+                waiter.cancel()
+            raise
+        self.__admitted += 1
+
+    def release(self, elapsed: Optional[float] = None) -> None:
+        """
+        Освобождает место обработанного запроса: передает его первому ожидающему запросу или уменьшает число
+        обрабатываемых запросов. `elapsed` — время обработки запроса для оценки ожидания.
+        """
+        if elapsed is not None:
+            self.service_time = elapsed if not self.service_time else 0.8 * self.service_time + 0.2 * elapsed
+        while self.__waiters:
+            waiter = self.__waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.__running -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Возвращает текущую статистику бюджета.
+        """
+        return {
+            "name": self.name,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "running": self.__running,
+            "queued": len(self.__waiters),
+            "admitted": self.__admitted,
+            "rejected": self.__rejected,
+            "timed_out": self.__timed_out,
+            "service_time_ms": round(self.service_time * 1000, 3),
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI-middleware, ограничивающий число одновременно обрабатываемых запросов по группам маршрутов.
+
+    Маршрут относится к бюджету по правилам `(регулярное выражение пути, бюджет)`: подходит первое правило,
+    которому путь запроса соответствует целиком. Правило с бюджетом `None` и маршруты без правил (метрики, проверки
+    готовности) не ограничиваются; так исключаются потоковые маршруты, длительность которых определяется скоростью
+    передачи данных, а не вычислениями. Тело запроса читается до допуска, поэтому медленный клиент не занимает
+    место в бюджете и не увеличивает оценку времени обработки. Отклоненный запрос получает ответ 503
+    с заголовком `Retry-After`.
+    """
+
+    def __init__(self, app: ASGIApp, rules: Sequence[Tuple[str, Optional[AdmissionBudget]]]) -> None:
+        self.app = app
+        self.rules = [
+            (re.compile(pattern), budget if budget is not None and budget.max_concurrent > 0 else None)
+            for pattern, budget in rules
+        ]
+
+    def budget_for(self, path: str) -> Optional[AdmissionBudget]:
+        """
+        Возвращает бюджет маршрута или `None`, если маршрут не ограничивается.
+        """
+        for pattern, budget in self.rules:
+            if pattern.fullmatch(path):
+                return budget
+        return None
+
+    @staticmethod
+    async def read_body(receive: Receive) -> Optional[Message]:
+        """
+        Читает тело запроса целиком и возвращает его одним сообщением или `None`, если клиент отключился.
+        """
+        body = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            body.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return {"type": "http.request", "body": b"".join(body), "more_body": False}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        budget = self.budget_for(scope["path"]) if scope["type"] == "http" else None
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_message = await self.read_body(receive)
+        if request_message is None:
+            return
+
+        async def replay_receive() -> Message:
+            nonlocal request_message
+            if request_message is not None:
+                message, request_message = request_message, None
+                return message
+            return await receive()
+
+        try:
+            await budget.acquire()
+        except AdmissionRejectedError as e:
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Service is busy. Please try again later."},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, replay_receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, replay_receive, send)
+        finally:
+            budget.release(time.perf_counter() - started)
@@ -1,8 +1,17 @@
+import hashlib
 from datetime import timedelta
 
-from authx import AuthX, AuthXConfig
+from authx import AuthX, AuthXConfig, TokenPayload
+from fastapi import Request
 
-from app.core.config import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
+from app.core.config import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    ALGORITHM,
+    SECRET_KEY,
+    TOKEN_CACHE_SIZE,
+    TOKEN_CACHE_TTL_SECONDS,
+)
+from app.utils.cache import TTLCache
 
 config = AuthXConfig()
 config.JWT_ALGORITHM = ALGORITHM
@@ -11,3 +20,22 @@ config.JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINU
 
 
 security = AuthX(config=config)
+
+token_cache = TTLCache(max_size=int(TOKEN_CACHE_SIZE), ttl=float(TOKEN_CACHE_TTL_SECONDS))
+
+
+async def access_token_required(request: Request) -> TokenPayload:
+    """
+    Зависимость для проверки токена доступа с кэшированием результата проверки.
+
+    Проверенные токены запоминаются по SHA-256 от токена, поэтому повторные запросы с тем же токеном не проверяют
+    подпись заново. Запись живет не дольше срока действия токена. Недействительные и просроченные токены не кэшируются
+    и проверяются `security.access_token_required`, который выбрасывает `JWTDecodeError`.
+    """
+    request_token = await security.get_access_token_from_request(request)
+    cache_key = hashlib.sha256(request_token.token.encode()).digest()
+    payload = token_cache.get(cache_key)
+    if payload is None:
+        payload = await security.access_token_required(request)
+        token_cache.set(cache_key, payload, ttl=payload.time_until_expiry.total_seconds())
+    return payload
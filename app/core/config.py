@@ -6,9 +6,80 @@ load_dotenv()
 SALT = os.getenv("SALT")
 MONGODB_URI = os.getenv("MONGODB_URI")
 TTL_INDEX_SECONDS = os.getenv("TTL_INDEX_SECONDS")
+MAX_TTL_SECONDS = os.getenv("MAX_TTL_SECONDS", "604800")
 DATABASE_NAME = os.getenv("DATABASE_NAME")
 TEST_DATABASE_NAME = os.getenv("TEST_DATABASE_NAME")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+REDIS_MAX_CONNECTIONS = os.getenv("REDIS_MAX_CONNECTIONS", "100")
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
+
+WEB_CONCURRENCY = os.getenv("WEB_CONCURRENCY", "1")
+CPUS_PER_WORKER = str(max(1, (os.cpu_count() or 1) // max(1, int(WEB_CONCURRENCY))))
+SHUTDOWN_DRAIN_TIMEOUT_SECONDS = os.getenv("SHUTDOWN_DRAIN_TIMEOUT_SECONDS", "30")
+INDEX_INIT_MODE = os.getenv("INDEX_INIT_MODE", "background")
+INDEX_INIT_RETRY_SECONDS = os.getenv("INDEX_INIT_RETRY_SECONDS", "5")
+
+KDF_POOL_KIND = os.getenv("KDF_POOL_KIND", "thread")
+KDF_POOL_WORKERS = os.getenv("KDF_POOL_WORKERS") or CPUS_PER_WORKER
+KDF_POOL_MAX_PENDING = os.getenv("KDF_POOL_MAX_PENDING", "64")
+
+HASH_POOL_WORKERS = os.getenv("HASH_POOL_WORKERS") or CPUS_PER_WORKER
+HASH_POOL_MAX_PENDING = os.getenv("HASH_POOL_MAX_PENDING", "64")
+
+ADMISSION_AUTH_MAX_CONCURRENT = os.getenv("ADMISSION_AUTH_MAX_CONCURRENT") or str(2 * int(HASH_POOL_WORKERS))
+ADMISSION_AUTH_MAX_QUEUE = os.getenv("ADMISSION_AUTH_MAX_QUEUE", "128")
+ADMISSION_AUTH_MAX_WAIT_SECONDS = os.getenv("ADMISSION_AUTH_MAX_WAIT_SECONDS", "2")
+ADMISSION_SECRETS_MAX_CONCURRENT = os.getenv("ADMISSION_SECRETS_MAX_CONCURRENT") or str(4 * int(KDF_POOL_WORKERS))
+ADMISSION_SECRETS_MAX_QUEUE = os.getenv("ADMISSION_SECRETS_MAX_QUEUE", "256")
+ADMISSION_SECRETS_MAX_WAIT_SECONDS = os.getenv("ADMISSION_SECRETS_MAX_WAIT_SECONDS", "2")
+
+MONGO_MAX_POOL_SIZE = os.getenv("MONGO_MAX_POOL_SIZE") or str(max(10, 100 // max(1, int(WEB_CONCURRENCY))))
+MONGO_MIN_POOL_SIZE = os.getenv("MONGO_MIN_POOL_SIZE", "0")
+MONGO_MAX_IDLE_TIME_MS = os.getenv("MONGO_MAX_IDLE_TIME_MS")
+MONGO_WAIT_QUEUE_TIMEOUT_MS = os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS")
+MONGO_CONNECT_TIMEOUT_MS = os.getenv("MONGO_CONNECT_TIMEOUT_MS", "20000")
+MONGO_SERVER_SELECTION_TIMEOUT_MS = os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000")
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS")
+MONGO_READ_CONCERN = os.getenv("MONGO_READ_CONCERN")
+MONGO_WRITE_CONCERN = os.getenv("MONGO_WRITE_CONCERN")
+
+KDF_ALGORITHM = os.getenv("KDF_ALGORITHM", "pbkdf2-sha256")
+KDF_PBKDF2_ITERATIONS = os.getenv("KDF_PBKDF2_ITERATIONS")
+KDF_SCRYPT_N = os.getenv("KDF_SCRYPT_N")
+KDF_SCRYPT_R = os.getenv("KDF_SCRYPT_R")
+KDF_SCRYPT_P = os.getenv("KDF_SCRYPT_P")
+KDF_ARGON2_ITERATIONS = os.getenv("KDF_ARGON2_ITERATIONS")
+KDF_ARGON2_MEMORY_COST = os.getenv("KDF_ARGON2_MEMORY_COST")
+KDF_ARGON2_LANES = os.getenv("KDF_ARGON2_LANES")
+
+MASTER_KEY = os.getenv("MASTER_KEY")
+MASTER_KEY_FILE = os.getenv("MASTER_KEY_FILE")
+PREVIOUS_MASTER_KEYS = os.getenv("PREVIOUS_MASTER_KEYS")
+DATA_KEY_ROTATION_SECONDS = os.getenv("DATA_KEY_ROTATION_SECONDS", "86400")
+DATA_KEY_CACHE_SIZE = os.getenv("DATA_KEY_CACHE_SIZE", "1024")
+DATA_KEY_CACHE_TTL_SECONDS = os.getenv("DATA_KEY_CACHE_TTL_SECONDS", "3600")
+
+SECRET_ID_POOL_SIZE = os.getenv("SECRET_ID_POOL_SIZE", "1024")
+SECRET_CHUNK_SIZE = os.getenv("SECRET_CHUNK_SIZE", "65536")
+MAX_STREAM_SECRET_BYTES = os.getenv("MAX_STREAM_SECRET_BYTES", "1073741824")
+
+MAX_SECRET_BATCH_SIZE = os.getenv("MAX_SECRET_BATCH_SIZE", "500")
+
+MAX_CLIENT_SECRET_LENGTH = os.getenv("MAX_CLIENT_SECRET_LENGTH", "1048576")
+
+TOKEN_CACHE_SIZE = os.getenv("TOKEN_CACHE_SIZE", "10000")
+TOKEN_CACHE_TTL_SECONDS = os.getenv("TOKEN_CACHE_TTL_SECONDS", "300")
+
+USER_CACHE_SIZE = os.getenv("USER_CACHE_SIZE", "10000")
+USER_CACHE_TTL_SECONDS = os.getenv("USER_CACHE_TTL_SECONDS", "300")
+USER_CACHE_NEGATIVE_TTL_SECONDS = os.getenv("USER_CACHE_NEGATIVE_TTL_SECONDS", "5")
+
+RATE_LIMIT_WINDOW_SECONDS = os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60")
+RATE_LIMIT_USER_ATTEMPTS = os.getenv("RATE_LIMIT_USER_ATTEMPTS", "60")
+RATE_LIMIT_SECRET_ATTEMPTS = os.getenv("RATE_LIMIT_SECRET_ATTEMPTS", "10")
+RATE_LIMIT_MAX_KEYS = os.getenv("RATE_LIMIT_MAX_KEYS", "100000")
+SECRET_MAX_FAILED_ATTEMPTS = os.getenv("SECRET_MAX_FAILED_ATTEMPTS", "5")
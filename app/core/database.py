@@ -0,0 +1,126 @@
+from typing import Any, Dict, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from redis.asyncio import Redis
+
+from app.core.config import (
+    MONGO_COMPRESSORS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_READ_CONCERN,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_WRITE_CONCERN,
+    REDIS_MAX_CONNECTIONS,
+)
+
+
+class ConnectionPoolStats(monitoring.ConnectionPoolListener):
+    """
+    Слушатель событий пула соединений MongoDB, собирающий статистику для настройки размера пула.
+
+    Обработчики событий вызываются драйвером синхронно, поэтому они только увеличивают счетчики.
+    """
+
+    def __init__(self) -> None:
+        self.open_connections = 0
+        self.checked_out = 0
+        self.created = 0
+        self.closed = 0
+        self.check_out_started = 0
+        self.check_out_failed = 0
+        self.pool_cleared = 0
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        self.pool_cleared += 1
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        pass
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        self.created += 1
+        self.open_connections += 1
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        self.closed += 1
+        self.open_connections -= 1
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        self.check_out_started += 1
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        self.check_out_failed += 1
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        self.checked_out += 1
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        self.checked_out -= 1
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Возвращает текущие значения счетчиков пула соединений.
+        """
+        return {
+            "max_pool_size": int(MONGO_MAX_POOL_SIZE),
+            "open_connections": self.open_connections,
+            "checked_out": self.checked_out,
+            "created": self.created,
+            "closed": self.closed,
+            "check_out_started": self.check_out_started,
+            "check_out_failed": self.check_out_failed,
+            "pool_cleared": self.pool_cleared,
+        }
+
+
+def _client_options() -> Dict[str, Any]:
+    """
+    Собирает параметры клиента MongoDB из конфигурации. Незаданные параметры остаются на значениях драйвера.
+    """
+    options: Dict[str, Any] = {
+        "maxPoolSize": int(MONGO_MAX_POOL_SIZE),
+        "minPoolSize": int(MONGO_MIN_POOL_SIZE),
+        "connectTimeoutMS": int(MONGO_CONNECT_TIMEOUT_MS),
+        "serverSelectionTimeoutMS": int(MONGO_SERVER_SELECTION_TIMEOUT_MS),
+    }
+    if MONGO_MAX_IDLE_TIME_MS:
+        options["maxIdleTimeMS"] = int(MONGO_MAX_IDLE_TIME_MS)
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = int(MONGO_WAIT_QUEUE_TIMEOUT_MS)
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    if MONGO_READ_CONCERN:
+        options["readConcernLevel"] = MONGO_READ_CONCERN
+    if MONGO_WRITE_CONCERN:
+        options["w"] = int(MONGO_WRITE_CONCERN) if MONGO_WRITE_CONCERN.isdigit() else MONGO_WRITE_CONCERN
+    return options
+
+
+def create_mongo_client(uri: str) -> Tuple[AsyncIOMotorClient, ConnectionPoolStats]:
+    """
+    Создает общий для всех репозиториев клиент MongoDB и слушатель статистики его пула соединений.
+    Клиент должен создаваться один раз на процесс и закрываться при завершении работы приложения.
+    """
+    pool_stats = ConnectionPoolStats()
+    client = AsyncIOMotorClient(uri, event_listeners=[pool_stats], **_client_options())
+    return client, pool_stats
+
+
+def create_redis_client(url: str) -> Redis:
+    """
+    Создает общий клиент хранилища с протоколом Redis. Размер пула соединений задается REDIS_MAX_CONNECTIONS.
+    Клиент должен создаваться один раз на процесс и закрываться при завершении работы приложения.
+    """
+    return Redis.from_url(url, max_connections=int(REDIS_MAX_CONNECTIONS))
@@ -1,22 +1,195 @@
+from typing import Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from redis.asyncio import Redis
+
+from app.core.admission import AdmissionBudget
+from app.core.config import (
+    ADMISSION_AUTH_MAX_CONCURRENT,
+    ADMISSION_AUTH_MAX_QUEUE,
+    ADMISSION_AUTH_MAX_WAIT_SECONDS,
+    ADMISSION_SECRETS_MAX_CONCURRENT,
+    ADMISSION_SECRETS_MAX_QUEUE,
+    ADMISSION_SECRETS_MAX_WAIT_SECONDS,
+    DATA_KEY_CACHE_SIZE,
+    DATA_KEY_CACHE_TTL_SECONDS,
+    DATA_KEY_ROTATION_SECONDS,
+    HASH_POOL_MAX_PENDING,
+    HASH_POOL_WORKERS,
+    KDF_ALGORITHM,
+    KDF_ARGON2_ITERATIONS,
+    KDF_ARGON2_LANES,
+    KDF_ARGON2_MEMORY_COST,
+    KDF_PBKDF2_ITERATIONS,
+    KDF_POOL_KIND,
+    KDF_POOL_MAX_PENDING,
+    KDF_POOL_WORKERS,
+    KDF_SCRYPT_N,
+    KDF_SCRYPT_P,
+    KDF_SCRYPT_R,
+    MASTER_KEY,
+    MASTER_KEY_FILE,
+    PREVIOUS_MASTER_KEYS,
+    STORAGE_BACKEND,
+)
+from app.core.workers import WorkerPool
+from app.repositories.data_key_repository import DataKeyRepository
+from app.repositories.memory_data_key_repository import InMemoryDataKeyRepository
+from app.repositories.memory_secret_repository import InMemorySecretRepository
+from app.repositories.memory_user_repository import InMemoryUserRepository
+from app.repositories.protocols import DataKeyRepositoryProtocol, SecretRepositoryProtocol, UserRepositoryProtocol
+from app.repositories.redis_secret_repository import RedisSecretRepository
 from app.repositories.secret_repository import SecretRepository
 from app.repositories.user_repository import UserRepository
+from app.services.data_key_service import DataKeyService
 from app.services.secret_service import SecretService
 from app.services.user_service import UserService
+from app.utils.kdf import Kdf, create_kdf
+
+
+def create_kdf_pool() -> WorkerPool:
+    """
+    Создает пул исполнителей для вывода ключей из кодовых фраз.
+    """
+    return WorkerPool(
+        name="kdf",
+        max_workers=int(KDF_POOL_WORKERS),
+        max_pending=int(KDF_POOL_MAX_PENDING),
+        kind=KDF_POOL_KIND,
+    )
+
+
+def create_kdf_from_config() -> Kdf:
+    """
+    Создает функцию вывода ключа для новых секретов по настройкам KDF_*. Незаданные параметры берутся по умолчанию.
+    """
+    params = {
+        "pbkdf2-sha256": {"iterations": KDF_PBKDF2_ITERATIONS},
+        "scrypt": {"n": KDF_SCRYPT_N, "r": KDF_SCRYPT_R, "p": KDF_SCRYPT_P},
+        "argon2id": {
+            "iterations": KDF_ARGON2_ITERATIONS,
+            "memory_cost": KDF_ARGON2_MEMORY_COST,
+            "lanes": KDF_ARGON2_LANES,
+        },
+    }.get(KDF_ALGORITHM, {})
+    return create_kdf(KDF_ALGORITHM, {name: int(value) for name, value in params.items() if value})
+
+
+def create_hash_pool() -> WorkerPool:
+    """
+    Создает пул потоков для хеширования и проверки паролей (bcrypt освобождает GIL).
+    """
+    return WorkerPool(name="hash", max_workers=int(HASH_POOL_WORKERS), max_pending=int(HASH_POOL_MAX_PENDING))
+
+
+def create_admission_budgets() -> Dict[str, AdmissionBudget]:
+    """
+    Создает бюджеты одновременно обрабатываемых запросов: для маршрутов аутентификации (хеширование паролей)
+    и для маршрутов секретов (вывод ключей).
+    """
+    return {
+        "auth": AdmissionBudget(
+            name="auth",
+            max_concurrent=int(ADMISSION_AUTH_MAX_CONCURRENT),
+            max_queue=int(ADMISSION_AUTH_MAX_QUEUE),
+            max_wait=float(ADMISSION_AUTH_MAX_WAIT_SECONDS),
+        ),
+        "secrets": AdmissionBudget(
+            name="secrets",
+            max_concurrent=int(ADMISSION_SECRETS_MAX_CONCURRENT),
+            max_queue=int(ADMISSION_SECRETS_MAX_QUEUE),
+            max_wait=float(ADMISSION_SECRETS_MAX_WAIT_SECONDS),
+        ),
+    }
+
+
+def create_secret_repository(
+    db: Optional[AsyncIOMotorDatabase], redis_client: Optional[Redis] = None
+) -> SecretRepositoryProtocol:
+    """
+    Создает репозиторий секретов для хранилища, выбранного настройкой STORAGE_BACKEND (`mongo`, `redis` или `memory`).
+    """
+    if STORAGE_BACKEND == "memory":
+        return InMemorySecretRepository()
+    if STORAGE_BACKEND == "redis":
+        return RedisSecretRepository(redis_client)
+    if STORAGE_BACKEND == "mongo":
+        return SecretRepository(db)
+    raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+
+
+def create_user_repository(db: Optional[AsyncIOMotorDatabase]) -> UserRepositoryProtocol:
+    """
+    Создает репозиторий пользователей для хранилища, выбранного настройкой STORAGE_BACKEND.
+    При хранилище `redis` пользователи хранятся в MongoDB.
+    """
+    if STORAGE_BACKEND == "memory":
+        return InMemoryUserRepository()
+    if STORAGE_BACKEND in ("mongo", "redis"):
+        return UserRepository(db)
+    raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+
+
+def load_master_keys() -> List[bytes]:
+    """
+    Загружает мастер-ключи: текущий из MASTER_KEY или из файла MASTER_KEY_FILE, затем прежние из
+    PREVIOUS_MASTER_KEYS (через запятую). Возвращает пустой список, если мастер-ключ не задан.
+    """
+    master_key = MASTER_KEY
+    if not master_key and MASTER_KEY_FILE:
+        with open(MASTER_KEY_FILE, "rb") as key_file:
+            master_key = key_file.read().decode().strip()
+    if not master_key:
+        return []
+    previous_keys = [key.strip() for key in (PREVIOUS_MASTER_KEYS or "").split(",") if key.strip()]
+    return [key.encode() for key in [master_key, *previous_keys]]
+
+
+def create_data_key_repository(db: Optional[AsyncIOMotorDatabase]) -> DataKeyRepositoryProtocol:
+    """
+    Создает репозиторий ключей данных. При хранилище `redis` ключи данных хранятся в MongoDB.
+    """
+    if STORAGE_BACKEND == "memory":
+        return InMemoryDataKeyRepository()
+    if STORAGE_BACKEND in ("mongo", "redis"):
+        return DataKeyRepository(db)
+    raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+
+
+def create_data_key_service(db: Optional[AsyncIOMotorDatabase]) -> Optional[DataKeyService]:
+    """
+    Создает сервис ключей данных, если задан мастер-ключ, иначе возвращает `None`.
+    """
+    master_keys = load_master_keys()
+    if not master_keys:
+        return None
+    return DataKeyService(
+        create_data_key_repository(db),
+        master_keys,
+        rotation_seconds=float(DATA_KEY_ROTATION_SECONDS),
+        cache_size=int(DATA_KEY_CACHE_SIZE),
+        cache_ttl=float(DATA_KEY_CACHE_TTL_SECONDS),
+    )
 
 
-def create_secret_service_and_repository(mongodb_uri: str, db_name: str, salt: str) -> tuple:
+def create_secret_service_and_repository(
+    db: Optional[AsyncIOMotorDatabase], salt: str, redis_client: Optional[Redis] = None
+) -> tuple:
     """
-    Создает репозиторий и сервис для работы с секретами.
+    Создает репозиторий и сервис для работы с секретами. Для хранилища в памяти `db` не нужна,
+    а `redis_client` нужен только для хранилища `redis`.
     """
-    secret_repository = SecretRepository(mongodb_uri, db_name)
-    secret_service = SecretService(salt, secret_repository)
+    secret_repository = create_secret_repository(db, redis_client)
+    secret_service = SecretService(
+        salt, secret_repository, create_kdf_pool(), create_kdf_from_config(), create_data_key_service(db)
+    )
     return secret_repository, secret_service
 
 
-def create_user_service_and_repository(mongodb_uri: str, db_name: str) -> tuple:
+def create_user_service_and_repository(db: Optional[AsyncIOMotorDatabase]) -> tuple:
     """
-    Создает репозиторий и сервис для работы с пользователями.
+    Создает репозиторий и сервис для работы с пользователями. Для хранилища в памяти `db` не нужна.
     """
-    user_repository = UserRepository(mongodb_uri, db_name)
-    user_service = UserService(user_repository)
+    user_repository = create_user_repository(db)
+    user_service = UserService(user_repository, create_hash_pool())
     return user_repository, user_service
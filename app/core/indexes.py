@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+# Увеличивается при каждом изменении набора или параметров индексов в репозиториях.
+INDEX_SCHEMA_VERSION = 2
+SCHEMA_COLLECTION = "schema_meta"
+SCHEMA_DOCUMENT_ID = "indexes"
+
+
+class IndexInitializer:
+    """
+    Однократная инициализация индексов репозиториев для развертывания.
+
+    Версия схемы индексов хранится документом в коллекции `schema_meta`. Если в базе уже записана версия не ниже
+    `INDEX_SCHEMA_VERSION`, индексы не проверяются: процесс делает один запрос вместо `index_information`
+    и `create_index` по каждой коллекции. Создание индексов идемпотентно, поэтому одновременный первый запуск
+    нескольких процессов безопасен. Без MongoDB (хранилища `memory` и `redis` для секретов) версия не сохраняется,
+    а инициализация репозиториев ничего не делает.
+    """
+
+    def __init__(
+        self,
+        db: Optional[AsyncIOMotorDatabase],
+        repositories: Sequence[Any],
+        version: int = INDEX_SCHEMA_VERSION,
+    ) -> None:
+        """
+        Инициализация. `repositories` — репозитории с методом `initialize_indexes`.
+        """
+        self.__db = db
+        self.__repositories = repositories
+        self.version = version
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.checked_at: Optional[datetime] = None
+
+    @property
+    def ready(self) -> bool:
+        """
+        Индексы созданы или уже были созданы для текущей версии схемы.
+        """
+        return self.status in ("ready", "skipped")
+
+    async def __stored_version(self) -> int:
+        """
+        Возвращает версию схемы индексов, записанную в базе данных, или 0.
+        """
+        document = await self.__db[SCHEMA_COLLECTION].find_one({"_id": SCHEMA_DOCUMENT_ID})
+        return document.get("version", 0) if document else 0
+
+    async def run(self) -> None:
+        """
+        Проверяет версию схемы и при необходимости создает индексы во всех репозиториях, затем записывает версию.
+        Версия только увеличивается (`$max`), поэтому процесс со старым кодом не откатит ее при последовательном
+        обновлении.
+        """
+        try:
+            if self.__db is not None and await self.__stored_version() >= self.version:
+                self.status = "skipped"
+            else:
+                for repository in self.__repositories:
+                    await repository.initialize_indexes()
+                if self.__db is not None:
+                    await self.__db[SCHEMA_COLLECTION].update_one(
+                        {"_id": SCHEMA_DOCUMENT_ID},
+                        {"$max": {"version": self.version}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+                        upsert=True,
+                    )
+                self.status = "ready"
+            self.error = None
+        except Exception as e:
+            self.status = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.checked_at = datetime.now(timezone.utc)
+
+    async def run_until_ready(self, retry_interval: float) -> None:
+        """
+        Фоновая инициализация: повторяет `run` каждые `retry_interval` секунд, пока она не завершится успешно.
+        Ошибка последней попытки доступна в `stats` и в ответе `/readyz`.
+        """
+        while True:
+            try:
+                await self.run()
+                return
+            except Exception:
+                await asyncio.sleep(retry_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Возвращает состояние инициализации индексов.
+        """
+        return {
+            "status": self.status,
+            "version": self.version,
+            "error": self.error,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+        }
@@ -0,0 +1,164 @@
+import asyncio
+import os
+import time
+from typing import Iterator
+
+from fastapi import FastAPI
+from prometheus_client import REGISTRY, CollectorRegistry, Histogram, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.cache import TTLCache
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    "stage_duration_seconds",
+    "Latency of request processing stages (KDF, encryption, repository calls, password hashing)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between the scheduled and actual wake-up of the event loop lag probe",
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def stage_timer(stage: str):
+    """
+    Возвращает контекстный менеджер, замеряющий время выполнения этапа обработки запроса.
+    """
+    return STAGE_LATENCY.labels(stage=stage).time()
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, замеряющий время обработки HTTP-запросов.
+
+    Метка `route` берется из шаблона пути маршрута (например, `/secrets/{secret_key}`), а не из фактического пути,
+    чтобы число временных рядов не зависело от ключей секретов. Запросы без маршрута помечаются как `unmatched`.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            ).observe(time.perf_counter() - started)
+
+
+class PoolStatsCollector(Collector):
+    """
+    Сборщик метрик пулов исполнителей, пула соединений MongoDB, кэша токенов и бюджетов запросов.
+    Значения читаются из счетчиков пулов в момент запроса `/metrics`, поэтому не добавляют работы в обработку запросов.
+    """
+
+    def __init__(self, app: FastAPI, token_cache: TTLCache) -> None:
+        self.app = app
+        self.token_cache = token_cache
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        state = self.app.state
+        if not hasattr(state, "secret_service"):
+            return
+
+        worker_pool = GaugeMetricFamily("worker_pool_tasks", "Worker pool task counters", labels=["pool", "counter"])
+        for pool in (state.secret_service.kdf_pool, state.user_service.hash_pool):
+            for counter, value in pool.stats().items():
+                if isinstance(value, int):
+                    worker_pool.add_metric([pool.name, counter], value)
+        yield worker_pool
+
+        if state.mongo_pool_stats is not None:
+            mongo_pool = GaugeMetricFamily(
+                "mongo_pool_connections", "MongoDB connection pool counters", labels=["counter"]
+            )
+            for counter, value in state.mongo_pool_stats.snapshot().items():
+                mongo_pool.add_metric([counter], value)
+            yield mongo_pool
+
+        token_cache = GaugeMetricFamily("token_cache_entries", "JWT verification cache counters", labels=["counter"])
+        for counter, value in self.token_cache.stats().items():
+            token_cache.add_metric([counter], value)
+        yield token_cache
+
+        if state.secret_service.data_keys is not None:
+            data_key_cache = GaugeMetricFamily(
+                "data_key_cache_entries", "Unwrapped data key cache counters", labels=["counter"]
+            )
+            for counter, value in state.secret_service.data_keys.cache.stats().items():
+                data_key_cache.add_metric([counter], value)
+            yield data_key_cache
+
+        admission = GaugeMetricFamily(
+            "admission_requests", "Request admission budget counters", labels=["budget", "counter"]
+        )
+        for name, budget in state.admission_budgets.items():
+            for counter, value in budget.stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    admission.add_metric([name, counter], value)
+        yield admission
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """
+    Периодически замеряет задержку цикла событий: насколько позже запланированного просыпается фоновая задача.
+    Большая задержка означает, что цикл событий блокируют синхронные вычисления.
+    """
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - started - interval))
+
+
+def register_pool_collector(app: FastAPI, token_cache: TTLCache) -> PoolStatsCollector:
+    """
+    Регистрирует сборщик метрик пулов в реестре Prometheus.
+    """
+    collector = PoolStatsCollector(app, token_cache)
+    REGISTRY.register(collector)
+    return collector
+
+
+def metrics_registry(pool_collector: PoolStatsCollector) -> CollectorRegistry:
+    """
+    Возвращает реестр, из которого отдаются метрики.
+
+    При запуске с несколькими процессами и заданной `PROMETHEUS_MULTIPROC_DIR` гистограммы каждого процесса пишутся
+    в файлы этого каталога, и реестр собирает их суммарные значения по всем процессам. Счетчики пулов при этом
+    относятся к процессу, который обработал запрос `/metrics`.
+    """
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(pool_collector)
+    return registry
@@ -0,0 +1,13 @@
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def trusted_response(model: BaseModel) -> ORJSONResponse:
+    """
+    Возвращает ответ из модели, которую сформировал сам сервер.
+
+    Если эндпоинт возвращает модель, FastAPI повторно проверяет ее по `response_model` и сериализует через
+    `jsonable_encoder`. Модель, созданная сервером, уже проверена при создании, поэтому она сразу сериализуется
+    orjson. `response_model` эндпоинта при этом остается для документации OpenAPI.
+    """
+    return ORJSONResponse(model.model_dump())
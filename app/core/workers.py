@@ -0,0 +1,161 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, TypeVar
+
+from app.exceptions import PoolSaturatedError
+
+T = TypeVar("T")
+
+
+class WorkerPool:
+    """
+    Ограниченный пул исполнителей для CPU-ёмких операций (вывод ключей, хеширование паролей).
+
+    Задачи выполняются в пуле потоков или процессов, чтобы не блокировать цикл событий. Одновременно выполняется
+    не более `max_workers` задач, еще не более `max_pending` ожидают своей очереди. Если пул заполнен, новая задача
+    сразу отклоняется с `PoolSaturatedError`, а не встает в бесконечную очередь.
+
+    При завершении процесса пул останавливают через `drain`: новые задачи отклоняются, а уже принятые дорабатывают.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int, kind: str = "thread") -> None:
+        """
+        Инициализация пула исполнителей.
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown worker pool kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.__executor = self.__create_executor(kind, max_workers, name)
+        self.__waiters: Deque[asyncio.Future] = deque()
+        self.__idle_waiter: Optional[asyncio.Future] = None
+        self.__running = 0
+        self.__in_flight = 0
+        self.__submitted = 0
+        self.__completed = 0
+        self.__rejected = 0
+        self.__draining = False
+
+    @staticmethod
+    def __create_executor(kind: str, max_workers: int, name: str) -> Executor:
+        """
+        Создает исполнитель нужного типа.
+        """
+        if kind == "process":
+            return ProcessPoolExecutor(max_workers=max_workers)
+        return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    async def __acquire(self) -> None:
+        """
+        Занимает исполнитель. Если все исполнители заняты, ждет своей очереди; ожидание прерывается
+        с `PoolSaturatedError`, если пул начинает останавливаться.
+        """
+        if self.__running < self.max_workers and not self.__waiters:
+            self.__running += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.__waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self.__release()
+            elif waiter in self.__waiters:
+                self.__waiters.remove(waiter)
+            raise
+
+    def __release(self) -> None:
+        """
+        Освобождает исполнитель: передает его первой ожидающей задаче или уменьшает число занятых исполнителей.
+        Вызывается, когда задача действительно завершилась в исполнителе, а не когда ее ожидание было отменено.
+        """
+        while self.__waiters:
+            waiter = self.__waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.__running -= 1
+        if self.__running == 0 and self.__idle_waiter is not None and not self.__idle_waiter.done():
+            self.__idle_waiter.set_result(None)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Выполняет функцию в пуле и возвращает ее результат.
+        Если все исполнители заняты и очередь ожидания заполнена или пул останавливается,
+        выбрасывает `PoolSaturatedError`.
+        """
+        if self.__draining or self.__in_flight >= self.max_workers + self.max_pending:
+            self.__rejected += 1
+            raise PoolSaturatedError(self.name)
+
+        self.__in_flight += 1
+        self.__submitted += 1
+        try:
+            try:
+                await self.__acquire()
+            except PoolSaturatedError:
+                self.__rejected += 1
+                raise
+
+            loop = asyncio.get_running_loop()
+            try:
+                future = self.__executor.submit(func, *args)
+            except BaseException:
+                self.__release()
+                raise
+            future.add_done_callback(lambda _: loop.call_soon_threadsafe(self.__release))
+            result = await asyncio.wrap_future(future, loop=loop)
+            self.__completed += 1
+            return result
+        finally:
+            self.__in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Возвращает текущую статистику пула: число выполняемых и ожидающих задач, счетчики отказов.
+        """
+        running = min(self.__in_flight, self.max_workers)
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": running,
+            "queued": self.__in_flight - running,
+            "submitted": self.__submitted,
+            "completed": self.__completed,
+            "rejected": self.__rejected,
+            "draining": self.__draining,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Останавливает пул исполнителей.
+        """
+        self.__executor.shutdown(wait=wait)
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Плавно останавливает пул: новые задачи и задачи, ожидающие исполнителя, сразу отклоняются
+        с `PoolSaturatedError`, а уже выполняющиеся дорабатывают не дольше `timeout` секунд.
+        Возвращает `True`, если все выполняющиеся задачи завершились за это время.
+        """
+        self.__draining = True
+        while self.__waiters:
+            waiter = self.__waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(PoolSaturatedError(self.name))
+
+        drained = True
+        if self.__running:
+            self.__idle_waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(asyncio.shield(self.__idle_waiter), timeout)
+            except asyncio.TimeoutError:
+                drained = False
+        self.__executor.shutdown(wait=False)
+        return drained
@@ -3,6 +3,28 @@ from fastapi import Request
 from fastapi.responses import JSONResponse
 
 
+class PoolSaturatedError(Exception):
+    """
+    Исключение, которое выбрасывается, когда пул исполнителей заполнен и не может принять новую задачу.
+    """
+
+    def __init__(self, pool_name: str) -> None:
+        self.pool_name = pool_name
+        super().__init__(f"Worker pool '{pool_name}' is saturated")
+
+
+class AdmissionRejectedError(Exception):
+    """
+    Исключение, которое выбрасывается, когда запрос не допущен к обработке: очередь бюджета заполнена
+    или запрос не дождется своей очереди до крайнего срока.
+    """
+
+    def __init__(self, budget_name: str, retry_after: int) -> None:
+        self.budget_name = budget_name
+        self.retry_after = retry_after
+        super().__init__(f"Admission budget '{budget_name}' rejected the request")
+
+
 async def jwt_decode_error_handler(request: Request, exc: JWTDecodeError) -> JSONResponse:
     """
     Обработчик ошибок для JWT токенов.
@@ -13,3 +35,15 @@ async def jwt_decode_error_handler(request: Request, exc: JWTDecodeError) -> JSO
         status_code=401,
         content={"detail": "Token has expired or is invalid. Please log in again."},
     )
+
+
+async def pool_saturated_error_handler(request: Request, exc: PoolSaturatedError) -> JSONResponse:
+    """
+    Обработчик ошибок переполнения пула исполнителей.
+    Возвращает ответ с ошибкой 503, чтобы клиент повторил запрос позже, вместо того чтобы ждать в длинной очереди.
+    """
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service is busy. Please try again later."},
+        headers={"Retry-After": "1"},
+    )
@@ -1,14 +1,48 @@
+import asyncio
 from contextlib import asynccontextmanager
+from typing import Optional
 
 from authx.exceptions import JWTDecodeError
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-from app.core.auth import security
-from app.core.config import DATABASE_NAME, MONGODB_URI, SALT
-from app.core.dependencies import create_secret_service_and_repository, create_user_service_and_repository
-from app.exceptions import jwt_decode_error_handler
-from app.models.secret import PassphraseRequest, SecretKeyResponse, SecretRequest, SecretResponse
+from app.core.admission import AdmissionMiddleware
+from app.core.auth import access_token_required, token_cache
+from app.core.config import (
+    DATABASE_NAME,
+    INDEX_INIT_MODE,
+    INDEX_INIT_RETRY_SECONDS,
+    MAX_TTL_SECONDS,
+    MONGODB_URI,
+    REDIS_URL,
+    SALT,
+    SHUTDOWN_DRAIN_TIMEOUT_SECONDS,
+    STORAGE_BACKEND,
+)
+from app.core.database import create_mongo_client, create_redis_client
+from app.core.dependencies import (
+    create_admission_budgets,
+    create_secret_service_and_repository,
+    create_user_service_and_repository,
+)
+from app.core.indexes import IndexInitializer
+from app.core.metrics import MetricsMiddleware, metrics_registry, monitor_event_loop_lag, register_pool_collector
+from app.core.responses import trusted_response
+from app.exceptions import PoolSaturatedError, jwt_decode_error_handler, pool_saturated_error_handler
+from app.models.secret import (
+    ClientSecretRequest,
+    ClientSecretResponse,
+    PassphraseRequest,
+    SecretBatchItemResponse,
+    SecretBatchRequest,
+    SecretBatchResponse,
+    SecretKeyResponse,
+    SecretRequest,
+    SecretResponse,
+    VerifierRequest,
+)
 from app.models.user import MessageResponse, TokenResponse, UserRequest
 
 
@@ -18,29 +52,74 @@ async def lifespan(app: FastAPI):
     Асинхронный контекст для инициализации и закрытия сервисов и репозиториев.
 
     Этот контекст управляет жизненным циклом приложения. Он создает и инициализирует сервисы и репозитории при старте
-    приложения, а затем закрывает их при завершении работы приложения.
+    приложения, а затем закрывает их при завершении работы приложения. Клиент MongoDB не создается для хранилища
+    `memory`, а клиент Redis создается только для хранилища `redis`.
+
+    При запуске с несколькими процессами (`--workers`) контекст выполняется в каждом процессе отдельно, поэтому пулы
+    соединений и исполнителей у каждого процесса свои. При остановке сервер сначала дожидается завершения текущих
+    запросов, затем пулы исполнителей дорабатывают принятые задачи KDF и хеширования, и только после этого закрываются
+    клиенты хранилищ.
+
+    Индексы проверяются один раз на версию схемы (см. `IndexInitializer`). В режиме `INDEX_INIT_MODE=background`
+    проверка выполняется фоновой задачей и не задерживает запуск, а `/readyz` отвечает 503, пока она не завершится;
+    в режиме `blocking` процесс начинает обслуживать запросы только после нее.
     """
+    mongo_client, mongo_pool_stats, db = None, None, None
+    if STORAGE_BACKEND != "memory":
+        mongo_client, mongo_pool_stats = create_mongo_client(MONGODB_URI)
+        db = mongo_client[DATABASE_NAME]
+    redis_client = create_redis_client(REDIS_URL) if STORAGE_BACKEND == "redis" else None
     secret_repository, secret_service = create_secret_service_and_repository(
-        mongodb_uri=MONGODB_URI, db_name=DATABASE_NAME, salt=SALT
+        db=db, salt=SALT, redis_client=redis_client
     )
-    user_repository, user_service = create_user_service_and_repository(mongodb_uri=MONGODB_URI, db_name=DATABASE_NAME)
+    user_repository, user_service = create_user_service_and_repository(db=db)
 
-    await secret_repository.initialize_indexes()
-    await user_repository.initialize_indexes()
+    if INDEX_INIT_MODE not in ("background", "blocking"):
+        raise ValueError(f"Unknown index initialization mode: {INDEX_INIT_MODE}")
+    index_initializer = IndexInitializer(db, [secret_repository, user_repository])
+    index_task = None
+    if INDEX_INIT_MODE == "background":
+        index_task = asyncio.create_task(index_initializer.run_until_ready(float(INDEX_INIT_RETRY_SECONDS)))
+    else:
+        await index_initializer.run()
 
     app.state.secret_service = secret_service
     app.state.user_service = user_service
+    app.state.mongo_pool_stats = mongo_pool_stats
+    app.state.index_initializer = index_initializer
+    loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag())
 
     yield
 
-    await secret_repository.close()
-    await user_repository.close()
+    loop_lag_monitor.cancel()
+    if index_task is not None:
+        index_task.cancel()
+    drain_timeout = float(SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+    await asyncio.gather(secret_service.kdf_pool.drain(drain_timeout), user_service.hash_pool.drain(drain_timeout))
+    if mongo_client is not None:
+        mongo_client.close()
+    if redis_client is not None:
+        await redis_client.aclose()
 
 
-app = FastAPI(lifespan=lifespan, title="One Time Secret API")
+app = FastAPI(lifespan=lifespan, title="One Time Secret API", default_response_class=ORJSONResponse)
 
 app.add_exception_handler(JWTDecodeError, jwt_decode_error_handler)
+app.add_exception_handler(PoolSaturatedError, pool_saturated_error_handler)
 
+admission_budgets = create_admission_budgets()
+app.state.admission_budgets = admission_budgets
+pool_collector = register_pool_collector(app, token_cache)
+
+app.add_middleware(
+    AdmissionMiddleware,
+    rules=[
+        ("/register|/login", admission_budgets["auth"]),
+        ("/generate/stream|/secrets/[^/]+/stream", None),
+        ("/generate(/.*)?|/secrets/.*", admission_budgets["secrets"]),
+    ],
+)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -51,7 +130,7 @@ app.add_middleware(
 
 
 @app.post("/register", response_model=MessageResponse, tags=["Authentication"])
-async def register_user(request: UserRequest) -> MessageResponse:
+async def register_user(request: UserRequest) -> ORJSONResponse:
     """
     Регистрация нового пользователя.
 
@@ -61,11 +140,11 @@ async def register_user(request: UserRequest) -> MessageResponse:
     :return: Ответ с сообщением об успешной регистрации.
     """
     await app.state.user_service.register_user(request.username, request.password)
-    return MessageResponse(message="User registered successfully")
+    return trusted_response(MessageResponse(message="User registered successfully"))
 
 
 @app.post("/login", response_model=TokenResponse, tags=["Authentication"])
-async def login_user(request: UserRequest) -> TokenResponse:
+async def login_user(request: UserRequest) -> ORJSONResponse:
     """
     Аутентификация пользователя.
 
@@ -75,40 +154,218 @@ async def login_user(request: UserRequest) -> TokenResponse:
     :return: Ответ с токеном доступа.
     """
     token = await app.state.user_service.authenticate_user(request.username, request.password)
-    return TokenResponse(access_token=token)
+    return trusted_response(TokenResponse(access_token=token))
 
 
 @app.post("/generate", response_model=SecretKeyResponse, tags=["Secrets"])
-async def generate_secret(
-    request: SecretRequest, dependencies=Depends(security.access_token_required)
-) -> SecretKeyResponse:
+async def generate_secret(request: SecretRequest, dependencies=Depends(access_token_required)) -> ORJSONResponse:
     """
     Генерация секрета.
 
     Этот эндпоинт позволяет пользователю с действительным токеном генерировать секрет и получать уникальный ключ.
+    Секрет перестает выдаваться по истечении `ttl_seconds` (или времени жизни по умолчанию).
 
-    :param request: Запрос на генерацию секрета с кодовой фразой.
+    :param request: Запрос на генерацию секрета с кодовой фразой и необязательным временем жизни.
     :param dependencies: Зависимость для проверки токена доступа.
     :return: Ответ с уникальным ключом для доступа к секрету.
     """
-    secret_key = await app.state.secret_service.generate_secret(request.secret, request.passphrase)
-    return SecretKeyResponse(secret_key=secret_key)
+    secret_key = await app.state.secret_service.generate_secret(request.secret, request.passphrase, request.ttl_seconds)
+    return trusted_response(SecretKeyResponse(secret_key=secret_key))
+
+
+@app.post("/generate/batch", response_model=SecretBatchResponse, tags=["Secrets"])
+async def generate_secrets(request: SecretBatchRequest, dependencies=Depends(access_token_required)) -> ORJSONResponse:
+    """
+    Пакетная генерация секретов.
+
+    Этот эндпоинт генерирует сразу несколько секретов, каждый со своей кодовой фразой, и сохраняет их одной вставкой.
+    Результаты возвращаются в порядке элементов запроса; если элемент не удалось сохранить, вместо ключа
+    возвращается описание ошибки, а остальные элементы сохраняются.
+
+    :param request: Запрос со списком секретов и кодовых фраз.
+    :param dependencies: Зависимость для проверки токена доступа.
+    :return: Ответ с ключом или ошибкой для каждого секрета.
+    """
+    results = await app.state.secret_service.generate_secrets(
+        [(item.secret, item.passphrase, item.ttl_seconds) for item in request.items]
+    )
+    return trusted_response(
+        SecretBatchResponse(
+            items=[SecretBatchItemResponse(secret_key=secret_key, error=error) for secret_key, error in results]
+        )
+    )
 
 
 @app.post("/secrets/{secret_key}", response_model=SecretResponse, tags=["Secrets"])
 async def get_secret(
-    secret_key: str, request: PassphraseRequest, dependencies=Depends(security.access_token_required)
-) -> SecretResponse:
+    secret_key: str, request: PassphraseRequest, dependencies=Depends(access_token_required)
+) -> ORJSONResponse:
     """
     Получение секрета.
 
     Этот эндпоинт позволяет пользователю с действительным токеном и правильной кодовой фразой получить секрет,
-    используя уникальный ключ.
+    используя уникальный ключ. Число попыток ограничено для пользователя и для секрета (429 с `Retry-After`),
+    а после нескольких неверных кодовых фраз секрет удаляется.
 
     :param secret_key: Ключ для доступа к секрету.
     :param request: Запрос с кодовой фразой для расшифровки секрета.
     :param dependencies: Зависимость для проверки токена доступа.
     :return: Ответ с расшифрованным секретом.
     """
-    secret = await app.state.secret_service.get_secret(secret_key, request.passphrase)
-    return SecretResponse(secret=secret)
+    secret = await app.state.secret_service.get_secret(secret_key, request.passphrase, dependencies.sub)
+    return trusted_response(SecretResponse(secret=secret))
+
+
+@app.post("/generate/stream", response_model=SecretKeyResponse, tags=["Secrets"])
+async def generate_stream_secret(
+    request: Request,
+    passphrase: str = Header(alias="X-Passphrase"),
+    ttl_seconds: Optional[int] = Header(default=None, alias="X-TTL-Seconds", gt=0, le=int(MAX_TTL_SECONDS)),
+    dependencies=Depends(access_token_required),
+) -> ORJSONResponse:
+    """
+    Генерация большого секрета.
+
+    Этот эндпоинт принимает секрет произвольного размера (например, файл) в теле запроса и шифрует его по частям
+    по мере поступления, не загружая целиком в память. Кодовая фраза передается в заголовке `X-Passphrase`,
+    а необязательное время жизни секрета — в заголовке `X-TTL-Seconds`.
+
+    :param request: Запрос, тело которого содержит секрет.
+    :param passphrase: Кодовая фраза для шифрования секрета.
+    :param ttl_seconds: Время жизни секрета в секундах.
+    :param dependencies: Зависимость для проверки токена доступа.
+    :return: Ответ с уникальным ключом для доступа к секрету.
+    """
+    secret_key = await app.state.secret_service.generate_stream_secret(request.stream(), passphrase, ttl_seconds)
+    return trusted_response(SecretKeyResponse(secret_key=secret_key))
+
+
+@app.post("/secrets/{secret_key}/stream", response_class=StreamingResponse, tags=["Secrets"])
+async def get_stream_secret(
+    secret_key: str, request: PassphraseRequest, dependencies=Depends(access_token_required)
+) -> StreamingResponse:
+    """
+    Получение большого секрета.
+
+    Этот эндпоинт возвращает секрет потоком, расшифровывая его по частям. Подходит и для обычных секретов.
+
+    :param secret_key: Ключ для доступа к секрету.
+    :param request: Запрос с кодовой фразой для расшифровки секрета.
+    :param dependencies: Зависимость для проверки токена доступа.
+    :return: Поток с расшифрованным секретом.
+    """
+    chunks = await app.state.secret_service.get_stream_secret(secret_key, request.passphrase, dependencies.sub)
+    return StreamingResponse(chunks, media_type="application/octet-stream")
+
+
+@app.post("/generate/client", response_model=SecretKeyResponse, tags=["Secrets"])
+async def generate_client_secret(
+    request: ClientSecretRequest, dependencies=Depends(access_token_required)
+) -> ORJSONResponse:
+    """
+    Сохранение секрета, зашифрованного на клиенте.
+
+    Этот эндпоинт принимает шифротекст и верификатор, полученные клиентом из кодовой фразы, и сохраняет их
+    без вывода ключа и шифрования на сервере. Сервер не видит ни секрета, ни кодовой фразы.
+
+    :param request: Запрос с шифротекстом, верификатором и необязательным временем жизни.
+    :param dependencies: Зависимость для проверки токена доступа.
+    :return: Ответ с уникальным ключом для доступа к секрету.
+    """
+    secret_key = await app.state.secret_service.generate_client_secret(
+        request.ciphertext, request.verifier, request.ttl_seconds
+    )
+    return trusted_response(SecretKeyResponse(secret_key=secret_key))
+
+
+@app.post("/secrets/{secret_key}/client", response_model=ClientSecretResponse, tags=["Secrets"])
+async def get_client_secret(
+    secret_key: str, request: VerifierRequest, dependencies=Depends(access_token_required)
+) -> ORJSONResponse:
+    """
+    Получение секрета, зашифрованного на клиенте.
+
+    Этот эндпоинт выдает шифротекст по верному верификатору и удаляет секрет; расшифровка выполняется на клиенте.
+    Ограничения числа попыток и удаление секрета после нескольких неверных верификаторов такие же, как у `/secrets`.
+
+    :param secret_key: Ключ для доступа к секрету.
+    :param request: Запрос с верификатором.
+    :param dependencies: Зависимость для проверки токена доступа.
+    :return: Ответ с шифротекстом секрета.
+    """
+    ciphertext = await app.state.secret_service.get_client_secret(secret_key, request.verifier, dependencies.sub)
+    return trusted_response(ClientSecretResponse(ciphertext=ciphertext))
+
+
+@app.get("/stats/pools", tags=["Service"])
+async def get_pool_stats(dependencies=Depends(access_token_required)) -> dict:
+    """
+    Статистика пулов.
+
+    Этот эндпоинт возвращает состояние пула соединений MongoDB, пулов исполнителей для вывода ключей и хеширования
+    паролей и бюджетов одновременно обрабатываемых запросов. Используется для настройки их размеров. Без MongoDB
+    статистика пула соединений равна `null`.
+
+    :param dependencies: Зависимость для проверки токена доступа.
+    :return: Счетчики пулов.
+    """
+    return {
+        "mongo": app.state.mongo_pool_stats.snapshot() if app.state.mongo_pool_stats else None,
+        "kdf": app.state.secret_service.kdf_pool.stats(),
+        "hash": app.state.user_service.hash_pool.stats(),
+        "admission": {name: budget.stats() for name, budget in app.state.admission_budgets.items()},
+    }
+
+
+@app.get("/healthz", tags=["Service"])
+async def healthz() -> ORJSONResponse:
+    """
+    Проверка работоспособности процесса.
+
+    Этот эндпоинт не обращается к хранилищам и отвечает, пока цикл событий процесса обрабатывает запросы.
+
+    :return: Статус процесса.
+    """
+    return ORJSONResponse({"status": "ok"})
+
+
+@app.get("/readyz", tags=["Service"])
+async def readyz() -> ORJSONResponse:
+    """
+    Проверка готовности процесса принимать запросы.
+
+    Этот эндпоинт отвечает 200, когда сервисы созданы, индексы проверены и пулы исполнителей не останавливаются,
+    иначе — 503. В ответе приводится состояние инициализации индексов и счетчики пулов.
+
+    :return: Статус готовности, состояние индексов и пулов.
+    """
+    state = app.state
+    if not hasattr(state, "secret_service"):
+        return ORJSONResponse({"status": "starting"}, status_code=503)
+
+    index_initializer = getattr(state, "index_initializer", None)
+    pools = {
+        "mongo": state.mongo_pool_stats.snapshot() if state.mongo_pool_stats else None,
+        "kdf": state.secret_service.kdf_pool.stats(),
+        "hash": state.user_service.hash_pool.stats(),
+    }
+    ready = (index_initializer is None or index_initializer.ready) and not (
+        pools["kdf"]["draining"] or pools["hash"]["draining"]
+    )
+    return ORJSONResponse(
+        {
+            "status": "ready" if ready else "not_ready",
+            "indexes": index_initializer.stats() if index_initializer else None,
+            "pools": pools,
+        },
+        status_code=200 if ready else 503,
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """
+    Метрики в формате Prometheus: задержки запросов по маршрутам, длительность этапов обработки, задержка цикла
+    событий и состояние пулов.
+    """
+    return Response(generate_latest(metrics_registry(pool_collector)), media_type=CONTENT_TYPE_LATEST)
@@ -1,25 +1,104 @@
 from datetime import datetime
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.core.config import MAX_CLIENT_SECRET_LENGTH, MAX_SECRET_BATCH_SIZE, MAX_TTL_SECONDS
+
+
+class SecretEnvelope(BaseModel):
+    """
+    Модель параметров шифрования, сохраняемых вместе с секретом: версия формата, алгоритм вывода ключа,
+    его параметры и случайная соль секрета (в base64).
+    """
+
+    version: int
+    kdf: str
+    params: Dict[str, int]
+    salt: str
 
 
 class Secret(BaseModel):
     """
     Модель для представления секрета с ключом, секретным значением и временем истечения.
+    Секреты, сохраненные до появления конверта, не содержат его и расшифровываются с общей солью.
+    Начиная со второй версии конверта секретное значение хранится токеном Fernet, а раньше — двойным base64.
+    У больших секретов, загруженных потоком, содержимое хранится в отдельных частях (`chunks` — их число),
+    а секретное значение содержит зашифрованную пустую строку для проверки кодовой фразы.
+    Секреты, зашифрованные на клиенте, хранят шифротекст клиента как есть и хеш верификатора (`verifier_hash`),
+    по которому выдаются; сервер их не расшифровывает.
+    Если задан мастер-ключ, секретное значение дополнительно зашифровано ключом данных `data_key_id`.
     """
 
     secret_key: str
     secret: str
     expiration: datetime
+    envelope: Optional[SecretEnvelope] = None
+    chunks: Optional[int] = None
+    verifier_hash: Optional[str] = None
+    data_key_id: Optional[str] = None
+
+
+class DataKey(BaseModel):
+    """
+    Модель ключа данных, зашифрованного (обернутого) мастер-ключом `master_key_id`.
+    """
+
+    key_id: str
+    wrapped_key: str
+    master_key_id: str
+    created_at: datetime
+
+
+class SecretChunk(BaseModel):
+    """
+    Модель для представления зашифрованной части большого секрета.
+    Если задан мастер-ключ, данные части дополнительно зашифрованы ключом данных `data_key_id`.
+    """
+
+    secret_key: str
+    n: int
+    data: str
+    expiration: datetime
+    data_key_id: Optional[str] = None
 
 
 class SecretRequest(BaseModel):
     """
     Модель для запроса секрета, содержащего секретное значение и кодовую фразу.
+    Время жизни секрета в секундах (`ttl_seconds`) ограничено MAX_TTL_SECONDS, по умолчанию — TTL_INDEX_SECONDS.
     """
 
     secret: str
     passphrase: str
+    ttl_seconds: Optional[int] = Field(default=None, gt=0, le=int(MAX_TTL_SECONDS))
+
+
+class ClientSecretRequest(BaseModel):
+    """
+    Модель для запроса сохранения секрета, зашифрованного на клиенте: шифротекст и верификатор, которые сервер
+    хранит, не расшифровывая. Верификатор выводится клиентом из кодовой фразы независимо от ключа шифрования.
+    """
+
+    ciphertext: str = Field(min_length=1, max_length=int(MAX_CLIENT_SECRET_LENGTH))
+    verifier: str = Field(min_length=16, max_length=512)
+    ttl_seconds: Optional[int] = Field(default=None, gt=0, le=int(MAX_TTL_SECONDS))
+
+
+class VerifierRequest(BaseModel):
+    """
+    Модель для запроса секрета, зашифрованного на клиенте, по верификатору.
+    """
+
+    verifier: str = Field(min_length=16, max_length=512)
+
+
+class SecretBatchRequest(BaseModel):
+    """
+    Модель для запроса пакетной генерации секретов.
+    """
+
+    items: List[SecretRequest] = Field(min_length=1, max_length=int(MAX_SECRET_BATCH_SIZE))
 
 
 class PassphraseRequest(BaseModel):
@@ -44,3 +123,28 @@ class SecretResponse(BaseModel):
     """
 
     secret: str
+
+
+class ClientSecretResponse(BaseModel):
+    """
+    Модель для ответа, содержащего шифротекст секрета, зашифрованного на клиенте.
+    """
+
+    ciphertext: str
+
+
+class SecretBatchItemResponse(BaseModel):
+    """
+    Модель для результата генерации одного секрета из пакета: ключ секрета или описание ошибки.
+    """
+
+    secret_key: Optional[str] = None
+    error: Optional[str] = None
+
+
+class SecretBatchResponse(BaseModel):
+    """
+    Модель для ответа на пакетную генерацию секретов. Результаты идут в порядке элементов запроса.
+    """
+
+    items: List[SecretBatchItemResponse]
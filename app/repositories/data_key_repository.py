@@ -0,0 +1,71 @@
+from typing import AsyncIterator, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DESCENDING
+
+from app.models.secret import DataKey
+
+
+class DataKeyRepository:
+    """
+    Репозиторий для работы с коллекцией ключей данных `data_keys` в базе данных MongoDB.
+
+    Ключ данных хранится только в обернутом мастер-ключом виде. Идентификатор ключа используется как `_id`,
+    поэтому отдельные индексы не нужны: ключей немного (по одному на период ротации и процесс).
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        """
+        Инициализация репозитория для работы с базой данных MongoDB.
+        """
+        self.__collection = db["data_keys"]
+
+    @staticmethod
+    def __from_document(document: dict) -> DataKey:
+        document["key_id"] = document.pop("_id")
+        return DataKey(**document)
+
+    async def create(self, data_key: DataKey) -> None:
+        """
+        Сохраняет новый ключ данных.
+        """
+        document = data_key.model_dump()
+        document["_id"] = document.pop("key_id")
+        await self.__collection.insert_one(document)
+
+    async def get(self, key_id: str) -> Optional[DataKey]:
+        """
+        Получает ключ данных по его идентификатору.
+        """
+        document = await self.__collection.find_one({"_id": key_id})
+        return self.__from_document(document) if document else None
+
+    async def get_latest(self, master_key_id: str) -> Optional[DataKey]:
+        """
+        Получает последний созданный ключ данных, обернутый мастер-ключом `master_key_id`.
+        """
+        document = await self.__collection.find_one({"master_key_id": master_key_id}, sort=[("created_at", DESCENDING)])
+        return self.__from_document(document) if document else None
+
+    async def iter_wrapped_by_other(self, master_key_id: str, batch_size: int) -> AsyncIterator[List[DataKey]]:
+        """
+        Возвращает пачками ключи данных, обернутые не мастер-ключом `master_key_id`.
+        """
+        batch: List[DataKey] = []
+        cursor = self.__collection.find({"master_key_id": {"$ne": master_key_id}}).batch_size(batch_size)
+        async for document in cursor:
+            batch.append(self.__from_document(document))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def update_wrapped_key(self, data_key: DataKey) -> None:
+        """
+        Сохраняет ключ данных, заново обернутый другим мастер-ключом.
+        """
+        await self.__collection.update_one(
+            {"_id": data_key.key_id},
+            {"$set": {"wrapped_key": data_key.wrapped_key, "master_key_id": data_key.master_key_id}},
+        )
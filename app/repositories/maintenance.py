@@ -0,0 +1,33 @@
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+
+async def delete_in_batches(
+    collection: AsyncIOMotorCollection,
+    query: dict,
+    batch_size: int,
+    pause: float = 0.0,
+    sort: Optional[List[Tuple[str, int]]] = None,
+) -> AsyncIterator[int]:
+    """
+    Удаляет документы, подходящие под `query`, пачками по `batch_size` и возвращает число удаленных в каждой пачке.
+
+    Каждая пачка — выборка `_id` по индексу (порядок `sort`) и удаление по `_id`, поэтому одна операция удаления
+    затрагивает не больше `batch_size` документов и не держит блокировки долго. Между пачками делается пауза `pause`
+    секунд, чтобы вторичные узлы успевали применять удаления.
+    """
+    while True:
+        cursor = collection.find(query, {"_id": 1})
+        if sort:
+            cursor = cursor.sort(sort)
+        ids = [document["_id"] async for document in cursor.limit(batch_size)]
+        if not ids:
+            return
+        result = await collection.delete_many({"_id": {"$in": ids}})
+        yield result.deleted_count
+        if len(ids) < batch_size:
+            return
+        if pause:
+            await asyncio.sleep(pause)
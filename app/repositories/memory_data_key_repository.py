@@ -0,0 +1,48 @@
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.models.secret import DataKey
+
+
+class InMemoryDataKeyRepository:
+    """
+    Репозиторий ключей данных, хранящий их в памяти процесса. Используется вместе с хранилищем секретов в памяти.
+    """
+
+    def __init__(self) -> None:
+        """
+        Инициализация пустого хранилища.
+        """
+        self.__keys: Dict[str, DataKey] = {}
+
+    async def create(self, data_key: DataKey) -> None:
+        """
+        Сохраняет новый ключ данных.
+        """
+        self.__keys[data_key.key_id] = data_key
+
+    async def get(self, key_id: str) -> Optional[DataKey]:
+        """
+        Получает ключ данных по его идентификатору.
+        """
+        return self.__keys.get(key_id)
+
+    async def get_latest(self, master_key_id: str) -> Optional[DataKey]:
+        """
+        Получает последний созданный ключ данных, обернутый мастер-ключом `master_key_id`.
+        """
+        keys = [key for key in self.__keys.values() if key.master_key_id == master_key_id]
+        return max(keys, key=lambda key: key.created_at, default=None)
+
+    async def iter_wrapped_by_other(self, master_key_id: str, batch_size: int) -> AsyncIterator[List[DataKey]]:
+        """
+        Возвращает пачками ключи данных, обернутые не мастер-ключом `master_key_id`.
+        """
+        keys = [key for key in self.__keys.values() if key.master_key_id != master_key_id]
+        for start in range(0, len(keys), batch_size):
+            yield keys[start : start + batch_size]
+
+    async def update_wrapped_key(self, data_key: DataKey) -> None:
+        """
+        Сохраняет ключ данных, заново обернутый другим мастер-ключом.
+        """
+        self.__keys[data_key.key_id] = data_key
@@ -0,0 +1,157 @@
+import heapq
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from app.models.secret import Secret, SecretChunk
+
+
+class InMemorySecretRepository:
+    """
+    Репозиторий секретов, хранящий данные в памяти процесса.
+
+    Используется в тестах, нагрузочных тестах и на одиночных установках без MongoDB. Секреты и их части удаляются
+    в момент времени из поля `expiration`. Сроки хранятся в куче, и просроченные записи удаляются перед каждой
+    операцией, поэтому отдельная фоновая задача не нужна.
+    Все операции выполняются без `await` внутри, поэтому в пределах цикла событий они атомарны.
+    """
+
+    def __init__(self) -> None:
+        """
+        Инициализация пустого хранилища.
+        """
+        self.__secrets: Dict[str, Tuple[float, dict]] = {}
+        self.__chunks: Dict[str, Tuple[float, Dict[int, Tuple[str, Optional[str]]]]] = {}
+        self.__expirations: List[Tuple[float, str, str]] = []
+
+    @staticmethod
+    def __deadline(expiration: datetime) -> float:
+        """
+        Возвращает момент удаления записи (Unix time). Время без часового пояса считается временем UTC, как в MongoDB.
+        """
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=timezone.utc)
+        return expiration.timestamp()
+
+    def __purge_expired(self) -> None:
+        """
+        Удаляет записи, срок хранения которых истек. Записи в куче, для которых секрет уже удален
+        или заменен, пропускаются.
+        """
+        now = time.time()
+        while self.__expirations and self.__expirations[0][0] <= now:
+            deadline, kind, secret_key = heapq.heappop(self.__expirations)
+            storage = self.__secrets if kind == "secret" else self.__chunks
+            entry = storage.get(secret_key)
+            if entry is not None and entry[0] == deadline:
+                del storage[secret_key]
+
+    async def initialize_indexes(self) -> None:
+        """
+        Индексы не нужны: поиск идет по словарю, а уникальность ключей проверяется при вставке.
+        """
+
+    def __insert(self, secret: Secret) -> bool:
+        """
+        Сохраняет секрет, если секрета с таким ключом еще нет.
+        """
+        if secret.secret_key in self.__secrets:
+            return False
+        deadline = self.__deadline(secret.expiration)
+        self.__secrets[secret.secret_key] = (deadline, secret.model_dump())
+        heapq.heappush(self.__expirations, (deadline, "secret", secret.secret_key))
+        return True
+
+    async def create(self, secret: Secret) -> None:
+        """
+        Создает новый секрет. Ключ секрета уникален, как в MongoDB: при повторе выбрасывается `DuplicateKeyError`.
+        """
+        self.__purge_expired()
+        if not self.__insert(secret):
+            raise DuplicateKeyError(f"Secret '{secret.secret_key}' already exists", code=11000)
+
+    async def create_many(self, secrets: List[Secret]) -> Set[int]:
+        """
+        Создает несколько секретов. Возвращает индексы секретов, которые не удалось сохранить.
+        """
+        self.__purge_expired()
+        return {index for index, secret in enumerate(secrets) if not self.__insert(secret)}
+
+    async def get(self, secret_key: str) -> Optional[Secret]:
+        """
+        Получает секрет вместе с параметрами шифрования по его ключу.
+        """
+        self.__purge_expired()
+        entry = self.__secrets.get(secret_key)
+        return Secret(**entry[1]) if entry else None
+
+    async def delete(self, secret_key: str) -> bool:
+        """
+        Удаляет секрет по его ключу. Возвращает `True`, только если секрет был удален именно этим вызовом.
+        """
+        self.__purge_expired()
+        return self.__secrets.pop(secret_key, None) is not None
+
+    async def record_failed_attempt(self, secret: Secret) -> int:
+        """
+        Увеличивает счетчик неверных кодовых фраз секрета и возвращает его новое значение или 0, если секрета уже нет.
+        """
+        self.__purge_expired()
+        entry = self.__secrets.get(secret.secret_key)
+        if entry is None:
+            return 0
+        entry[1]["failed_attempts"] = entry[1].get("failed_attempts", 0) + 1
+        return entry[1]["failed_attempts"]
+
+    async def delete_verified(self, secret_key: str, verifier_hash: str) -> Optional[Secret]:
+        """
+        Удаляет и возвращает секрет, если хеш его верификатора совпадает с `verifier_hash`.
+        """
+        self.__purge_expired()
+        entry = self.__secrets.get(secret_key)
+        if entry is None or entry[1].get("verifier_hash") != verifier_hash:
+            return None
+        del self.__secrets[secret_key]
+        return Secret(**entry[1])
+
+    async def create_chunk(self, chunk: SecretChunk) -> None:
+        """
+        Сохраняет часть большого секрета. Номер части уникален в пределах секрета.
+        """
+        self.__purge_expired()
+        entry = self.__chunks.get(chunk.secret_key)
+        if entry is None:
+            entry = (self.__deadline(chunk.expiration), {})
+            self.__chunks[chunk.secret_key] = entry
+            heapq.heappush(self.__expirations, (entry[0], "chunks", chunk.secret_key))
+        if chunk.n in entry[1]:
+            raise DuplicateKeyError(f"Chunk {chunk.n} of secret '{chunk.secret_key}' already exists", code=11000)
+        entry[1][chunk.n] = (chunk.data, chunk.data_key_id)
+
+    async def iter_chunks(self, secret_key: str, batch_size: int = 4) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """
+        Возвращает данные частей секрета по порядку вместе с ключом данных каждой части. `batch_size`
+        не используется: части уже находятся в памяти.
+        """
+        self.__purge_expired()
+        entry = self.__chunks.get(secret_key)
+        if entry is None:
+            return
+        for _, chunk in sorted(entry[1].items()):
+            yield chunk
+
+    async def delete_chunks(self, secret_key: str) -> None:
+        """
+        Удаляет все части секрета.
+        """
+        self.__chunks.pop(secret_key, None)
+
+    async def clear_all(self) -> None:
+        """
+        Удаляет все секреты и их части.
+        """
+        self.__secrets.clear()
+        self.__chunks.clear()
+        self.__expirations.clear()
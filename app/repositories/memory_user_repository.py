@@ -0,0 +1,47 @@
+import uuid
+from typing import Dict, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from app.models.user import User
+
+
+class InMemoryUserRepository:
+    """
+    Репозиторий пользователей, хранящий данные в памяти процесса.
+
+    Используется в тестах, нагрузочных тестах и на одиночных установках без MongoDB.
+    Имя пользователя уникально, как при уникальном индексе в MongoDB.
+    """
+
+    def __init__(self) -> None:
+        """
+        Инициализация пустого хранилища.
+        """
+        self.__users: Dict[str, dict] = {}
+
+    async def create_user(self, user: User) -> None:
+        """
+        Создает нового пользователя. Если пользователь с таким именем уже есть, выбрасывается `DuplicateKeyError`.
+        """
+        if user.username in self.__users:
+            raise DuplicateKeyError(f"User '{user.username}' already exists", code=11000)
+        self.__users[user.username] = {**user.model_dump(), "id": uuid.uuid4().hex}
+
+    async def get_user(self, username: str) -> Optional[User]:
+        """
+        Получает пользователя по имени пользователя (username).
+        """
+        user = self.__users.get(username)
+        return User(**user) if user else None
+
+    async def initialize_indexes(self) -> None:
+        """
+        Индексы не нужны: пользователи хранятся в словаре по имени.
+        """
+
+    async def clear_all(self) -> None:
+        """
+        Удаляет всех пользователей.
+        """
+        self.__users.clear()
@@ -0,0 +1,87 @@
+from typing import AsyncIterator, List, Optional, Protocol, Set, Tuple, runtime_checkable
+
+from app.models.secret import DataKey, Secret, SecretChunk
+from app.models.user import User
+
+
+class SecretRepositoryProtocol(Protocol):
+    """
+    Интерфейс хранилища секретов, от которого зависит `SecretService`.
+
+    Реализации должны удалять секреты и их части после истечения срока действия, выбрасывать
+    `pymongo.errors.DuplicateKeyError` при повторе ключа секрета или номера части и гарантировать, что из нескольких
+    конкурентных вызовов `delete` для одного секрета `True` вернет ровно один.
+    """
+
+    async def initialize_indexes(self) -> None: ...
+
+    async def create(self, secret: Secret) -> None: ...
+
+    async def create_many(self, secrets: List[Secret]) -> Set[int]: ...
+
+    async def get(self, secret_key: str) -> Optional[Secret]: ...
+
+    async def delete(self, secret_key: str) -> bool: ...
+
+    async def delete_verified(self, secret_key: str, verifier_hash: str) -> Optional[Secret]: ...
+
+    async def record_failed_attempt(self, secret: Secret) -> int: ...
+
+    async def create_chunk(self, chunk: SecretChunk) -> None: ...
+
+    def iter_chunks(self, secret_key: str, batch_size: int = 4) -> AsyncIterator[Tuple[str, Optional[str]]]: ...
+
+    async def delete_chunks(self, secret_key: str) -> None: ...
+
+    async def clear_all(self) -> None: ...
+
+
+@runtime_checkable
+class ResealableSecretRepositoryProtocol(SecretRepositoryProtocol, Protocol):
+    """
+    Интерфейс хранилища секретов с пакетным перешифрованием секретов и их частей ключом данных, от которого зависит
+    `SecretService.reseal_secrets`. Реализован хранилищем MongoDB.
+
+    Записи обновляются, только если их ключ данных не изменился с момента чтения.
+    """
+
+    def iter_sealed_with_other(self, data_key_id: str, batch_size: int) -> AsyncIterator[List[Secret]]: ...
+
+    async def replace_sealed_many(self, secrets: List[Tuple[Secret, Optional[str]]]) -> int: ...
+
+    def iter_sealed_chunks_with_other(self, data_key_id: str, batch_size: int) -> AsyncIterator[List[SecretChunk]]: ...
+
+    async def replace_sealed_chunks_many(self, chunks: List[Tuple[SecretChunk, Optional[str]]]) -> int: ...
+
+
+class DataKeyRepositoryProtocol(Protocol):
+    """
+    Интерфейс хранилища ключей данных, от которого зависит `DataKeyService`.
+    """
+
+    async def create(self, data_key: DataKey) -> None: ...
+
+    async def get(self, key_id: str) -> Optional[DataKey]: ...
+
+    async def get_latest(self, master_key_id: str) -> Optional[DataKey]: ...
+
+    def iter_wrapped_by_other(self, master_key_id: str, batch_size: int) -> AsyncIterator[List[DataKey]]: ...
+
+    async def update_wrapped_key(self, data_key: DataKey) -> None: ...
+
+
+class UserRepositoryProtocol(Protocol):
+    """
+    Интерфейс хранилища пользователей, от которого зависит `UserService`.
+
+    Имя пользователя уникально: при попытке создать пользователя с существующим именем реализации выбрасывают
+    `pymongo.errors.DuplicateKeyError`.
+    """
+
+    async def initialize_indexes(self) -> None: ...
+
+    async def create_user(self, user: User) -> None: ...
+
+    async def get_user(self, username: str) -> Optional[User]: ...
+
+    async def clear_all(self) -> None: ...
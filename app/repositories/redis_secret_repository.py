@@ -0,0 +1,164 @@
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Set, Tuple
+
+from pymongo.errors import DuplicateKeyError
+from redis.asyncio import Redis
+
+from app.models.secret import Secret, SecretChunk
+
+SECRET_PREFIX = "secret:"
+CHUNKS_PREFIX = "secret_chunks:"
+FAILURES_PREFIX = "secret_failures:"
+
+
+def _expire_at_ms(expiration: datetime) -> int:
+    """
+    Переводит время истечения в Unix time в миллисекундах. Время без часового пояса считается временем UTC.
+    """
+    if expiration.tzinfo is None:
+        expiration = expiration.replace(tzinfo=timezone.utc)
+    return int(expiration.timestamp() * 1000)
+
+
+class RedisSecretRepository:
+    """
+    Репозиторий секретов в хранилище с протоколом Redis.
+
+    Секрет хранится строкой с JSON документа по ключу `secret:<secret_key>`, а части большого секрета — хешем
+    `secret_chunks:<secret_key>` с номером части в качестве поля; данные части, зашифрованные ключом данных, хранятся
+    как `<data_key_id>:<данные>` (в токенах Fernet и идентификаторах ключей нет двоеточий). Время жизни задается каждому ключу (PXAT) по полю
+    `expiration`, поэтому хранилище само удаляет секрет ровно в момент его истечения, без минутной задержки
+    TTL-монитора MongoDB.
+
+    Секрет нельзя читать через GETDEL: при неверной кодовой фразе он должен остаться. Поэтому чтение выполняется GET,
+    а захват секрета — командой DEL, число удаленных ключей в ответе которой атомарно определяет единственного читателя.
+    """
+
+    def __init__(self, client: Redis):
+        """
+        Инициализация репозитория. Клиент и его пул соединений управляются жизненным циклом приложения.
+        """
+        self.__client = client
+
+    async def initialize_indexes(self) -> None:
+        """
+        Индексы не нужны: секреты и их части адресуются ключами, а время жизни задается каждому ключу.
+        """
+
+    async def create(self, secret: Secret) -> None:
+        """
+        Создает новый секрет. Ключ секрета уникален: при повторе выбрасывается `DuplicateKeyError`.
+        """
+        created = await self.__client.set(
+            SECRET_PREFIX + secret.secret_key,
+            secret.model_dump_json(),
+            nx=True,
+            pxat=_expire_at_ms(secret.expiration),
+        )
+        if not created:
+            raise DuplicateKeyError(f"Secret '{secret.secret_key}' already exists", code=11000)
+
+    async def create_many(self, secrets: List[Secret]) -> Set[int]:
+        """
+        Создает несколько секретов одним конвейером команд, то есть за один сетевой обмен.
+        Возвращает индексы секретов, которые не удалось сохранить.
+        """
+        async with self.__client.pipeline(transaction=False) as pipeline:
+            for secret in secrets:
+                pipeline.set(
+                    SECRET_PREFIX + secret.secret_key,
+                    secret.model_dump_json(),
+                    nx=True,
+                    pxat=_expire_at_ms(secret.expiration),
+                )
+            results = await pipeline.execute(raise_on_error=False)
+        return {index for index, result in enumerate(results) if result is not True}
+
+    async def get(self, secret_key: str) -> Optional[Secret]:
+        """
+        Получает секрет вместе с параметрами шифрования по его ключу.
+        """
+        secret = await self.__client.get(SECRET_PREFIX + secret_key)
+        return Secret.model_validate_json(secret) if secret else None
+
+    async def delete(self, secret_key: str) -> bool:
+        """
+        Удаляет секрет по его ключу. Возвращает `True`, только если секрет был удален именно этим вызовом.
+        """
+        return await self.__client.delete(SECRET_PREFIX + secret_key) == 1
+
+    async def record_failed_attempt(self, secret: Secret) -> int:
+        """
+        Увеличивает счетчик неверных кодовых фраз секрета (INCR по ключу `secret_failures:<secret_key>`, который
+        истекает вместе с секретом) и возвращает его новое значение. Счетчик общий для всех процессов приложения.
+        """
+        key = FAILURES_PREFIX + secret.secret_key
+        async with self.__client.pipeline(transaction=True) as pipeline:
+            pipeline.incr(key)
+            pipeline.pexpireat(key, _expire_at_ms(secret.expiration))
+            failures, _ = await pipeline.execute()
+        return failures
+
+    async def delete_verified(self, secret_key: str, verifier_hash: str) -> Optional[Secret]:
+        """
+        Удаляет и возвращает секрет, если хеш его верификатора совпадает с `verifier_hash`.
+        Верификатор сравнивается после GET, а единственного читателя, как и в `delete`, определяет DEL.
+        """
+        secret = await self.get(secret_key)
+        if secret is None or secret.verifier_hash != verifier_hash:
+            return None
+        return secret if await self.delete(secret_key) else None
+
+    async def create_chunk(self, chunk: SecretChunk) -> None:
+        """
+        Сохраняет часть большого секрета и продлевает время жизни хеша частей до времени истечения секрета.
+        Номер части уникален в пределах секрета.
+        """
+        key = CHUNKS_PREFIX + chunk.secret_key
+        async with self.__client.pipeline(transaction=True) as pipeline:
+            value = chunk.data if chunk.data_key_id is None else f"{chunk.data_key_id}:{chunk.data}"
+            pipeline.hsetnx(key, str(chunk.n), value)
+            pipeline.pexpireat(key, _expire_at_ms(chunk.expiration))
+            created, _ = await pipeline.execute()
+        if not created:
+            raise DuplicateKeyError(f"Chunk {chunk.n} of secret '{chunk.secret_key}' already exists", code=11000)
+
+    async def iter_chunks(self, secret_key: str, batch_size: int = 4) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """
+        Возвращает данные частей секрета по порядку вместе с ключом данных каждой части, читая их пачками
+        по `batch_size`. Чтение останавливается на первой отсутствующей части.
+        """
+        key = CHUNKS_PREFIX + secret_key
+        count = await self.__client.hlen(key)
+        for start in range(0, count, batch_size):
+            fields = [str(n) for n in range(start, min(start + batch_size, count))]
+            for data in await self.__client.hmget(key, fields):
+                if data is None:
+                    return
+                data_key_id, _, data = data.decode().rpartition(":")
+                yield data, data_key_id or None
+
+    async def delete_chunks(self, secret_key: str) -> None:
+        """
+        Удаляет все части секрета.
+        """
+        await self.__client.delete(CHUNKS_PREFIX + secret_key)
+
+    async def clear_all(self, batch_size: int = 1000) -> None:
+        """
+        Удаляет все секреты и их части. Ключи перебираются SCAN и удаляются пачками, не блокируя хранилище.
+        Удаление во время перебора может сдвинуть курсор, поэтому перебор повторяется, пока находятся ключи.
+        """
+        for prefix in (SECRET_PREFIX, CHUNKS_PREFIX, FAILURES_PREFIX):
+            found = True
+            while found:
+                found = False
+                keys = []
+                async for key in self.__client.scan_iter(match=prefix + "*", count=batch_size):
+                    found = True
+                    keys.append(key)
+                    if len(keys) >= batch_size:
+                        await self.__client.unlink(*keys)
+                        keys = []
+                if keys:
+                    await self.__client.unlink(*keys)
@@ -1,9 +1,46 @@
-from typing import Optional
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional, Set, Tuple, Union
 
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 
-from app.core.config import TTL_INDEX_SECONDS
-from app.models.secret import Secret
+from app.models.secret import Secret, SecretChunk
+from app.repositories.maintenance import delete_in_batches
+from app.utils.secret_ids import decode_secret_id, encode_secret_id
+
+
+def _stored_key(secret_key: str) -> Union[str, bytes]:
+    """
+    Возвращает ключ секрета в том виде, в котором он хранится: 16 байт (BSON binary) для ключей base62
+    и исходную строку для ключей, созданных раньше в формате UUID.
+    """
+    raw = decode_secret_id(secret_key)
+    return secret_key if raw is None else raw
+
+
+def _public_key(stored_key: Union[str, bytes]) -> str:
+    """
+    Возвращает ключ секрета в виде, в котором он передается клиентам.
+    """
+    return encode_secret_id(stored_key) if isinstance(stored_key, bytes) else stored_key
+
+
+def _to_document(model: Union[Secret, SecretChunk]) -> dict:
+    document = model.model_dump()
+    document["secret_key"] = _stored_key(document["secret_key"])
+    return document
+
+
+def _to_secret(document: dict) -> Secret:
+    document["secret_key"] = _public_key(document["secret_key"])
+    return Secret(**document)
+
+
+def _to_chunk(document: dict) -> SecretChunk:
+    document["secret_key"] = _public_key(document["secret_key"])
+    return SecretChunk(**document)
 
 
 class SecretRepository:
@@ -11,55 +48,279 @@ class SecretRepository:
     Репозиторий для работы с коллекцией секретов в базе данных MongoDB.
 
     Этот класс предоставляет методы для создания, получения, удаления и очистки секретов в коллекции.
-    Также он инициализирует индекс для автоматического удаления просроченных секретов.
+    Также он инициализирует уникальный индекс по ключу секрета и индекс для автоматического удаления
+    просроченных секретов. Части больших секретов хранятся в отдельной коллекции `secret_chunks`.
+
+    Поле `expiration` хранит абсолютное время истечения, поэтому TTL-индекс удаляет документы сразу после него
+    (`expireAfterSeconds=0`). TTL-монитор MongoDB запускается раз в минуту, поэтому просроченные секреты
+    дополнительно отфильтровываются при чтении и удалении.
+
+    Ключи секретов в формате base62 хранятся 16 байтами (BSON binary), а не строкой: индекс по ключу почти вдвое
+    меньше, чем для строк UUID, и больше его помещается в память. Ключи секретов, созданных раньше в формате UUID,
+    хранятся и ищутся строками, как прежде.
     """
 
-    def __init__(self, uri: str, db_name: str):
+    def __init__(self, db: AsyncIOMotorDatabase):
         """
         Инициализация репозитория для работы с базой данных MongoDB.
+        Клиент базы данных и его пул соединений общие для всех репозиториев и управляются жизненным циклом приложения.
         """
-        self.__client = AsyncIOMotorClient(uri)
-        self.__db = self.__client[db_name]
+        self.__db = db
         self.__collection = self.__db["secrets"]
+        self.__chunks = self.__db["secret_chunks"]
+
+    async def __initialize_ttl_index(self, collection: AsyncIOMotorCollection, existing_indexes: dict) -> None:
+        """
+        Создает TTL-индекс на поле `expiration` с `expireAfterSeconds=0`. Индекс, созданный раньше с другим
+        временем жизни, изменяется командой `collMod` без пересоздания.
+        """
+        index = existing_indexes.get("expiration_1")
+        if index is None:
+            await collection.create_index([("expiration", 1)], expireAfterSeconds=0)
+        elif index.get("expireAfterSeconds") != 0:
+            await self.__db.command(
+                "collMod", collection.name, index={"keyPattern": {"expiration": 1}, "expireAfterSeconds": 0}
+            )
 
     async def initialize_indexes(self):
         """
-        Инициализирует индексы в коллекции. Создает индекс на поле `expiration`, если он еще не существует.
+        Инициализирует индексы в коллекции. Создает TTL-индекс на поле `expiration`, если он еще не существует.
         Индекс используется для автоматического удаления секретов после истечения срока их действия.
+        Уникальный индекс на поле `secret_key` избавляет поиск и удаление секрета от полного сканирования коллекции.
         """
         existing_indexes = await self.__collection.index_information()
-        if "expiration_1" not in existing_indexes:
-            await self.__collection.create_index([("expiration", 1)], expireAfterSeconds=int(TTL_INDEX_SECONDS))
+        await self.__initialize_ttl_index(self.__collection, existing_indexes)
+        if "secret_key_1" not in existing_indexes:
+            await self.__collection.create_index("secret_key", unique=True)
 
-    async def close(self):
-        """
-        Закрывает подключение к базе данных MongoDB.
-        """
-        self.__client.close()
+        existing_chunk_indexes = await self.__chunks.index_information()
+        await self.__initialize_ttl_index(self.__chunks, existing_chunk_indexes)
+        if "secret_key_1_n_1" not in existing_chunk_indexes:
+            await self.__chunks.create_index([("secret_key", 1), ("n", 1)], unique=True)
 
     async def create(self, secret: Secret) -> None:
         """
         Создает новый секрет в базе данных.
         """
-        secret_dict = secret.model_dump()
-        await self.__collection.insert_one(secret_dict)
+        await self.__collection.insert_one(_to_document(secret))
 
-    async def get(self, secret_key: str) -> Optional[str]:
+    async def create_many(self, secrets: List[Secret]) -> Set[int]:
         """
-        Получает секрет по его ключу.
+        Создает несколько секретов одним запросом к базе данных.
+        Вставка неупорядоченная: ошибка одного документа не мешает вставке остальных.
+        Возвращает индексы секретов, которые не удалось сохранить.
         """
-        secret = await self.__collection.find_one({"secret_key": secret_key})
-        return secret["secret"] if secret else None
+        try:
+            await self.__collection.insert_many([_to_document(secret) for secret in secrets], ordered=False)
+        except BulkWriteError as e:
+            return {error["index"] for error in e.details["writeErrors"]}
+        return set()
 
-    async def delete(self, secret_key: str) -> None:
+    async def get(self, secret_key: str) -> Optional[Secret]:
+        """
+        Получает секрет вместе с параметрами шифрования по его ключу. Просроченный секрет не возвращается,
+        даже если TTL-монитор еще не удалил его.
+        """
+        secret = await self.__collection.find_one(
+            {"secret_key": _stored_key(secret_key), "expiration": {"$gt": datetime.now(timezone.utc)}}, {"_id": 0}
+        )
+        return _to_secret(secret) if secret else None
+
+    async def delete(self, secret_key: str) -> bool:
         """
         Удаляет секрет по его ключу.
+        Возвращает `True`, только если секрет был удален именно этим вызовом. Удаление атомарно, поэтому из нескольких
+        конкурентных читателей одного секрета `True` получит ровно один. Просроченный секрет не удаляется
+        этим вызовом, и для него возвращается `False`.
+        """
+        result = await self.__collection.delete_one(
+            {"secret_key": _stored_key(secret_key), "expiration": {"$gt": datetime.now(timezone.utc)}}
+        )
+        return result.deleted_count == 1
 
+    async def record_failed_attempt(self, secret: Secret) -> int:
+        """
+        Атомарно увеличивает счетчик неверных кодовых фраз в документе секрета и возвращает его новое значение
+        или 0, если секрета уже нет. Счетчик общий для всех процессов приложения.
+        """
+        document = await self.__collection.find_one_and_update(
+            {"secret_key": _stored_key(secret.secret_key), "expiration": {"$gt": datetime.now(timezone.utc)}},
+            {"$inc": {"failed_attempts": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        return document["failed_attempts"] if document else 0
+
+    async def delete_verified(self, secret_key: str, verifier_hash: str) -> Optional[Secret]:
+        """
+        Атомарно удаляет и возвращает секрет, если хеш его верификатора совпадает с `verifier_hash`.
+        Поиск, сравнение и удаление выполняются одним запросом `findOneAndDelete`, поэтому секрет получает
+        не больше одного читателя. При неверном верификаторе секрет остается.
+        """
+        secret = await self.__collection.find_one_and_delete(
+            {
+                "secret_key": _stored_key(secret_key),
+                "verifier_hash": verifier_hash,
+                "expiration": {"$gt": datetime.now(timezone.utc)},
+            },
+            {"_id": 0},
+        )
+        return _to_secret(secret) if secret else None
+
+    async def iter_sealed_with_other(self, data_key_id: str, batch_size: int) -> AsyncIterator[List[Secret]]:
+        """
+        Возвращает пачками секреты, зашифрованные не ключом данных `data_key_id` (в том числе без ключа данных).
+        Курсор читает документы пачками по `batch_size`, поэтому коллекция не загружается в память целиком.
+        """
+        batch: List[Secret] = []
+        cursor = self.__collection.find({"data_key_id": {"$ne": data_key_id}}, {"_id": 0}).batch_size(batch_size)
+        async for secret in cursor:
+            batch.append(_to_secret(secret))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def replace_sealed_many(self, secrets: List[Tuple[Secret, Optional[str]]]) -> int:
+        """
+        Сохраняет перешифрованные секретные значения одним неупорядоченным запросом. Каждый элемент — пара
+        (секрет с новым значением и ключом данных, прежний ключ данных); секрет обновляется, только если его ключ
+        данных все еще прежний. Возвращает число обновленных секретов.
+        """
+        if not secrets:
+            return 0
+        result = await self.__collection.bulk_write(
+            [
+                UpdateOne(
+                    {"secret_key": _stored_key(secret.secret_key), "data_key_id": previous_key_id},
+                    {"$set": {"secret": secret.secret, "data_key_id": secret.data_key_id}},
+                )
+                for secret, previous_key_id in secrets
+            ],
+            ordered=False,
+        )
+        return result.modified_count
+
+    async def iter_sealed_chunks_with_other(
+        self, data_key_id: str, batch_size: int
+    ) -> AsyncIterator[List[SecretChunk]]:
+        """
+        Возвращает пачками части секретов, зашифрованные не ключом данных `data_key_id` (в том числе без ключа
+        данных).
+        """
+        batch: List[SecretChunk] = []
+        cursor = self.__chunks.find({"data_key_id": {"$ne": data_key_id}}, {"_id": 0}).batch_size(batch_size)
+        async for chunk in cursor:
+            batch.append(_to_chunk(chunk))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def replace_sealed_chunks_many(self, chunks: List[Tuple[SecretChunk, Optional[str]]]) -> int:
+        """
+        Сохраняет перешифрованные данные частей одним неупорядоченным запросом, как `replace_sealed_many`.
+        Возвращает число обновленных частей.
+        """
+        if not chunks:
+            return 0
+        result = await self.__chunks.bulk_write(
+            [
+                UpdateOne(
+                    {"secret_key": _stored_key(chunk.secret_key), "n": chunk.n, "data_key_id": previous_key_id},
+                    {"$set": {"data": chunk.data, "data_key_id": chunk.data_key_id}},
+                )
+                for chunk, previous_key_id in chunks
+            ],
+            ordered=False,
+        )
+        return result.modified_count
+
+    async def create_chunk(self, chunk: SecretChunk) -> None:
+        """
+        Сохраняет часть большого секрета.
+        """
+        await self.__chunks.insert_one(_to_document(chunk))
+
+    async def iter_chunks(self, secret_key: str, batch_size: int = 4) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """
+        Возвращает данные частей секрета по порядку вместе с ключом данных каждой части. Курсор читает части
+        небольшими пачками, поэтому в памяти одновременно находится не больше `batch_size` частей независимо
+        от размера секрета.
+        """
+        cursor = self.__chunks.find(
+            {"secret_key": _stored_key(secret_key)}, {"_id": 0, "data": 1, "data_key_id": 1}
+        ).sort("n", 1)
+        async for chunk in cursor.batch_size(batch_size):
+            yield chunk["data"], chunk.get("data_key_id")
+
+    async def delete_chunks(self, secret_key: str) -> None:
+        """
+        Удаляет все части секрета.
+        """
+        await self.__chunks.delete_many({"secret_key": _stored_key(secret_key)})
+
+    async def clear_all(self, batch_size: int = 1000) -> None:
+        """
+        Удаляет все секреты и их части из коллекций пачками по `batch_size`, не блокируя коллекции одним удалением.
+        """
+        for collection in (self.__collection, self.__chunks):
+            async for _ in delete_in_batches(collection, {}, batch_size):
+                pass
+
+    async def purge_expired(self, batch_size: int, pause: float = 0.0) -> AsyncIterator[Tuple[str, int]]:
+        """
+        Удаляет просроченные секреты и части, не дожидаясь TTL-монитора, пачками по индексу `expiration`.
+        Возвращает пары (коллекция, число удаленных документов) по каждой пачке.
+        """
+        now = datetime.now(timezone.utc)
+        for collection in (self.__collection, self.__chunks):
+            async for deleted in delete_in_batches(
+                collection, {"expiration": {"$lte": now}}, batch_size, pause, sort=[("expiration", 1)]
+            ):
+                yield collection.name, deleted
+
+    async def purge_orphan_chunks(
+        self, batch_size: int, pause: float = 0.0, grace: timedelta = timedelta(hours=1)
+    ) -> AsyncIterator[int]:
+        """
+        Удаляет части секретов, документа которых нет: секрет выдан или удален после неверных кодовых фраз,
+        но удаление частей прервалось. Документ большого секрета сохраняется последним, поэтому части загрузок,
+        начатых меньше `grace` назад (по времени создания `_id` первой части), не трогаются.
+        Первые части перебираются пачками по индексу `(secret_key, n)`: сначала с ключами-строками (UUID),
+        затем с двоичными ключами, так как сравнение в MongoDB не выходит за пределы типа значения.
+        Возвращает число удаленных частей по пачкам.
         """
-        await self.__collection.delete_one({"secret_key": secret_key})
+        cutoff = datetime.now(timezone.utc) - grace
+        for last_key in ("", b""):
+            operator = "$gte"
+            while True:
+                cursor = self.__chunks.find({"n": 0, "secret_key": {operator: last_key}}, {"secret_key": 1}).sort(
+                    [("secret_key", 1), ("n", 1)]
+                )
+                first_chunks = [chunk async for chunk in cursor.limit(batch_size)]
+                if not first_chunks:
+                    break
+                last_key, operator = first_chunks[-1]["secret_key"], "$gt"
+                keys = [chunk["secret_key"] for chunk in first_chunks if chunk["_id"].generation_time < cutoff]
+                existing = {
+                    secret["secret_key"]
+                    async for secret in self.__collection.find({"secret_key": {"$in": keys}}, {"secret_key": 1})
+                }
+                orphans = [key for key in keys if key not in existing]
+                if orphans:
+                    result = await self.__chunks.delete_many({"secret_key": {"$in": orphans}})
+                    yield result.deleted_count
+                if len(first_chunks) < batch_size:
+                    break
+                if pause:
+                    await asyncio.sleep(pause)
 
-    async def clear_all(self) -> None:
+    async def compact(self) -> None:
         """
-        Удаляет все секреты из коллекции.
+        Запускает команду `compact` для коллекций секретов и частей, чтобы вернуть место после массовых удалений.
+        Начиная с MongoDB 4.4 команда не блокирует чтение и запись, но нагружает диск, поэтому запускается отдельно.
         """
-        await self.__collection.delete_many({})
+        for collection in (self.__collection, self.__chunks):
+            await self.__db.command("compact", collection.name)
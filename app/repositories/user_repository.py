@@ -1,8 +1,14 @@
 from typing import Optional
 
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.core.config import USER_CACHE_NEGATIVE_TTL_SECONDS, USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS
 from app.models.user import User
+from app.repositories.maintenance import delete_in_batches
+from app.utils.cache import TTLCache
+
+_NOT_FOUND = object()
+_MISSING = object()
 
 
 class UserRepository:
@@ -11,37 +17,55 @@ class UserRepository:
 
     Этот класс предоставляет методы для создания, получения и очистки пользователей в коллекции.
     Также он инициализирует индекс для уникальности имени пользователя.
+
+    Найденные пользователи и отсутствие пользователя кэшируются по имени, поэтому повторные входы не обращаются
+    к базе данных. Отсутствие пользователя кэшируется на короткое время (USER_CACHE_NEGATIVE_TTL_SECONDS), так как
+    пользователь может быть зарегистрирован в другом процессе. Создание пользователя сбрасывает запись кэша.
     """
 
-    def __init__(self, uri: str, db_name: str):
+    def __init__(self, db: AsyncIOMotorDatabase):
         """
         Инициализация репозитория для работы с базой данных MongoDB.
+        Клиент базы данных и его пул соединений общие для всех репозиториев и управляются жизненным циклом приложения.
         """
-        self.__client = AsyncIOMotorClient(uri)
-        self.__db = self.__client[db_name]
+        self.__db = db
         self.__collection = self.__db["users"]
-
-    async def close(self):
-        """
-        Закрывает подключение к базе данных MongoDB.
-        """
-        self.__client.close()
+        self.__cache = TTLCache(max_size=int(USER_CACHE_SIZE), ttl=float(USER_CACHE_TTL_SECONDS))
+        self.__negative_ttl = float(USER_CACHE_NEGATIVE_TTL_SECONDS)
+        self.__writes = 0
 
     async def create_user(self, user: User) -> None:
         """
-        Создает нового пользователя в базе данных.
+        Создает нового пользователя в базе данных. Если пользователь с таким именем уже есть, уникальный индекс
+        приводит к `DuplicateKeyError`. В обоих случаях запись кэша для имени сбрасывается.
         """
-        await self.__collection.insert_one(user.model_dump())
+        try:
+            await self.__collection.insert_one(user.model_dump())
+        finally:
+            self.__writes += 1
+            self.__cache.delete(user.username)
 
     async def get_user(self, username: str) -> Optional[User]:
         """
-        Получает пользователя по имени пользователя (username).
+        Получает пользователя по имени пользователя (username), сначала из кэша.
+        Результат запроса не кэшируется, если во время запроса создавался пользователь: иначе ответ, прочитанный
+        до вставки, мог бы закэшировать отсутствие только что зарегистрированного пользователя.
         """
+        cached = self.__cache.get(username, _MISSING)
+        if cached is not _MISSING:
+            return None if cached is _NOT_FOUND else cached
+
+        writes = self.__writes
         user = await self.__collection.find_one({"username": username})
         if user:
             user["id"] = str(user.pop("_id"))
-            return User(**user)
-        return None
+            user = User(**user)
+        if writes == self.__writes:
+            if user:
+                self.__cache.set(username, user)
+            else:
+                self.__cache.set(username, _NOT_FOUND, ttl=self.__negative_ttl)
+        return user
 
     async def initialize_indexes(self):
         """
@@ -49,8 +73,10 @@ class UserRepository:
         """
         await self.__collection.create_index("username", unique=True)
 
-    async def clear_all(self) -> None:
+    async def clear_all(self, batch_size: int = 1000) -> None:
         """
-        Удаляет всех пользователей из коллекции.
+        Удаляет всех пользователей из коллекции пачками по `batch_size` и очищает кэш.
         """
-        await self.__collection.delete_many({})
+        async for _ in delete_in_batches(self.__collection, {}, batch_size):
+            pass
+        self.__cache.clear()
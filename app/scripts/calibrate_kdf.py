@@ -0,0 +1,93 @@
+"""
+Калибровка функций вывода ключа под оборудование хоста.
+
+Измеряет время вывода одного ключа для каждого алгоритма, пересчитывает параметр стоимости под целевую задержку
+и печатает число выводов в секунду на ядро вместе с готовыми настройками KDF_*.
+
+Запуск: python -m app.scripts.calibrate_kdf --target-ms 250
+"""
+
+import argparse
+import math
+import os
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+from app.utils.crypto_utils import generate_salt
+from app.utils.kdf import KDFS, Kdf
+
+COST_PARAMS = {"pbkdf2-sha256": "iterations", "scrypt": "n", "argon2id": "iterations"}
+ENV_NAMES = {
+    "pbkdf2-sha256": {"iterations": "KDF_PBKDF2_ITERATIONS"},
+    "scrypt": {"n": "KDF_SCRYPT_N", "r": "KDF_SCRYPT_R", "p": "KDF_SCRYPT_P"},
+    "argon2id": {
+        "iterations": "KDF_ARGON2_ITERATIONS",
+        "memory_cost": "KDF_ARGON2_MEMORY_COST",
+        "lanes": "KDF_ARGON2_LANES",
+    },
+}
+
+
+def measure(kdf: Kdf, samples: int) -> float:
+    """
+    Возвращает медианное время вывода одного ключа в секундах.
+    """
+    salt = generate_salt()
+    timings: List[float] = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        kdf.derive(b"calibration passphrase", salt)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def scale_params(name: str, params: Dict[str, int], factor: float) -> Dict[str, int]:
+    """
+    Масштабирует параметр стоимости алгоритма. Для scrypt `n` округляется до степени двойки. Если Argon2id
+    укладывается в бюджет быстрее чем за один проход, вместо числа проходов уменьшается объем памяти.
+    """
+    cost = COST_PARAMS[name]
+    scaled = params[cost] * factor
+    if name == "scrypt":
+        return {**params, cost: 2 ** max(1, round(math.log2(scaled)))}
+    if name == "argon2id" and scaled < 1:
+        return {**params, cost: 1, "memory_cost": max(8 * params["lanes"], round(params["memory_cost"] * scaled))}
+    return {**params, cost: max(1, round(scaled))}
+
+
+def calibrate(name: str, target: float, samples: int) -> Tuple[Dict[str, int], float]:
+    """
+    Подбирает параметры алгоритма под целевую задержку и возвращает их вместе с измеренным временем.
+    """
+    kdf = KDFS[name]()
+    elapsed = measure(kdf, samples)
+    params = scale_params(name, kdf.params, target / elapsed)
+    return params, measure(KDFS[name](**params), samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibrate KDF parameters for a target latency budget.")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="target latency of one derivation")
+    parser.add_argument("--samples", type=int, default=3, help="measurements per parameter set")
+    parser.add_argument("--algorithm", choices=sorted(KDFS), action="append", help="algorithms to calibrate")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"Target latency: {args.target_ms:.0f} ms, CPU cores: {cores}")
+    for name in args.algorithm or sorted(KDFS):
+        try:
+            params, elapsed = calibrate(name, args.target_ms / 1000, args.samples)
+        except Exception as exc:
+            print(f"\n{name}: not available on this host ({exc})")
+            continue
+        per_core = 1 / elapsed
+        print(f"\n{name}: {elapsed * 1000:.1f} ms per derivation")
+        print(f"  {per_core:.1f} derivations/s per core, ~{per_core * cores:.0f} derivations/s on {cores} cores")
+        print(f"  KDF_ALGORITHM={name}")
+        for param, value in params.items():
+            print(f"  {ENV_NAMES[name][param]}={value}")
+
+
+if __name__ == "__main__":
+    main()
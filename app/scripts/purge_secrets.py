@@ -0,0 +1,62 @@
+"""
+Очистка хранилища секретов MongoDB на работающем сервисе.
+
+Удаляет просроченные секреты и части, не дожидаясь TTL-монитора, и части секретов, документа которых уже нет
+(выданные или удаленные секреты, удаление частей которых прервалось). Удаление идет пачками по индексам с паузой
+между пачками, поэтому не создает долгих блокировок и всплесков задержки репликации. После очистки можно
+запустить `compact`, чтобы вернуть место на диске.
+
+Запуск: python -m app.scripts.purge_secrets --batch-size 1000 --pause-ms 100 [--compact]
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from datetime import timedelta
+
+from app.core.config import DATABASE_NAME, MONGODB_URI, STORAGE_BACKEND
+from app.core.database import create_mongo_client
+from app.repositories.secret_repository import SecretRepository
+
+
+async def purge(batch_size: int, pause: float, orphan_grace: timedelta, compact: bool) -> None:
+    if STORAGE_BACKEND != "mongo":
+        raise SystemExit(f"Nothing to purge: STORAGE_BACKEND={STORAGE_BACKEND} removes secrets exactly on expiration")
+    mongo_client, _ = create_mongo_client(MONGODB_URI)
+    repository = SecretRepository(mongo_client[DATABASE_NAME])
+    started = time.perf_counter()
+    try:
+        deleted = Counter()
+        async for collection, count in repository.purge_expired(batch_size, pause):
+            deleted[collection] += count
+            print(f"expired {collection}: {deleted[collection]} deleted ({time.perf_counter() - started:.1f} s)")
+
+        async for count in repository.purge_orphan_chunks(batch_size, pause, orphan_grace):
+            deleted["orphan secret_chunks"] += count
+            print(f"orphan secret_chunks: {deleted['orphan secret_chunks']} deleted")
+
+        print(f"Purge finished in {time.perf_counter() - started:.1f} s: {dict(deleted) or 'nothing to delete'}")
+        if compact:
+            await repository.compact()
+            print("Collections compacted")
+    finally:
+        mongo_client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Purge expired secrets and orphan chunks in throttled batches.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents per delete batch")
+    parser.add_argument("--pause-ms", type=float, default=100.0, help="pause between batches")
+    parser.add_argument(
+        "--orphan-grace-minutes", type=float, default=60.0, help="keep chunks of uploads younger than this"
+    )
+    parser.add_argument("--compact", action="store_true", help="run compact on the collections after purging")
+    args = parser.parse_args()
+    asyncio.run(
+        purge(args.batch_size, args.pause_ms / 1000, timedelta(minutes=args.orphan_grace_minutes), args.compact)
+    )
+
+
+if __name__ == "__main__":
+    main()
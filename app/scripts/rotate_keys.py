@@ -0,0 +1,52 @@
+"""
+Ротация ключей шифрования хранимых секретов.
+
+Сначала заново оборачивает текущим мастер-ключом (MASTER_KEY) ключи данных, обернутые прежними мастер-ключами
+(PREVIOUS_MASTER_KEYS). Затем перешифровывает текущим ключом данных секреты и части больших секретов, зашифрованные
+другими ключами данных или сохраненные до включения мастер-ключа. Записи читаются курсором пачками, между пачками делается пауза, поэтому
+задачу можно запускать на работающем сервисе. Перешифровка секретов поддерживается для STORAGE_BACKEND=mongo.
+
+Запуск: python -m app.scripts.rotate_keys --batch-size 500 --pause-ms 50
+"""
+
+import argparse
+import asyncio
+
+from app.core.config import DATABASE_NAME, MONGODB_URI, SALT, STORAGE_BACKEND
+from app.core.database import create_mongo_client
+from app.core.dependencies import create_secret_service_and_repository
+
+
+async def rotate(batch_size: int, pause: float, rewrap_only: bool) -> None:
+    if STORAGE_BACKEND == "memory":
+        raise SystemExit("The in-memory storage backend keeps keys in the application process")
+    mongo_client, _ = create_mongo_client(MONGODB_URI)
+    _, secret_service = create_secret_service_and_repository(db=mongo_client[DATABASE_NAME], salt=SALT)
+    try:
+        if secret_service.data_keys is None:
+            raise SystemExit("MASTER_KEY or MASTER_KEY_FILE is not set")
+        rewrapped = await secret_service.data_keys.rewrap_keys(batch_size)
+        print(f"Data keys re-wrapped with master key {secret_service.data_keys.master_key_id}: {rewrapped}")
+        if rewrap_only:
+            return
+        if STORAGE_BACKEND != "mongo":
+            print(f"Re-encryption of secrets is not supported for STORAGE_BACKEND={STORAGE_BACKEND}")
+            return
+        resealed = await secret_service.reseal_secrets(batch_size, pause)
+        print(f"Secrets and chunks re-encrypted with the current data key: {resealed}")
+    finally:
+        secret_service.kdf_pool.shutdown()
+        mongo_client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-wrap data keys and re-encrypt secrets with the current keys.")
+    parser.add_argument("--batch-size", type=int, default=500, help="documents per read and write batch")
+    parser.add_argument("--pause-ms", type=float, default=50.0, help="pause between batches of secrets")
+    parser.add_argument("--rewrap-only", action="store_true", help="only re-wrap data keys with the current master key")
+    args = parser.parse_args()
+    asyncio.run(rotate(args.batch_size, args.pause_ms / 1000, args.rewrap_only))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from cryptography.fernet import Fernet
+
+from app.core.metrics import stage_timer
+from app.models.secret import DataKey
+from app.repositories.protocols import DataKeyRepositoryProtocol
+from app.utils.cache import TTLCache
+
+
+def master_key_id(master_key: bytes) -> str:
+    """
+    Возвращает идентификатор мастер-ключа: начало его хеша SHA-256. По нему видно, каким мастер-ключом
+    обернут ключ данных, а сам мастер-ключ не раскрывается.
+    """
+    return hashlib.sha256(master_key).hexdigest()[:16]
+
+
+class DataKeyService:
+    """
+    Сервис ключей данных для шифрования хранимых секретов (envelope encryption).
+
+    Секретное значение шифруется ключом данных (Fernet), а ключ данных хранится в репозитории только обернутым
+    мастер-ключом из конфигурации. Текущий ключ данных заменяется новым раз в `rotation_seconds`; старые ключи
+    остаются и расшифровывают секреты, зашифрованные ими. Развернутые ключи данных хранятся в ограниченном
+    LRU-кэше, поэтому на горячем пути к каждому секрету добавляется одна операция Fernet без обращения к хранилищу.
+
+    Мастер-ключ меняется так: новый ключ задается в MASTER_KEY, прежние — в PREVIOUS_MASTER_KEYS, затем
+    `rewrap_keys` заново оборачивает все ключи данных новым мастер-ключом, после чего прежние ключи можно убрать.
+    """
+
+    def __init__(
+        self,
+        repository: DataKeyRepositoryProtocol,
+        master_keys: List[bytes],
+        rotation_seconds: float,
+        cache_size: int,
+        cache_ttl: float,
+    ) -> None:
+        """
+        Инициализация сервиса. Первый из `master_keys` — текущий мастер-ключ, остальные — прежние,
+        которые нужны только для разворачивания ключей данных.
+        """
+        if not master_keys:
+            raise ValueError("At least one master key is required")
+        self.repository = repository
+        self.master_keys: Dict[str, Fernet] = {master_key_id(key): Fernet(key) for key in master_keys}
+        self.master_key_id = master_key_id(master_keys[0])
+        self.rotation_seconds = rotation_seconds
+        self.cache = TTLCache(max_size=cache_size, ttl=cache_ttl)
+        self.__current: Optional[Tuple[str, Fernet, float]] = None
+        self.__lock = asyncio.Lock()
+
+    def wrap(self, key: bytes) -> str:
+        """
+        Оборачивает ключ данных текущим мастер-ключом.
+        """
+        return self.master_keys[self.master_key_id].encrypt(key).decode()
+
+    def unwrap(self, data_key: DataKey) -> bytes:
+        """
+        Разворачивает ключ данных мастер-ключом, которым он обернут.
+        """
+        master_key = self.master_keys.get(data_key.master_key_id)
+        if master_key is None:
+            raise ValueError(f"Master key {data_key.master_key_id} of data key {data_key.key_id} is not configured")
+        return master_key.decrypt(data_key.wrapped_key)
+
+    async def current_key(self) -> Tuple[str, Fernet]:
+        """
+        Возвращает текущий ключ данных. При запуске берется последний ключ текущего мастер-ключа, если он еще
+        не устарел, иначе и по истечении `rotation_seconds` создается новый ключ.
+        """
+        current = self.__current
+        if current is not None and time.monotonic() - current[2] < self.rotation_seconds:
+            return current[0], current[1]
+
+        async with self.__lock:
+            if self.__current is not current:
+                return self.__current[0], self.__current[1]
+
+            if current is None:
+                latest = await self.repository.get_latest(self.master_key_id)
+                if latest is not None:
+                    age = (datetime.now(timezone.utc) - latest.created_at.replace(tzinfo=timezone.utc)).total_seconds()
+                    if age < self.rotation_seconds:
+                        fernet = Fernet(self.unwrap(latest))
+                        self.cache.set(latest.key_id, fernet)
+                        self.__current = (latest.key_id, fernet, time.monotonic() - age)
+                        return latest.key_id, fernet
+
+            key = Fernet.generate_key()
+            data_key = DataKey(
+                key_id=uuid.uuid4().hex,
+                wrapped_key=self.wrap(key),
+                master_key_id=self.master_key_id,
+                created_at=datetime.now(timezone.utc),
+            )
+            await self.repository.create(data_key)
+            fernet = Fernet(key)
+            self.cache.set(data_key.key_id, fernet)
+            self.__current = (data_key.key_id, fernet, time.monotonic())
+            return data_key.key_id, fernet
+
+    async def get_key(self, key_id: str) -> Fernet:
+        """
+        Возвращает развернутый ключ данных по идентификатору, сначала из кэша.
+        """
+        fernet = self.cache.get(key_id)
+        if fernet is not None:
+            return fernet
+        data_key = await self.repository.get(key_id)
+        if data_key is None:
+            raise ValueError(f"Unknown data key: {key_id}")
+        fernet = Fernet(self.unwrap(data_key))
+        self.cache.set(key_id, fernet)
+        return fernet
+
+    async def seal(self, data: str) -> Tuple[str, str]:
+        """
+        Шифрует значение текущим ключом данных. Возвращает шифротекст и идентификатор ключа данных.
+        """
+        key_id, fernet = await self.current_key()
+        with stage_timer("seal"):
+            return fernet.encrypt(data.encode()).decode(), key_id
+
+    async def unseal(self, data: str, key_id: str) -> str:
+        """
+        Расшифровывает значение ключом данных `key_id`.
+        """
+        fernet = await self.get_key(key_id)
+        with stage_timer("unseal"):
+            return fernet.decrypt(data).decode()
+
+    async def rewrap_keys(self, batch_size: int = 100) -> int:
+        """
+        Заново оборачивает текущим мастер-ключом все ключи данных, обернутые прежними мастер-ключами.
+        Ключи читаются и обновляются пачками. Возвращает число обновленных ключей.
+        """
+        updated = 0
+        async for batch in self.repository.iter_wrapped_by_other(self.master_key_id, batch_size):
+            for data_key in batch:
+                rewrapped = data_key.model_copy(
+                    update={"wrapped_key": self.wrap(self.unwrap(data_key)), "master_key_id": self.master_key_id}
+                )
+                await self.repository.update_wrapped_key(rewrapped)
+                updated += 1
+        return updated
@@ -1,14 +1,43 @@
-import uuid
+import asyncio
+import hashlib
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Tuple
 
 from cryptography.fernet import InvalidToken
 from fastapi import HTTPException, status
 
-from app.core.config import TTL_INDEX_SECONDS
-from app.models.secret import Secret
-from app.repositories.secret_repository import SecretRepository
-from app.utils.crypto_utils import decrypt, encrypt, generate_key_from_passphrase
+from app.core.config import (
+    MAX_STREAM_SECRET_BYTES,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_SECRET_ATTEMPTS,
+    RATE_LIMIT_USER_ATTEMPTS,
+    RATE_LIMIT_WINDOW_SECONDS,
+    SECRET_CHUNK_SIZE,
+    SECRET_ID_POOL_SIZE,
+    SECRET_MAX_FAILED_ATTEMPTS,
+    TTL_INDEX_SECONDS,
+)
+from app.core.metrics import stage_timer
+from app.core.workers import WorkerPool
+from app.exceptions import PoolSaturatedError
+from app.models.secret import Secret, SecretChunk, SecretEnvelope
+from app.repositories.protocols import ResealableSecretRepositoryProtocol, SecretRepositoryProtocol
+from app.services.data_key_service import DataKeyService
+from app.utils.crypto_utils import (
+    decrypt,
+    decrypt_chunk,
+    decrypt_token,
+    encrypt_chunk,
+    encrypt_token,
+    generate_key_from_passphrase,
+    generate_salt,
+)
+from app.utils.kdf import Kdf, create_kdf
+from app.utils.rate_limit import SlidingWindowCounter
+from app.utils.secret_ids import SecretIdPool
+
+ENVELOPE_VERSION = 2
 
 
 class SecretService:
@@ -16,47 +45,420 @@ class SecretService:
     Сервис для управления секретами, который включает генерацию, сохранение, извлечение и удаление зашифрованных данных.
     """
 
-    def __init__(self, salt: str, repository: SecretRepository) -> None:
+    def __init__(
+        self,
+        salt: str,
+        repository: SecretRepositoryProtocol,
+        kdf_pool: WorkerPool,
+        kdf: Kdf,
+        data_keys: Optional[DataKeyService] = None,
+    ) -> None:
         """
         Инициализация сервиса для работы с секретами.
+        `kdf` используется для новых секретов, а существующие расшифровываются с KDF, записанной в их конверте.
+        Общая соль используется только для расшифровки секретов, сохраненных без конверта.
+        Попытки получения секрета ограничиваются для пользователя и для секрета, а после
+        `max_failed_attempts` неверных кодовых фраз, учтенных в хранилище, секрет удаляется.
+        Если задан `data_keys`, секретные значения перед сохранением дополнительно шифруются ключом данных.
+        Ключи новых секретов берутся из пула заранее сгенерированных идентификаторов base62.
         """
         self.salt = salt.encode()
         self.repository = repository
+        self.kdf_pool = kdf_pool
+        self.kdf = kdf
+        self.data_keys = data_keys
+        self.secret_ids = SecretIdPool(int(SECRET_ID_POOL_SIZE))
+        self.chunk_size = int(SECRET_CHUNK_SIZE)
+        self.max_stream_size = int(MAX_STREAM_SECRET_BYTES)
+        window = float(RATE_LIMIT_WINDOW_SECONDS)
+        max_keys = int(RATE_LIMIT_MAX_KEYS)
+        self.user_attempts = SlidingWindowCounter(int(RATE_LIMIT_USER_ATTEMPTS), window, max_keys)
+        self.secret_attempts = SlidingWindowCounter(int(RATE_LIMIT_SECRET_ATTEMPTS), window, max_keys)
+        self.max_failed_attempts = int(SECRET_MAX_FAILED_ATTEMPTS)
+
+    def create_envelope(self) -> SecretEnvelope:
+        """
+        Создает конверт с параметрами шифрования и новой случайной солью для очередного секрета.
+        """
+        return SecretEnvelope(
+            version=ENVELOPE_VERSION,
+            kdf=self.kdf.name,
+            params=self.kdf.params,
+            salt=urlsafe_b64encode(generate_salt()).decode(),
+        )
 
-    async def generate_key(self, passphrase: str) -> bytes:
+    async def generate_key(self, passphrase: str, envelope: Optional[SecretEnvelope] = None) -> bytes:
         """
         Генерирует ключ для шифрования/дешифрования на основе кодовой фразы.
+        Соль и параметры берутся из конверта секрета, а для секретов без конверта используется общая соль.
+        Вывод ключа выполняется в пуле исполнителей, чтобы не блокировать цикл событий.
+        """
+        with stage_timer("kdf"):
+            if envelope is None:
+                return await self.kdf_pool.run(generate_key_from_passphrase, passphrase.encode(), self.salt)
+
+            kdf = create_kdf(envelope.kdf, envelope.params)
+            return await self.kdf_pool.run(kdf.derive, passphrase.encode(), urlsafe_b64decode(envelope.salt))
+
+    @staticmethod
+    def decrypt(secret: Secret, key: bytes) -> str:
+        """
+        Расшифровывает секретное значение в формате, соответствующем версии конверта.
+        Секреты без конверта и с конвертом первой версии хранятся в виде двойного base64.
+        """
+        if secret.envelope is None or secret.envelope.version == 1:
+            return decrypt(secret.secret, key)
+        return decrypt_token(secret.secret, key)
+
+    async def seal(self, secret: Secret) -> Secret:
+        """
+        Шифрует секретное значение текущим ключом данных, если задан мастер-ключ.
+        """
+        if self.data_keys is None:
+            return secret
+        sealed, key_id = await self.data_keys.seal(secret.secret)
+        return secret.model_copy(update={"secret": sealed, "data_key_id": key_id})
+
+    async def unseal(self, secret: Secret) -> Secret:
+        """
+        Снимает шифрование ключом данных с секретного значения. Секреты без ключа данных возвращаются как есть.
+        """
+        if secret.data_key_id is None:
+            return secret
+        if self.data_keys is None:
+            raise RuntimeError("Secret is sealed with a data key, but no master key is configured")
+        unsealed = await self.data_keys.unseal(secret.secret, secret.data_key_id)
+        return secret.model_copy(update={"secret": unsealed, "data_key_id": None})
+
+    async def seal_chunk(self, chunk: SecretChunk) -> SecretChunk:
+        """
+        Шифрует данные части большого секрета текущим ключом данных, если задан мастер-ключ.
+        """
+        if self.data_keys is None:
+            return chunk
+        sealed, key_id = await self.data_keys.seal(chunk.data)
+        return chunk.model_copy(update={"data": sealed, "data_key_id": key_id})
+
+    async def unseal_chunk_data(self, data: str, data_key_id: Optional[str]) -> str:
+        """
+        Снимает шифрование ключом данных с данных части. Данные без ключа данных возвращаются как есть.
+        """
+        if data_key_id is None:
+            return data
+        if self.data_keys is None:
+            raise RuntimeError("Secret chunk is sealed with a data key, but no master key is configured")
+        return await self.data_keys.unseal(data, data_key_id)
+
+    @staticmethod
+    def expiration(ttl_seconds: Optional[int] = None) -> datetime:
+        """
+        Возвращает время истечения секрета: через `ttl_seconds` или, если время жизни не задано, через TTL_INDEX_SECONDS.
+        """
+        return datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds or int(TTL_INDEX_SECONDS))
+
+    async def encrypt_secret(self, secret: str, passphrase: str, ttl_seconds: Optional[int] = None) -> Secret:
+        """
+        Шифрует секрет ключом, выведенным из кодовой фразы с новой солью, и возвращает готовый к сохранению секрет.
         """
-        return generate_key_from_passphrase(passphrase.encode(), self.salt)
+        envelope = self.create_envelope()
+        key = await self.generate_key(passphrase, envelope)
+        with stage_timer("encrypt"):
+            token = encrypt_token(secret, key)
+        return await self.seal(
+            Secret(
+                secret_key=self.secret_ids.next(),
+                secret=token,
+                expiration=self.expiration(ttl_seconds),
+                envelope=envelope,
+            )
+        )
 
-    async def generate_secret(self, secret: str, passphrase: str) -> str:
+    async def generate_secret(self, secret: str, passphrase: str, ttl_seconds: Optional[int] = None) -> str:
         """
         Генерирует зашифрованный секрет и сохраняет его в базе данных.
         """
-        key = await self.generate_key(passphrase)
-        encrypted_secret = encrypt(secret, key)
-        secret_key = str(uuid.uuid4())
-        secret_instance = Secret(
-            secret_key=secret_key,
-            secret=encrypted_secret,
-            expiration=datetime.now(timezone.utc) + timedelta(seconds=int(TTL_INDEX_SECONDS)),
+        secret_instance = await self.encrypt_secret(secret, passphrase, ttl_seconds)
+        with stage_timer("repository_create"):
+            await self.repository.create(secret_instance)
+        return secret_instance.secret_key
+
+    async def generate_secrets(
+        self, items: List[Tuple[str, str, Optional[int]]]
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Генерирует пакет секретов из троек (секрет, кодовая фраза, время жизни) и сохраняет их одной вставкой.
+        Ключи выводятся параллельно, но пакет занимает не больше исполнителей, чем есть в пуле, и не вытесняет
+        одиночные запросы из очереди. Возвращает для каждого элемента пару (ключ секрета, ошибка):
+        неудача одного элемента не отменяет остальные.
+        """
+        semaphore = asyncio.Semaphore(self.kdf_pool.max_workers)
+
+        async def encrypt_item(secret: str, passphrase: str, ttl_seconds: Optional[int]) -> Secret:
+            async with semaphore:
+                return await self.encrypt_secret(secret, passphrase, ttl_seconds)
+
+        encrypted = await asyncio.gather(*[encrypt_item(*item) for item in items], return_exceptions=True)
+        results: List[Tuple[Optional[str], Optional[str]]] = []
+        secrets: List[Secret] = []
+        for item in encrypted:
+            if isinstance(item, PoolSaturatedError):
+                results.append((None, "Service is busy"))
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                results.append((item.secret_key, None))
+                secrets.append(item)
+
+        with stage_timer("repository_create_many"):
+            failed = await self.repository.create_many(secrets) if secrets else set()
+        failed_keys = {secrets[index].secret_key for index in failed}
+        return [(None, "Failed to store secret") if key in failed_keys else (key, error) for key, error in results]
+
+    def __check_attempt(self, secret_key: str, user_id: Optional[str]) -> None:
+        """
+        Учитывает попытку получения секрета. Если пользователь или секрет превысили лимит попыток,
+        выбрасывает 429 до чтения секрета и вывода ключа, поэтому отклоненные запросы почти ничего не стоят.
+        """
+        for counter, key in ((self.user_attempts, user_id), (self.secret_attempts, secret_key)):
+            retry_after = counter.hit(key) if key is not None else 0
+            if retry_after:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many attempts, try again later",
+                    headers={"Retry-After": str(retry_after)},
+                )
+
+    async def __record_failed_attempt(self, secret: Secret) -> None:
+        """
+        Учитывает неверную кодовую фразу. После `max_failed_attempts` неверных кодовых фраз секрет удаляется,
+        чтобы его нельзя было подобрать перебором. Счетчик хранится в хранилище секретов, поэтому лимит общий
+        для всех процессов приложения.
+        """
+        failures = await self.repository.record_failed_attempt(secret)
+        if failures < self.max_failed_attempts:
+            return
+        if await self.repository.delete(secret.secret_key) and secret.chunks is not None:
+            await self.repository.delete_chunks(secret.secret_key)
+
+    @staticmethod
+    def __check_server_encrypted(secret: Secret) -> None:
+        """
+        Секрет, зашифрованный на клиенте, нельзя получить по кодовой фразе: сервер не знает его ключа.
+        """
+        if secret.verifier_hash is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Secret is encrypted on the client, use the client endpoint",
+            )
+
+    async def get_secret(self, secret_key: str, passphrase: str, user_id: Optional[str] = None) -> Optional[str]:
+        """
+        Извлекает зашифрованный секрет из базы данных и расшифровывает его.
+        При неверной кодовой фразе секрет не удаляется, пока не исчерпан лимит неверных попыток. При верной секрет
+        удаляется атомарно, и если его уже забрал конкурентный запрос, возвращается 404, поэтому каждый секрет
+        выдается не более одного раза.
+        """
+        self.__check_attempt(secret_key, user_id)
+        with stage_timer("repository_get"):
+            secret = await self.repository.get(secret_key)
+        if secret is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Secret not found")
+        self.__check_server_encrypted(secret)
+        secret = await self.unseal(secret)
+        if secret.chunks is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Secret is too large, use the streaming endpoint"
+            )
+
+        key = await self.generate_key(passphrase, secret.envelope)
+        try:
+            with stage_timer("decrypt"):
+                decrypted_secret = self.decrypt(secret, key)
+        except InvalidToken:
+            await self.__record_failed_attempt(secret)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid input data")
+
+        with stage_timer("repository_delete"):
+            deleted = await self.repository.delete(secret_key)
+        if not deleted:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Secret not found")
+        return decrypted_secret
+
+    @staticmethod
+    def hash_verifier(verifier: str) -> str:
+        """
+        Возвращает хеш верификатора, который хранится вместо него самого. Верификатор выводится клиентом
+        медленной KDF и имеет высокую энтропию, поэтому достаточно SHA-256: утечка хранилища не раскрывает
+        верификатор, а проверка не нагружает сервер.
+        """
+        return hashlib.sha256(verifier.encode()).hexdigest()
+
+    async def generate_client_secret(self, ciphertext: str, verifier: str, ttl_seconds: Optional[int] = None) -> str:
+        """
+        Сохраняет секрет, зашифрованный на клиенте, вместе с хешем верификатора. Ключи не выводятся и ничего
+        не шифруется: сервер хранит шифротекст как есть.
+        """
+        secret = await self.seal(
+            Secret(
+                secret_key=self.secret_ids.next(),
+                secret=ciphertext,
+                expiration=self.expiration(ttl_seconds),
+                verifier_hash=self.hash_verifier(verifier),
+            )
+        )
+        with stage_timer("repository_create"):
+            await self.repository.create(secret)
+        return secret.secret_key
+
+    async def get_client_secret(self, secret_key: str, verifier: str, user_id: Optional[str] = None) -> str:
+        """
+        Выдает шифротекст секрета, зашифрованного на клиенте, и атомарно удаляет секрет, если верификатор верен.
+        При верном верификаторе нужен один запрос к хранилищу. Если секрет не выдан, он читается еще раз, чтобы
+        отличить неверный верификатор (400, учитывается в лимите неверных попыток) от отсутствующего секрета (404).
+        """
+        self.__check_attempt(secret_key, user_id)
+        with stage_timer("repository_delete"):
+            secret = await self.repository.delete_verified(secret_key, self.hash_verifier(verifier))
+        if secret is not None:
+            return (await self.unseal(secret)).secret
+
+        with stage_timer("repository_get"):
+            existing = await self.repository.get(secret_key)
+        if existing is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Secret not found")
+        await self.__record_failed_attempt(existing)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid input data")
+
+    async def generate_stream_secret(
+        self, stream: AsyncIterator[bytes], passphrase: str, ttl_seconds: Optional[int] = None
+    ) -> str:
+        """
+        Шифрует секрет по частям по мере поступления данных и сохраняет части в базе данных.
+        В памяти держится не больше одной части, поэтому размер секрета ограничен только `max_stream_size`.
+        Документ секрета сохраняется последним, так что прерванная загрузка не становится видимой,
+        а ее части удаляются по TTL.
+        """
+        envelope = self.create_envelope()
+        key = await self.generate_key(passphrase, envelope)
+        secret_key = self.secret_ids.next()
+        expiration = self.expiration(ttl_seconds)
+
+        buffer = bytearray()
+        size = 0
+        n = 0
+        async for data in stream:
+            size += len(data)
+            if size > self.max_stream_size:
+                await self.repository.delete_chunks(secret_key)
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Secret is too large")
+            buffer += data
+            while len(buffer) > self.chunk_size:
+                chunk_data = encrypt_chunk(bytes(buffer[: self.chunk_size]), key, n, final=False)
+                await self.repository.create_chunk(
+                    await self.seal_chunk(
+                        SecretChunk(secret_key=secret_key, n=n, data=chunk_data, expiration=expiration)
+                    )
+                )
+                del buffer[: self.chunk_size]
+                n += 1
+
+        chunk_data = encrypt_chunk(bytes(buffer), key, n, final=True)
+        await self.repository.create_chunk(
+            await self.seal_chunk(SecretChunk(secret_key=secret_key, n=n, data=chunk_data, expiration=expiration))
+        )
+        await self.repository.create(
+            await self.seal(
+                Secret(
+                    secret_key=secret_key,
+                    secret=encrypt_token("", key),
+                    expiration=expiration,
+                    envelope=envelope,
+                    chunks=n + 1,
+                )
+            )
         )
-        await self.repository.create(secret_instance)
         return secret_key
 
-    async def get_secret(self, secret_key: str, passphrase: str) -> Optional[str]:
+    async def get_stream_secret(
+        self, secret_key: str, passphrase: str, user_id: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
         """
-        Извлекает зашифрованный секрет из базы данных и расшифровывает его.
+        Проверяет кодовую фразу, атомарно забирает секрет и возвращает генератор его расшифрованных частей.
+        Ошибки (429, 404, 400) возникают до начала передачи данных. Части удаляются после передачи или ее обрыва.
         """
+        self.__check_attempt(secret_key, user_id)
         secret = await self.repository.get(secret_key)
         if secret is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Secret not found")
+        self.__check_server_encrypted(secret)
+        secret = await self.unseal(secret)
 
-        key = await self.generate_key(passphrase)
+        key = await self.generate_key(passphrase, secret.envelope)
         try:
-            decrypted_secret = decrypt(secret, key)
+            decrypted_secret = self.decrypt(secret, key)
         except InvalidToken:
+            await self.__record_failed_attempt(secret)
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid input data")
 
-        await self.repository.delete(secret_key)
-        return decrypted_secret
+        if not await self.repository.delete(secret_key):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Secret not found")
+        if secret.chunks is None:
+            return self.__single_chunk(decrypted_secret.encode())
+        return self.__decrypt_chunks(secret_key, key, secret.chunks)
+
+    async def reseal_secrets(self, batch_size: int = 500, pause: float = 0.0) -> int:
+        """
+        Перешифровывает текущим ключом данных секреты и части больших секретов, зашифрованные другими ключами
+        данных или сохраненные без шифрования ключом данных. Записи читаются курсором пачками по `batch_size`,
+        каждая пачка сохраняется одним запросом, а между пачками делается пауза `pause` секунд, чтобы не нагружать
+        базу данных. Запись обновляется, только если ее ключ данных не изменился с момента чтения, поэтому выданные
+        и удаленные за это время секреты не восстанавливаются. Возвращает число перешифрованных секретов и частей.
+        """
+        if self.data_keys is None:
+            raise RuntimeError("No master key is configured")
+        if not isinstance(self.repository, ResealableSecretRepositoryProtocol):
+            raise RuntimeError(f"{type(self.repository).__name__} does not support re-encrypting secrets")
+        key_id, _ = await self.data_keys.current_key()
+        updated = 0
+        async for batch in self.repository.iter_sealed_with_other(key_id, batch_size):
+            resealed = [(await self.seal(await self.unseal(secret)), secret.data_key_id) for secret in batch]
+            updated += await self.repository.replace_sealed_many(resealed)
+            if pause:
+                await asyncio.sleep(pause)
+        async for chunks in self.repository.iter_sealed_chunks_with_other(key_id, batch_size):
+            resealed_chunks = [
+                (
+                    await self.seal_chunk(
+                        chunk.model_copy(update={"data": await self.unseal_chunk_data(chunk.data, chunk.data_key_id)})
+                    ),
+                    chunk.data_key_id,
+                )
+                for chunk in chunks
+            ]
+            updated += await self.repository.replace_sealed_chunks_many(resealed_chunks)
+            if pause:
+                await asyncio.sleep(pause)
+        return updated
+
+    @staticmethod
+    async def __single_chunk(data: bytes) -> AsyncIterator[bytes]:
+        """
+        Отдает обычный секрет потоком из одной части.
+        """
+        yield data
+
+    async def __decrypt_chunks(self, secret_key: str, key: bytes, chunks: int) -> AsyncIterator[bytes]:
+        """
+        Читает и расшифровывает части секрета по порядку, проверяя их номера и наличие последней части.
+        """
+        n = 0
+        final = False
+        try:
+            async for chunk_data, data_key_id in self.repository.iter_chunks(secret_key):
+                data, final = decrypt_chunk(await self.unseal_chunk_data(chunk_data, data_key_id), key, n)
+                n += 1
+                yield data
+            if not final or n != chunks:
+                raise InvalidToken
+        finally:
+            await self.repository.delete_chunks(secret_key)
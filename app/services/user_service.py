@@ -1,9 +1,12 @@
 from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from pymongo.errors import DuplicateKeyError
 
 from app.core.auth import security
+from app.core.metrics import stage_timer
+from app.core.workers import WorkerPool
 from app.models.user import UserRequest
-from app.repositories.user_repository import UserRepository
+from app.repositories.protocols import UserRepositoryProtocol
 
 
 class UserService:
@@ -11,42 +14,48 @@ class UserService:
     Сервис для управления пользователями, включая регистрацию, аутентификацию и работу с паролями.
     """
 
-    def __init__(self, repository: UserRepository):
+    def __init__(self, repository: UserRepositoryProtocol, hash_pool: WorkerPool):
         """
         Инициализация сервиса пользователей.
         """
         self.repository = repository
+        self.hash_pool = hash_pool
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """
         Проверяет, совпадает ли обычный пароль с хешированным паролем.
+        Проверка выполняется в пуле исполнителей, чтобы не блокировать цикл событий.
         """
-        return self.pwd_context.verify(plain_password, hashed_password)
+        with stage_timer("password_verify"):
+            return await self.hash_pool.run(self.pwd_context.verify, plain_password, hashed_password)
 
-    def hash_password(self, password: str) -> str:
+    async def hash_password(self, password: str) -> str:
         """
         Хеширует пароль с использованием алгоритма bcrypt.
+        Хеширование выполняется в пуле исполнителей, чтобы не блокировать цикл событий.
         """
-        return self.pwd_context.hash(password)
+        with stage_timer("password_hash"):
+            return await self.hash_pool.run(self.pwd_context.hash, password)
 
     async def register_user(self, username: str, password: str) -> None:
         """
         Регистрирует нового пользователя.
+        Существование пользователя не проверяется отдельным запросом: повтор имени отклоняет уникальный индекс.
         """
-        if await self.repository.get_user(username):
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
-
-        hashed_password = self.hash_password(password)
+        hashed_password = await self.hash_password(password)
         user = UserRequest(username=username, password=hashed_password)
-        await self.repository.create_user(user)
+        try:
+            await self.repository.create_user(user)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
 
     async def authenticate_user(self, username: str, password: str) -> str:
         """
         Аутентифицирует пользователя и генерирует токен доступа.
         """
         user = await self.repository.get_user(username)
-        if not user or not self.verify_password(password, user.password):
+        if not user or not await self.verify_password(password, user.password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
         token = security.create_access_token(uid=str(user.id))
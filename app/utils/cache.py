@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру LRU-кэш с временем жизни записей.
+
+    Кэш рассчитан на использование из одного цикла событий: операции синхронные и не прерываются `await`,
+    поэтому блокировки не нужны. При переполнении вытесняются давно не использованные записи.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """
+        Инициализация кэша. `ttl` — максимальное время жизни записи в секундах.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.__entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Возвращает значение по ключу или `default`, если записи нет или ее время жизни истекло.
+        """
+        entry = self.__entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self.__entries[key]
+            self.misses += 1
+            return default
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Сохраняет значение. Время жизни записи не превышает `ttl` кэша, даже если передано большее значение.
+        Записи с неположительным временем жизни не сохраняются.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        self.__entries[key] = (time.monotonic() + ttl, value)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Удаляет запись, если она есть.
+        """
+        self.__entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Удаляет все записи.
+        """
+        self.__entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Возвращает размер кэша и счетчики попаданий и промахов.
+        """
+        return {"size": len(self.__entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
@@ -1,16 +1,29 @@
+import os
+import struct
 from base64 import urlsafe_b64decode, urlsafe_b64encode
 
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+PBKDF2_ITERATIONS = 100000
+SALT_LENGTH = 16
+CHUNK_HEADER = struct.Struct(">Q?")
 
-def generate_key_from_passphrase(passphrase: bytes, salt: bytes) -> bytes:
+
+def generate_salt() -> bytes:
+    """
+    Генерирует случайную соль для вывода ключа отдельного секрета.
+    """
+    return os.urandom(SALT_LENGTH)
+
+
+def generate_key_from_passphrase(passphrase: bytes, salt: bytes, iterations: int = PBKDF2_ITERATIONS) -> bytes:
     """
     Генерирует ключ на основе кодовой фразы и соли с использованием PBKDF2.
     """
-    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=100000, backend=default_backend())
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=iterations, backend=default_backend())
     key = kdf.derive(passphrase)
     return urlsafe_b64encode(key)
 
@@ -31,3 +44,42 @@ def decrypt(encrypted_secret: str, key: bytes) -> str:
     f = Fernet(key)
     encrypted_secret_bytes = urlsafe_b64decode(encrypted_secret)
     return f.decrypt(encrypted_secret_bytes).decode()
+
+
+def encrypt_token(secret: str, key: bytes) -> str:
+    """
+    Шифрует секрет с использованием ключа и возвращает токен Fernet без дополнительного base64.
+    Токен Fernet уже закодирован в url-safe base64, поэтому повторное кодирование только увеличивает его на треть.
+    """
+    f = Fernet(key)
+    return f.encrypt(secret.encode()).decode()
+
+
+def decrypt_token(token: str, key: bytes) -> str:
+    """
+    Расшифровывает токен Fernet, полученный от `encrypt_token`.
+    """
+    f = Fernet(key)
+    return f.decrypt(token).decode()
+
+
+def encrypt_chunk(data: bytes, key: bytes, n: int, final: bool) -> str:
+    """
+    Шифрует часть большого секрета. Номер части и признак последней части шифруются вместе с данными,
+    поэтому перестановка, подмена или обрезка частей обнаруживается при расшифровке.
+    """
+    f = Fernet(key)
+    return f.encrypt(CHUNK_HEADER.pack(n, final) + data).decode()
+
+
+def decrypt_chunk(token: str, key: bytes, n: int) -> tuple:
+    """
+    Расшифровывает часть большого секрета и возвращает ее данные и признак последней части.
+    Выбрасывает `InvalidToken`, если часть повреждена или стоит не на своем месте.
+    """
+    f = Fernet(key)
+    plaintext = f.decrypt(token)
+    chunk_n, final = CHUNK_HEADER.unpack_from(plaintext)
+    if chunk_n != n:
+        raise InvalidToken
+    return plaintext[CHUNK_HEADER.size :], final
@@ -0,0 +1,104 @@
+from abc import ABC, abstractmethod
+from base64 import urlsafe_b64encode
+from typing import Dict, Type
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+from app.utils.crypto_utils import PBKDF2_ITERATIONS
+
+KEY_LENGTH = 32
+
+
+class Kdf(ABC):
+    """
+    Базовый класс функции вывода ключа из кодовой фразы.
+
+    Наследник задает имя алгоритма, набор параметров по умолчанию и реализует `derive_raw`. Параметры сохраняются
+    в конверте секрета, поэтому секрет всегда расшифровывается с теми же настройками, с которыми был зашифрован.
+    Экземпляры сериализуемы через pickle и могут передаваться в пул процессов.
+    """
+
+    name: str = ""
+    default_params: Dict[str, int] = {}
+
+    def __init__(self, **params: int) -> None:
+        """
+        Инициализация функции вывода ключа. Неизвестные параметры отклоняются.
+        """
+        unknown = set(params) - set(self.default_params)
+        if unknown:
+            raise ValueError(f"Unknown {self.name} parameters: {', '.join(sorted(unknown))}")
+        self.params = {**self.default_params, **params}
+
+    @abstractmethod
+    def derive_raw(self, passphrase: bytes, salt: bytes) -> bytes:
+        """
+        Выводит ключ длиной `KEY_LENGTH` байт.
+        """
+
+    def derive(self, passphrase: bytes, salt: bytes) -> bytes:
+        """
+        Выводит ключ и кодирует его в base64, как того требует Fernet.
+        """
+        return urlsafe_b64encode(self.derive_raw(passphrase, salt))
+
+
+class Pbkdf2Kdf(Kdf):
+    """
+    PBKDF2-HMAC-SHA256. Нагружает только процессор, параметр стоимости — число итераций.
+    """
+
+    name = "pbkdf2-sha256"
+    default_params = {"iterations": PBKDF2_ITERATIONS}
+
+    def derive_raw(self, passphrase: bytes, salt: bytes) -> bytes:
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=KEY_LENGTH, salt=salt, iterations=self.params["iterations"])
+        return kdf.derive(passphrase)
+
+
+class ScryptKdf(Kdf):
+    """
+    scrypt. Требует `128 * n * r` байт памяти на вывод ключа, что удорожает перебор на GPU и ASIC.
+    """
+
+    name = "scrypt"
+    default_params = {"n": 2**14, "r": 8, "p": 1}
+
+    def derive_raw(self, passphrase: bytes, salt: bytes) -> bytes:
+        kdf = Scrypt(salt=salt, length=KEY_LENGTH, n=self.params["n"], r=self.params["r"], p=self.params["p"])
+        return kdf.derive(passphrase)
+
+
+class Argon2idKdf(Kdf):
+    """
+    Argon2id. Стоимость задается числом проходов, объемом памяти в КиБ и числом потоков.
+    Требует OpenSSL 3.2 или новее.
+    """
+
+    name = "argon2id"
+    default_params = {"iterations": 3, "memory_cost": 64 * 1024, "lanes": 1}
+
+    def derive_raw(self, passphrase: bytes, salt: bytes) -> bytes:
+        kdf = Argon2id(
+            salt=salt,
+            length=KEY_LENGTH,
+            iterations=self.params["iterations"],
+            lanes=self.params["lanes"],
+            memory_cost=self.params["memory_cost"],
+        )
+        return kdf.derive(passphrase)
+
+
+KDFS: Dict[str, Type[Kdf]] = {kdf.name: kdf for kdf in (Pbkdf2Kdf, ScryptKdf, Argon2idKdf)}
+
+
+def create_kdf(name: str, params: Dict[str, int]) -> Kdf:
+    """
+    Создает функцию вывода ключа по имени алгоритма и параметрам.
+    """
+    if name not in KDFS:
+        raise ValueError(f"Unsupported KDF: {name}")
+    return KDFS[name](**params)
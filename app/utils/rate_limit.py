@@ -0,0 +1,40 @@
+import math
+import time
+from typing import Hashable
+
+from app.utils.cache import TTLCache
+
+
+class SlidingWindowCounter:
+    """
+    Ограничитель частоты попыток по алгоритму скользящего окна со счетчиками.
+
+    Для каждого ключа хранятся только счетчики текущего и предыдущего окна. Число попыток за последние `window`
+    секунд оценивается как счетчик текущего окна плюс доля предыдущего, пропорциональная еще не прошедшей его части.
+    Счетчики хранятся в `TTLCache`, поэтому память ограничена `max_keys`, а неактивные ключи удаляются по времени.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int) -> None:
+        """
+        Инициализация ограничителя: не больше `limit` попыток за `window` секунд для каждого ключа.
+        """
+        self.limit = limit
+        self.window = window
+        self.__counters = TTLCache(max_size=max_keys, ttl=2 * window)
+
+    def hit(self, key: Hashable) -> int:
+        """
+        Учитывает попытку для ключа. Возвращает 0, если попытка разрешена, иначе — через сколько секунд
+        стоит повторить. Отклоненные попытки не учитываются.
+        """
+        now = time.monotonic()
+        index, elapsed = divmod(now, self.window)
+        start, previous, current = self.__counters.get(key, (index, 0, 0))
+        if start != index:
+            previous = current if start == index - 1 else 0
+            current = 0
+
+        if previous * (1 - elapsed / self.window) + current >= self.limit:
+            return max(1, math.ceil(self.window - elapsed))
+        self.__counters.set(key, (index, previous, current + 1))
+        return 0
@@ -0,0 +1,74 @@
+import os
+from typing import List, Optional
+
+BASE62_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+SECRET_ID_BYTES = 16
+# 62**22 > 2**128, поэтому любые 16 байт записываются ровно 22 символами.
+SECRET_ID_LENGTH = 22
+
+_BASE62_INDEX = {char: index for index, char in enumerate(BASE62_ALPHABET)}
+
+
+def encode_secret_id(raw: bytes) -> str:
+    """
+    Записывает 16 байт идентификатора секрета строкой base62 фиксированной длины 22 символа.
+    """
+    number = int.from_bytes(raw, "big")
+    chars = []
+    for _ in range(SECRET_ID_LENGTH):
+        number, digit = divmod(number, 62)
+        chars.append(BASE62_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def decode_secret_id(secret_key: str) -> Optional[bytes]:
+    """
+    Возвращает 16 байт идентификатора секрета по его записи base62 или `None`, если строка не является такой
+    записью (например, ключ секрета, созданного раньше в формате UUID).
+    """
+    if len(secret_key) != SECRET_ID_LENGTH:
+        return None
+    number = 0
+    for char in secret_key:
+        digit = _BASE62_INDEX.get(char)
+        if digit is None:
+            return None
+        number = number * 62 + digit
+    if number >> (8 * SECRET_ID_BYTES):
+        return None
+    return number.to_bytes(SECRET_ID_BYTES, "big")
+
+
+class SecretIdPool:
+    """
+    Пул заранее сгенерированных идентификаторов секретов.
+
+    Идентификатор — 16 случайных байт (128 бит энтропии, как у UUID4 без служебных битов), записанных base62.
+    Случайные байты читаются из `os.urandom` одним вызовом сразу на `size` идентификаторов, и тогда же
+    идентификаторы кодируются, поэтому выдача идентификатора — это извлечение элемента из списка.
+    Пул рассчитан на использование из одного цикла событий.
+    """
+
+    def __init__(self, size: int) -> None:
+        """
+        Инициализация пула. Пул заполняется при первом запросе идентификатора.
+        """
+        self.size = max(1, size)
+        self.__ids: List[str] = []
+
+    def __refill(self) -> None:
+        """
+        Генерирует очередную порцию идентификаторов.
+        """
+        raw = os.urandom(SECRET_ID_BYTES * self.size)
+        self.__ids = [
+            encode_secret_id(raw[start : start + SECRET_ID_BYTES]) for start in range(0, len(raw), SECRET_ID_BYTES)
+        ]
+
+    def next(self) -> str:
+        """
+        Возвращает новый идентификатор секрета.
+        """
+        if not self.__ids:
+            self.__refill()
+        return self.__ids.pop()
@@ -0,0 +1,83 @@
+"""
+Сравнение форматов хранения шифротекста: двойной base64 (конверт v1), токен Fernet (конверт v2)
+и, для справки, двоичный токен в BSON Binary.
+
+Для нескольких размеров секрета печатает размер BSON-документа и время шифрования и расшифровки одного секрета.
+
+Запуск: python -m benchmarks.ciphertext_format --output results.json
+"""
+
+import argparse
+import json
+import os
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import bson
+
+from app.utils.crypto_utils import decrypt, decrypt_token, encrypt, encrypt_token, generate_key_from_passphrase
+
+SIZES = [64, 1024, 16 * 1024, 256 * 1024]
+FORMATS = {
+    "base64": (encrypt, decrypt),
+    "token": (encrypt_token, decrypt_token),
+    "binary": (
+        lambda secret, key: urlsafe_b64decode(encrypt_token(secret, key)),
+        lambda ciphertext, key: decrypt_token(urlsafe_b64encode(ciphertext).decode(), key),
+    ),
+}
+
+
+def per_call_us(func: Callable[[], object], rounds: int) -> float:
+    """
+    Возвращает среднее время одного вызова в микросекундах.
+    """
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) / rounds * 1_000_000
+
+
+def run(rounds: int) -> List[Dict[str, object]]:
+    key = generate_key_from_passphrase(b"benchmark passphrase", os.urandom(16))
+    results = []
+    for size in SIZES:
+        secret = "x" * size
+        for name, (encrypt_func, decrypt_func) in FORMATS.items():
+            ciphertext = encrypt_func(secret, key)
+            document = {"secret_key": "0" * 36, "secret": ciphertext, "expiration": datetime.now(timezone.utc)}
+            results.append(
+                {
+                    "format": name,
+                    "secret_bytes": size,
+                    "stored_bytes": len(ciphertext),
+                    "document_bytes": len(bson.encode(document)),
+                    "encrypt_us": per_call_us(lambda: encrypt_func(secret, key), rounds),
+                    "decrypt_us": per_call_us(lambda: decrypt_func(ciphertext, key), rounds),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare stored size and CPU cost of ciphertext formats.")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.rounds)
+    print(f"{'format':<8} {'secret':>8} {'stored':>8} {'document':>9} {'encrypt us':>11} {'decrypt us':>11}")
+    for row in results:
+        print(
+            f"{row['format']:<8} {row['secret_bytes']:>8} {row['stored_bytes']:>8} {row['document_bytes']:>9} "
+            f"{row['encrypt_us']:>11.1f} {row['decrypt_us']:>11.1f}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Нагрузочный тест жизненного цикла секрета: регистрация → вход → генерация → получение.
+
+Запросы идут напрямую в ASGI-приложение, а вместо MongoDB используется хранилище в памяти, поэтому измеряется
+стоимость самого сервиса (KDF, bcrypt, Fernet, сериализация) без сети и диска. Для каждого эндпоинта печатаются
+p50/p99 задержки и число запросов в секунду; результаты можно сохранить в JSON и сравнить с прошлым запуском.
+
+Запуск: python -m benchmarks.lifecycle --users 20 --secrets-per-user 10 --output results.json --baseline old.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import SALT
+from app.core.dependencies import create_hash_pool, create_kdf_from_config, create_kdf_pool
+from app.main import app
+from app.repositories.memory_secret_repository import InMemorySecretRepository
+from app.repositories.memory_user_repository import InMemoryUserRepository
+from app.services.secret_service import SecretService
+from app.services.user_service import UserService
+
+PASSWORD = "Benchmark_PASSWORD123#"
+PASSPHRASE = "benchmark passphrase"
+
+
+class Recorder:
+    """
+    Собирает задержки запросов по эндпоинтам и время выполнения каждой фазы.
+    """
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.durations: Dict[str, float] = {}
+        self.errors: Dict[str, int] = {}
+
+    async def request(self, client: AsyncClient, endpoint: str, url: str, **kwargs) -> dict:
+        started = time.perf_counter()
+        response = await client.post(url, **kwargs)
+        self.latencies.setdefault(endpoint, []).append(time.perf_counter() - started)
+        if response.status_code != 200:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        return response.json()
+
+    async def phase(self, endpoint: str, jobs: list, concurrency: int) -> list:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(job):
+            async with semaphore:
+                return await job
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*[run(job) for job in jobs])
+        self.durations[endpoint] = time.perf_counter() - started
+        return results
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for endpoint, latencies in self.latencies.items():
+            latencies = sorted(latencies)
+            result[endpoint] = {
+                "requests": len(latencies),
+                "errors": self.errors.get(endpoint, 0),
+                "rps": len(latencies) / self.durations[endpoint],
+                "p50_ms": statistics.median(latencies) * 1000,
+                "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+            }
+        return result
+
+
+async def run(users: int, secrets_per_user: int, concurrency: int) -> Dict[str, Dict[str, float]]:
+    secret_service = SecretService(SALT, InMemorySecretRepository(), create_kdf_pool(), create_kdf_from_config())
+    user_service = UserService(InMemoryUserRepository(), create_hash_pool())
+    app.state.secret_service = secret_service
+    app.state.user_service = user_service
+
+    recorder = Recorder()
+    usernames = [f"benchmark_user_{i}" for i in range(users)]
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark") as client:
+            credentials = [{"username": username, "password": PASSWORD} for username in usernames]
+            await recorder.phase(
+                "register",
+                [recorder.request(client, "register", "/register", json=body) for body in credentials],
+                concurrency,
+            )
+            tokens = await recorder.phase(
+                "login", [recorder.request(client, "login", "/login", json=body) for body in credentials], concurrency
+            )
+            headers = [{"Authorization": f"Bearer {token['access_token']}"} for token in tokens]
+
+            generate_jobs = [
+                recorder.request(
+                    client,
+                    "generate",
+                    "/generate",
+                    json={"secret": f"secret {i}", "passphrase": PASSPHRASE},
+                    headers=user_headers,
+                )
+                for user_headers in headers
+                for i in range(secrets_per_user)
+            ]
+            created = await recorder.phase("generate", generate_jobs, concurrency)
+
+            retrieve_jobs = [
+                recorder.request(
+                    client,
+                    "retrieve",
+                    f"/secrets/{secret['secret_key']}",
+                    json={"passphrase": PASSPHRASE},
+                    headers=headers[index // secrets_per_user],
+                )
+                for index, secret in enumerate(created)
+            ]
+            await recorder.phase("retrieve", retrieve_jobs, concurrency)
+    finally:
+        secret_service.kdf_pool.shutdown()
+        user_service.hash_pool.shutdown()
+    return recorder.summary()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the secret lifecycle against an in-process app.")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--secrets-per-user", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.users, args.secrets_per_user, args.concurrency))
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"{'endpoint':<10} {'requests':>8} {'errors':>6} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for endpoint, row in results.items():
+        line = (
+            f"{endpoint:<10} {row['requests']:>8} {row['errors']:>6} {row['rps']:>9.1f} "
+            f"{row['p50_ms']:>9.1f} {row['p99_ms']:>9.1f}"
+        )
+        if endpoint in baseline:
+            line += f"  p99 {row['p99_ms'] / baseline[endpoint]['p99_ms'] - 1:+.0%} vs baseline"
+        print(line)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
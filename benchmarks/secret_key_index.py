@@ -0,0 +1,127 @@
+"""
+Сравнение форматов ключа секрета в MongoDB: строка UUID (36 символов) и 16 байт в BSON Binary (ключ base62).
+
+Для каждого формата заполняет отдельную коллекцию (`--documents` документов) размера, близкого к секрету,
+строит индекс `secret_key_1` и печатает размер индекса по `collStats` и задержку поиска секрета по ключу
+(p50, p99). Нужна настоящая MongoDB; коллекции удаляются после замера.
+
+Запуск: python -m benchmarks.secret_key_index --documents 10000000 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Union
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+
+from app.core.config import MONGODB_URI
+from app.utils.secret_ids import SecretIdPool, decode_secret_id
+
+DATABASE_NAME = "benchmark_secret_keys"
+SECRET = "x" * 200
+
+
+def uuid_keys() -> Callable[[], str]:
+    return lambda: str(uuid.uuid4())
+
+
+def binary_keys() -> Callable[[], bytes]:
+    pool = SecretIdPool(4096)
+    return lambda: decode_secret_id(pool.next())
+
+
+FORMATS = {"uuid": uuid_keys, "binary": binary_keys}
+
+
+async def fill(
+    collection: AsyncIOMotorCollection, next_key: Callable[[], Union[str, bytes]], documents: int, batch_size: int
+) -> List[Union[str, bytes]]:
+    """
+    Заполняет коллекцию документами и возвращает выборку сохраненных ключей для поиска.
+    """
+    expiration = datetime.now(timezone.utc) + timedelta(days=1)
+    sample: List[Union[str, bytes]] = []
+    for start in range(0, documents, batch_size):
+        batch = [
+            {"secret_key": next_key(), "secret": SECRET, "expiration": expiration}
+            for _ in range(min(batch_size, documents - start))
+        ]
+        await collection.insert_many(batch, ordered=False)
+        sample.append(random.choice(batch)["secret_key"])
+    return sample
+
+
+async def lookup_latency_us(
+    collection: AsyncIOMotorCollection, keys: List[Union[str, bytes]], lookups: int
+) -> Dict[str, float]:
+    """
+    Возвращает задержку поиска документа по ключу в микросекундах.
+    """
+    timings = []
+    for _ in range(lookups):
+        secret_key = random.choice(keys)
+        started = time.perf_counter()
+        await collection.find_one({"secret_key": secret_key}, {"_id": 0})
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    percentiles = statistics.quantiles(timings, n=100)
+    return {"p50_us": percentiles[49], "p99_us": percentiles[98]}
+
+
+async def run(uri: str, documents: int, batch_size: int, lookups: int) -> List[Dict[str, object]]:
+    client = AsyncIOMotorClient(uri)
+    db = client[DATABASE_NAME]
+    results = []
+    try:
+        for name, make_keys in FORMATS.items():
+            collection = db[f"secrets_{name}"]
+            await collection.drop()
+            started = time.perf_counter()
+            keys = await fill(collection, make_keys(), documents, batch_size)
+            await collection.create_index("secret_key", unique=True)
+            fill_seconds = time.perf_counter() - started
+            stats = await db.command("collStats", collection.name)
+            results.append(
+                {
+                    "format": name,
+                    "documents": documents,
+                    "index_bytes": stats["indexSizes"]["secret_key_1"],
+                    "fill_seconds": fill_seconds,
+                    **await lookup_latency_us(collection, keys, lookups),
+                }
+            )
+            await collection.drop()
+    finally:
+        client.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare secret_key index size and lookup latency of key formats.")
+    parser.add_argument("--uri", default=os.getenv("BENCH_MONGODB_URI", MONGODB_URI))
+    parser.add_argument("--documents", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.uri, args.documents, args.batch_size, args.lookups))
+    print(f"{'format':<8} {'documents':>10} {'index MiB':>10} {'p50 us':>8} {'p99 us':>8}")
+    for row in results:
+        print(
+            f"{row['format']:<8} {row['documents']:>10} {row['index_bytes'] / 2**20:>10.1f} "
+            f"{row['p50_us']:>8.1f} {row['p99_us']:>8.1f}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
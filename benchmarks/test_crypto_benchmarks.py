@@ -0,0 +1,32 @@
+"""
+Микробенчмарки криптографических функций.
+
+Запуск: pytest benchmarks --benchmark-json=benchmarks/results/crypto.json
+Сравнение с предыдущим запуском: pytest-benchmark compare old.json benchmarks/results/crypto.json
+"""
+
+import os
+
+import pytest
+
+from app.utils.crypto_utils import decrypt, decrypt_token, encrypt, encrypt_token, generate_key_from_passphrase
+
+SECRET = "x" * 1024
+SALT = os.urandom(16)
+KEY = generate_key_from_passphrase(b"benchmark passphrase", SALT)
+
+
+def test_generate_key_from_passphrase(benchmark):
+    benchmark(generate_key_from_passphrase, b"benchmark passphrase", SALT)
+
+
+@pytest.mark.parametrize("encrypt_func", [encrypt, encrypt_token], ids=["base64", "token"])
+def test_encrypt(benchmark, encrypt_func):
+    benchmark(encrypt_func, SECRET, KEY)
+
+
+@pytest.mark.parametrize(
+    "encrypt_func, decrypt_func", [(encrypt, decrypt), (encrypt_token, decrypt_token)], ids=["base64", "token"]
+)
+def test_decrypt(benchmark, encrypt_func, decrypt_func):
+    benchmark(decrypt_func, encrypt_func(SECRET, KEY), KEY)
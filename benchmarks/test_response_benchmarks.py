@@ -0,0 +1,77 @@
+"""
+Микробенчмарки формирования ответов эндпоинтов.
+
+Для каждого маршрута сравнивается стандартный путь FastAPI (проверка модели по `response_model`, `jsonable_encoder`
+и `JSONResponse`) с быстрым путем `trusted_response` (сериализация модели orjson). Разница между парами — экономия
+на одном запросе. Модели в обоих путях создаются с проверкой: для таких небольших моделей `model_construct`
+оказался медленнее проверки в pydantic-core.
+
+Запуск: pytest benchmarks/test_response_benchmarks.py --benchmark-group-by=param:route
+"""
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.responses import trusted_response
+from app.models.secret import SecretBatchItemResponse, SecretBatchResponse, SecretKeyResponse, SecretResponse
+from app.models.user import MessageResponse, TokenResponse
+
+SECRET_KEY = "0b6f1c1e-8a53-4b1f-9d0e-2f4f7d3f8a61"
+
+ROUTES = {
+    "register": (MessageResponse, {"message": "User registered successfully"}),
+    "login": (TokenResponse, {"access_token": "e" * 180}),
+    "generate": (SecretKeyResponse, {"secret_key": SECRET_KEY}),
+    "secrets": (SecretResponse, {"secret": "x" * 1024}),
+}
+
+
+def run_sync(coroutine):
+    """
+    Выполняет корутину, которая не ожидает ввода-вывода, без цикла событий, чтобы не измерять его накладные расходы.
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as result:
+        return result.value
+    raise RuntimeError("Coroutine is not synchronous")
+
+
+def default_response(field, model):
+    return JSONResponse(run_sync(serialize_response(field=field, response_content=model)))
+
+
+@pytest.mark.parametrize("route", list(ROUTES))
+@pytest.mark.parametrize("path", ["default", "trusted"])
+def test_response(benchmark, route, path):
+    model_class, values = ROUTES[route]
+    if path == "default":
+        field = create_model_field(name="Response", type_=model_class, mode="serialization")
+        benchmark(lambda: default_response(field, model_class(**values)))
+    else:
+        benchmark(lambda: trusted_response(model_class(**values)))
+
+
+@pytest.mark.parametrize("path", ["default", "trusted"])
+def test_batch_response(benchmark, path):
+    results = [(SECRET_KEY, None)] * 100
+    if path == "default":
+        field = create_model_field(name="Response", type_=SecretBatchResponse, mode="serialization")
+        benchmark(
+            lambda: default_response(
+                field,
+                SecretBatchResponse(
+                    items=[SecretBatchItemResponse(secret_key=key, error=error) for key, error in results]
+                ),
+            )
+        )
+    else:
+        benchmark(
+            lambda: trusted_response(
+                SecretBatchResponse(
+                    items=[SecretBatchItemResponse(secret_key=key, error=error) for key, error in results]
+                )
+            )
+        )
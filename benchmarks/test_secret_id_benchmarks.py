@@ -0,0 +1,27 @@
+"""
+Микробенчмарки генерации ключа секрета: `str(uuid.uuid4())` против пула идентификаторов base62.
+
+Запуск: pytest benchmarks/test_secret_id_benchmarks.py
+"""
+
+import uuid
+
+from app.utils.secret_ids import SecretIdPool, decode_secret_id, encode_secret_id
+
+RAW_ID = uuid.uuid4().bytes
+
+
+def test_uuid4_key(benchmark):
+    benchmark(lambda: str(uuid.uuid4()))
+
+
+def test_pool_key(benchmark):
+    benchmark(SecretIdPool(1024).next)
+
+
+def test_encode_secret_id(benchmark):
+    benchmark(encode_secret_id, RAW_ID)
+
+
+def test_decode_secret_id(benchmark):
+    benchmark(decode_secret_id, encode_secret_id(RAW_ID))
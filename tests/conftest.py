@@ -1,38 +1,61 @@
 import pytest
 from httpx import ASGITransport, AsyncClient
 
-from app.core.config import MONGODB_URI, SALT, TEST_DATABASE_NAME
+from app.core.config import MONGODB_URI, REDIS_URL, SALT, STORAGE_BACKEND, TEST_DATABASE_NAME
+from app.core.database import create_mongo_client, create_redis_client
 from app.core.dependencies import create_secret_service_and_repository, create_user_service_and_repository
+from app.core.indexes import IndexInitializer
 from app.main import app
 
 
+@pytest.fixture(scope="module")
+def anyio_backend() -> str:
+    """
+    Асинхронные тесты запускаются только на asyncio: Motor и пулы исполнителей не поддерживают trio.
+    """
+    return "asyncio"
+
+
 @pytest.fixture(scope="module")
 async def setup_service():
     """
     Настройка сервисов и репозиториев для тестирования, инициализация индексов.
     После тестов очищает и закрывает репозитории, удаляет сервисы из состояния приложения.
+    С STORAGE_BACKEND=memory тесты выполняются без MongoDB, а с STORAGE_BACKEND=redis секреты хранятся в REDIS_URL.
     """
+    test_mongo_client, test_mongo_pool_stats, test_db = None, None, None
+    if STORAGE_BACKEND != "memory":
+        test_mongo_client, test_mongo_pool_stats = create_mongo_client(MONGODB_URI)
+        test_db = test_mongo_client[TEST_DATABASE_NAME]
+    test_redis_client = create_redis_client(REDIS_URL) if STORAGE_BACKEND == "redis" else None
     test_secret_repository, test_secret_service = create_secret_service_and_repository(
-        mongodb_uri=MONGODB_URI, db_name=TEST_DATABASE_NAME, salt=SALT
-    )
-    test_user_repository, test_user_service = create_user_service_and_repository(
-        mongodb_uri=MONGODB_URI, db_name=TEST_DATABASE_NAME
+        db=test_db, salt=SALT, redis_client=test_redis_client
     )
-    await test_secret_repository.initialize_indexes()
-    await test_user_repository.initialize_indexes()
+    test_user_repository, test_user_service = create_user_service_and_repository(db=test_db)
+    test_index_initializer = IndexInitializer(test_db, [test_secret_repository, test_user_repository])
+    await test_index_initializer.run()
 
     app.state.secret_service = test_secret_service
     app.state.user_service = test_user_service
+    app.state.mongo_pool_stats = test_mongo_pool_stats
+    app.state.index_initializer = test_index_initializer
 
     yield
 
     await test_secret_repository.clear_all()
-    await test_secret_repository.close()
+    test_secret_service.kdf_pool.shutdown()
 
     await test_user_repository.clear_all()
-    await test_user_repository.close()
+    test_user_service.hash_pool.shutdown()
+
+    if test_mongo_client is not None:
+        test_mongo_client.close()
+    if test_redis_client is not None:
+        await test_redis_client.aclose()
     del app.state.secret_service
     del app.state.user_service
+    del app.state.mongo_pool_stats
+    del app.state.index_initializer
 
 
 @pytest.fixture
@@ -0,0 +1,167 @@
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.admission import AdmissionBudget, AdmissionMiddleware
+from app.exceptions import AdmissionRejectedError
+
+
+@pytest.mark.anyio
+async def test_budget_admits_queued_request_in_order() -> None:
+    """
+    Тестирует очередь бюджета.
+    Ожидается, что ожидающие запросы допускаются по мере освобождения мест в порядке поступления.
+    """
+    budget = AdmissionBudget("test", max_concurrent=1, max_queue=2, max_wait=1)
+    admitted = []
+
+    async def request(n: int) -> None:
+        await budget.acquire()
+        admitted.append(n)
+
+    await budget.acquire()
+    waiting = [asyncio.ensure_future(request(n)) for n in (1, 2)]
+    await asyncio.sleep(0)
+    assert budget.stats()["queued"] == 2
+
+    budget.release()
+    await waiting[0]
+    budget.release()
+    await waiting[1]
+
+    assert admitted == [1, 2]
+    assert budget.stats()["admitted"] == 3
+
+
+@pytest.mark.anyio
+async def test_budget_rejects_when_queue_is_full() -> None:
+    """
+    Тестирует отказ при заполненной очереди.
+    Ожидается `AdmissionRejectedError` с положительным `retry_after` без ожидания.
+    """
+    budget = AdmissionBudget("test", max_concurrent=1, max_queue=0, max_wait=1)
+    await budget.acquire()
+
+    with pytest.raises(AdmissionRejectedError) as e:
+        await budget.acquire()
+
+    assert e.value.retry_after >= 1
+    assert budget.stats()["rejected"] == 1
+
+
+@pytest.mark.anyio
+async def test_budget_rejects_request_that_would_miss_deadline() -> None:
+    """
+    Тестирует отказ по оценке ожидания.
+    Когда по времени обработки запрос не дождется очереди за `max_wait`, ожидается немедленный отказ
+    с `Retry-After` по этой оценке.
+    """
+    budget = AdmissionBudget("test", max_concurrent=1, max_queue=10, max_wait=1)
+    await budget.acquire()
+    budget.release(elapsed=3.0)
+    await budget.acquire()
+
+    with pytest.raises(AdmissionRejectedError) as e:
+        await budget.acquire()
+
+    assert e.value.retry_after == 3
+    assert budget.stats()["queued"] == 0
+
+
+@pytest.mark.anyio
+async def test_budget_rejects_after_max_wait() -> None:
+    """
+    Тестирует ограничение времени ожидания.
+    Ожидается отказ по истечении `max_wait`, после чего освобожденное место не достается отказавшему запросу.
+    """
+    budget = AdmissionBudget("test", max_concurrent=1, max_queue=10, max_wait=0.05)
+    await budget.acquire()
+
+    with pytest.raises(AdmissionRejectedError):
+        await budget.acquire()
+
+    budget.release()
+    assert budget.stats()["timed_out"] == 1
+    assert budget.stats()["running"] == 0
+
+
+@pytest.mark.anyio
+async def test_middleware_sheds_load_with_retry_after() -> None:
+    """
+    Тестирует middleware на маршрутах с бюджетом и без него.
+    Ожидается, что при занятом бюджете запрос получает 503 с `Retry-After`, а маршрут без бюджета обслуживается.
+    """
+    release = asyncio.Event()
+
+    async def slow(request):
+        await release.wait()
+        return PlainTextResponse("done")
+
+    async def health(request):
+        return PlainTextResponse("ok")
+
+    budget = AdmissionBudget("test", max_concurrent=1, max_queue=0, max_wait=1)
+    app = AdmissionMiddleware(
+        Starlette(routes=[Route("/login", slow, methods=["POST"]), Route("/healthz", health)]),
+        rules=[("/login", budget)],
+    )
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = asyncio.ensure_future(ac.post("/login"))
+        while budget.stats()["running"] == 0:
+            await asyncio.sleep(0.01)
+
+        rejected = await ac.post("/login")
+        health_response = await ac.get("/healthz")
+        release.set()
+        first_response = await first
+
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "1"
+    assert health_response.status_code == 200
+    assert first_response.text == "done"
+    assert budget.stats()["running"] == 0
+
+
+@pytest.mark.anyio
+async def test_middleware_does_not_hold_budget_for_slow_request_body() -> None:
+    """
+    Тестирует запросы с медленно передаваемым телом.
+    Ожидается, что медленная загрузка на потоковый маршрут и медленное тело обычного запроса не занимают место
+    в бюджете и не увеличивают оценку времени обработки, а быстрый запрос обслуживается без ожидания.
+    """
+
+    async def echo(request):
+        return PlainTextResponse(str(len(await request.body())))
+
+    budget = AdmissionBudget("test", max_concurrent=1, max_queue=0, max_wait=1)
+    app = AdmissionMiddleware(
+        Starlette(
+            routes=[Route("/generate", echo, methods=["POST"]), Route("/generate/stream", echo, methods=["POST"])]
+        ),
+        rules=[("/generate/stream", None), ("/generate", budget)],
+    )
+
+    async def slow_body():
+        for _ in range(3):
+            await asyncio.sleep(0.2)
+            yield b"x" * 1024
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        uploads = [
+            asyncio.ensure_future(ac.post(path, content=slow_body())) for path in ("/generate/stream", "/generate")
+        ]
+        await asyncio.sleep(0.1)
+
+        fast = await ac.post("/generate", content=b"x" * 1024)
+        assert budget.stats()["running"] == 0
+        responses = await asyncio.gather(*uploads)
+
+    assert fast.status_code == 200
+    assert [response.text for response in responses] == ["3072", "3072"]
+    assert budget.stats()["rejected"] == 0
+    assert budget.stats()["service_time_ms"] < 100
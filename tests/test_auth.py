@@ -1,6 +1,10 @@
+from datetime import timedelta
+
 import pytest
 from httpx import ASGITransport, AsyncClient
 
+from app.core.auth import security, token_cache
+from app.core.config import STORAGE_BACKEND
 from app.main import app
 
 
@@ -65,3 +69,74 @@ async def test_register_user_with_invalid_data(setup_service: None) -> None:
         response = await ac.post("/register", json={"username": username, "password": password})
 
     assert response.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_get_pool_stats(setup_service: None, authenticated_user: str) -> None:
+    """
+    Проверяет получение статистики пулов авторизованным пользователем.
+    Ожидается ответ со счетчиками пула соединений MongoDB и пулов исполнителей.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/stats/pools", headers={"Authorization": f"Bearer {authenticated_user}"})
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"mongo", "kdf", "hash", "admission"}
+    assert response.json()["hash"]["completed"] >= 1
+
+
+@pytest.mark.anyio
+async def test_access_token_verification_is_cached(setup_service: None, authenticated_user: str) -> None:
+    """
+    Проверяет кэширование результата проверки токена доступа.
+    Ожидается, что повторный запрос с тем же токеном будет обслужен из кэша.
+    """
+    token_cache.clear()
+    hits = token_cache.hits
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        for _ in range(2):
+            response = await ac.get("/stats/pools", headers={"Authorization": f"Bearer {authenticated_user}"})
+            assert response.status_code == 200
+
+    assert token_cache.hits == hits + 1
+
+
+@pytest.mark.anyio
+async def test_invalid_access_token(setup_service: None) -> None:
+    """
+    Проверяет запрос с недействительным и просроченным токеном.
+    Ожидается ошибка с кодом 401, а токены не должны попадать в кэш.
+    """
+    token_cache.clear()
+    expired_token = security.create_access_token(uid="user", expiry=timedelta(seconds=-1))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        for token in ("invalid_token", expired_token):
+            response = await ac.get("/stats/pools", headers={"Authorization": f"Bearer {token}"})
+
+            assert response.status_code == 401
+            assert response.json() == {"detail": "Token has expired or is invalid. Please log in again."}
+    assert token_cache.stats()["size"] == 0
+
+
+@pytest.mark.anyio
+async def test_metrics(setup_service: None, authenticated_user: str) -> None:
+    """
+    Проверяет экспорт метрик в формате Prometheus.
+    Ожидается, что задержки запросов помечены шаблоном маршрута, а этапы обработки и пулы присутствуют в выводе.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await ac.post(
+            "/secrets/unknown-key", json={"passphrase": "x"}, headers={"Authorization": f"Bearer {authenticated_user}"}
+        )
+        response = await ac.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="POST",route="/login",status="200"}' in response.text
+    assert 'route="/secrets/{secret_key}"' in response.text
+    assert 'route="/secrets/unknown-key"' not in response.text
+    assert 'stage_duration_seconds_count{stage="password_hash"}' in response.text
+    assert "worker_pool_tasks" in response.text
+    assert ("mongo_pool_connections" in response.text) == (STORAGE_BACKEND != "memory")
@@ -0,0 +1,49 @@
+import time
+
+from app.utils.cache import TTLCache
+
+
+def test_ttl_cache_get_and_set():
+    """
+    Тестирует сохранение и получение значения из кэша.
+    Проверяет счетчики попаданий и промахов.
+    """
+    cache = TTLCache(max_size=2, ttl=60)
+
+    assert cache.get("key") is None
+    cache.set("key", "value")
+
+    assert cache.get("key") == "value"
+    assert cache.stats() == {"size": 1, "max_size": 2, "hits": 1, "misses": 1}
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """
+    Тестирует вытеснение давно не использованной записи при переполнении кэша.
+    """
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("first", 1)
+    cache.set("second", 2)
+    cache.get("first")
+
+    cache.set("third", 3)
+
+    assert cache.get("second") is None
+    assert cache.get("first") == 1
+    assert cache.get("third") == 3
+
+
+def test_ttl_cache_expires_entries():
+    """
+    Тестирует истечение времени жизни записи.
+    Проверяет, что время жизни записи ограничено временем жизни кэша, а записи с неположительным временем
+    жизни не сохраняются.
+    """
+    cache = TTLCache(max_size=10, ttl=0.01)
+    cache.set("short", 1, ttl=3600)
+    cache.set("expired", 2, ttl=-1)
+
+    time.sleep(0.02)
+
+    assert cache.get("short") is None
+    assert cache.get("expired", "default") == "default"
@@ -3,7 +3,15 @@ from base64 import urlsafe_b64decode
 import pytest
 from cryptography.fernet import InvalidToken
 
-from app.utils.crypto_utils import decrypt, encrypt, generate_key_from_passphrase
+from app.utils.crypto_utils import (
+    decrypt,
+    decrypt_chunk,
+    decrypt_token,
+    encrypt,
+    encrypt_chunk,
+    encrypt_token,
+    generate_key_from_passphrase,
+)
 
 
 def test_generate_key_from_passphrase():
@@ -75,3 +83,39 @@ def test_encrypt_output_is_base64():
         urlsafe_b64decode(encrypted_secret)
     except Exception as e:
         pytest.fail(f"Encrypted secret is not valid base64: {e}")
+
+
+def test_encrypt_decrypt_token():
+    """
+    Тестирует шифрование и расшифровку секрета в виде токена Fernet без дополнительного base64.
+    Проверяет, что секрет восстанавливается и что токен короче двойного base64.
+    """
+    secret = "my_secret_data"
+    passphrase = b"my_secret_passphrase"
+    salt = b"my_secret_salt"
+
+    key = generate_key_from_passphrase(passphrase, salt)
+
+    encrypted_secret = encrypt_token(secret, key)
+
+    assert len(encrypted_secret) < len(encrypt(secret, key))
+    assert decrypt_token(encrypted_secret, key) == secret
+
+    wrong_key = generate_key_from_passphrase(b"wrong_passphrase", salt)
+    with pytest.raises(InvalidToken):
+        decrypt_token(encrypted_secret, wrong_key)
+
+
+def test_encrypt_decrypt_chunk():
+    """
+    Тестирует шифрование и расшифровку части большого секрета.
+    Проверяет, что часть восстанавливается вместе с признаком последней части,
+    а часть, стоящая не на своем месте, отклоняется.
+    """
+    key = generate_key_from_passphrase(b"my_secret_passphrase", b"my_secret_salt")
+
+    chunk = encrypt_chunk(b"chunk_data", key, n=3, final=True)
+
+    assert decrypt_chunk(chunk, key, n=3) == (b"chunk_data", True)
+    with pytest.raises(InvalidToken):
+        decrypt_chunk(chunk, key, n=2)
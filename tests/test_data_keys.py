@@ -0,0 +1,245 @@
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from app.core.workers import WorkerPool
+from app.models.secret import Secret, SecretChunk
+from app.repositories.memory_data_key_repository import InMemoryDataKeyRepository
+from app.repositories.memory_secret_repository import InMemorySecretRepository
+from app.services.data_key_service import DataKeyService
+from app.services.secret_service import SecretService
+from app.utils.crypto_utils import decrypt_chunk
+from app.utils.kdf import Pbkdf2Kdf
+
+
+class CountingDataKeyRepository(InMemoryDataKeyRepository):
+    """
+    Репозиторий ключей данных в памяти, считающий чтения ключей.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.get_calls = 0
+
+    async def get(self, key_id: str):
+        self.get_calls += 1
+        return await super().get(key_id)
+
+
+class ResealableSecretRepository(InMemorySecretRepository):
+    """
+    Репозиторий секретов в памяти с пакетным перешифрованием, как у репозитория MongoDB.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.secrets: List[Secret] = []
+        self.chunks: List[SecretChunk] = []
+
+    async def create(self, secret: Secret) -> None:
+        self.secrets.append(secret)
+
+    async def iter_sealed_with_other(self, data_key_id: str, batch_size: int) -> AsyncIterator[List[Secret]]:
+        pending = [secret for secret in self.secrets if secret.data_key_id != data_key_id]
+        for start in range(0, len(pending), batch_size):
+            yield pending[start : start + batch_size]
+
+    async def replace_sealed_many(self, secrets: List[Tuple[Secret, Optional[str]]]) -> int:
+        replaced = {secret.secret_key: secret for secret, _ in secrets}
+        self.secrets = [replaced.get(secret.secret_key, secret) for secret in self.secrets]
+        return len(replaced)
+
+    async def iter_sealed_chunks_with_other(
+        self, data_key_id: str, batch_size: int
+    ) -> AsyncIterator[List[SecretChunk]]:
+        pending = [chunk for chunk in self.chunks if chunk.data_key_id != data_key_id]
+        for start in range(0, len(pending), batch_size):
+            yield pending[start : start + batch_size]
+
+    async def replace_sealed_chunks_many(self, chunks: List[Tuple[SecretChunk, Optional[str]]]) -> int:
+        replaced = {(chunk.secret_key, chunk.n): chunk for chunk, _ in chunks}
+        self.chunks = [replaced.get((chunk.secret_key, chunk.n), chunk) for chunk in self.chunks]
+        return len(replaced)
+
+
+def make_service(repository, master_keys: List[bytes], rotation_seconds: float = 3600) -> DataKeyService:
+    return DataKeyService(repository, master_keys, rotation_seconds=rotation_seconds, cache_size=10, cache_ttl=60)
+
+
+@pytest.mark.anyio
+async def test_data_key_seal_unseal_uses_cache() -> None:
+    """
+    Тестирует шифрование ключом данных.
+    Ожидается, что значение расшифровывается, ключ данных хранится только обернутым,
+    а повторные расшифровки не читают ключ из хранилища.
+    """
+    repository = CountingDataKeyRepository()
+    master_key = Fernet.generate_key()
+    service = make_service(repository, [master_key])
+
+    sealed, key_id = await service.seal("token")
+    data_key = await repository.get(key_id)
+
+    assert sealed != "token"
+    assert Fernet(Fernet(master_key).decrypt(data_key.wrapped_key)).decrypt(sealed) == b"token"
+
+    restarted = make_service(repository, [master_key])
+    repository.get_calls = 0
+    assert [await restarted.unseal(sealed, key_id) for _ in range(3)] == ["token"] * 3
+    assert repository.get_calls == 1
+    assert (await restarted.current_key())[0] == key_id
+
+
+@pytest.mark.anyio
+async def test_data_key_rotation() -> None:
+    """
+    Тестирует ротацию ключей данных.
+    Ожидается, что устаревший ключ заменяется новым, а значения, зашифрованные старым ключом, расшифровываются.
+    """
+    service = make_service(InMemoryDataKeyRepository(), [Fernet.generate_key()], rotation_seconds=0)
+
+    first, first_key_id = await service.seal("first")
+    second, second_key_id = await service.seal("second")
+
+    assert first_key_id != second_key_id
+    assert await service.unseal(first, first_key_id) == "first"
+    assert await service.unseal(second, second_key_id) == "second"
+
+
+@pytest.mark.anyio
+async def test_master_key_rotation_rewraps_data_keys() -> None:
+    """
+    Тестирует смену мастер-ключа.
+    Ожидается, что после повторного оборачивания ключей данных прежний мастер-ключ больше не нужен.
+    """
+    repository = InMemoryDataKeyRepository()
+    old_master_key, new_master_key = Fernet.generate_key(), Fernet.generate_key()
+    sealed, key_id = await make_service(repository, [old_master_key]).seal("token")
+
+    with pytest.raises(ValueError):
+        await make_service(repository, [new_master_key]).unseal(sealed, key_id)
+
+    assert await make_service(repository, [new_master_key, old_master_key]).rewrap_keys(batch_size=1) == 1
+    assert await make_service(repository, [new_master_key]).unseal(sealed, key_id) == "token"
+
+
+@pytest.mark.anyio
+async def test_secret_service_seals_and_reseals_secrets() -> None:
+    """
+    Тестирует шифрование хранимых секретов ключом данных.
+    Ожидается, что секрет хранится зашифрованным ключом данных и выдается, а перешифрование переводит
+    на текущий ключ данных и секреты со старым ключом, и секреты без ключа данных.
+    """
+    repository = ResealableSecretRepository()
+    data_keys = make_service(InMemoryDataKeyRepository(), [Fernet.generate_key()])
+    service = SecretService("salt", repository, WorkerPool("kdf", 1, 4), Pbkdf2Kdf(iterations=1000), data_keys)
+    expiration = datetime.now(timezone.utc) + timedelta(minutes=1)
+    try:
+        sealed = await service.encrypt_secret("secret", "passphrase")
+        await repository.create(sealed)
+        await repository.create(Secret(secret_key="legacy", secret="token", expiration=expiration))
+
+        assert sealed.data_key_id is not None
+        assert (await service.unseal(sealed)).secret != sealed.secret
+
+        data_keys.rotation_seconds = 0
+        await data_keys.current_key()
+        data_keys.rotation_seconds = 3600
+        assert await service.reseal_secrets(batch_size=1) == 2
+        key_id = repository.secrets[0].data_key_id
+        assert {secret.data_key_id for secret in repository.secrets} == {key_id}
+        assert key_id != sealed.data_key_id
+        assert (await service.unseal(repository.secrets[1])).secret == "token"
+        assert (
+            service.decrypt(
+                await service.unseal(repository.secrets[0]), await service.generate_key("passphrase", sealed.envelope)
+            )
+            == "secret"
+        )
+    finally:
+        service.kdf_pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_secret_service_seals_stream_chunks() -> None:
+    """
+    Тестирует шифрование частей большого секрета ключом данных.
+    Ожидается, что сохраненные части нельзя расшифровать ключом из кодовой фразы без ключа данных,
+    а секрет выдается потоком целиком.
+    """
+    repository = InMemorySecretRepository()
+    data_keys = make_service(InMemoryDataKeyRepository(), [Fernet.generate_key()])
+    service = SecretService("salt", repository, WorkerPool("kdf", 1, 4), Pbkdf2Kdf(iterations=1000), data_keys)
+    service.chunk_size = 4
+
+    async def stream() -> AsyncIterator[bytes]:
+        yield b"large secret"
+
+    try:
+        secret_key = await service.generate_stream_secret(stream(), "passphrase")
+        secret = await service.unseal(await repository.get(secret_key))
+        key = await service.generate_key("passphrase", secret.envelope)
+        stored = [chunk async for chunk in repository.iter_chunks(secret_key)]
+
+        assert len(stored) == 3
+        assert all(data_key_id is not None for _, data_key_id in stored)
+        with pytest.raises(InvalidToken):
+            decrypt_chunk(stored[0][0], key, 0)
+        assert decrypt_chunk(await service.unseal_chunk_data(*stored[0]), key, 0) == (b"larg", False)
+
+        chunks = await service.get_stream_secret(secret_key, "passphrase")
+        assert b"".join([data async for data in chunks]) == b"large secret"
+    finally:
+        service.kdf_pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_secret_service_reseals_chunks() -> None:
+    """
+    Тестирует перешифрование частей больших секретов.
+    Ожидается, что части со старым ключом данных и без ключа данных переводятся на текущий ключ данных,
+    а их данные не меняются.
+    """
+    repository = ResealableSecretRepository()
+    data_keys = make_service(InMemoryDataKeyRepository(), [Fernet.generate_key()])
+    service = SecretService("salt", repository, WorkerPool("kdf", 1, 4), Pbkdf2Kdf(iterations=1000), data_keys)
+    expiration = datetime.now(timezone.utc) + timedelta(minutes=1)
+    try:
+        repository.chunks = [
+            await service.seal_chunk(SecretChunk(secret_key="key", n=0, data="first", expiration=expiration)),
+            SecretChunk(secret_key="key", n=1, data="second", expiration=expiration),
+        ]
+        old_key_id = repository.chunks[0].data_key_id
+
+        data_keys.rotation_seconds = 0
+        await data_keys.current_key()
+        data_keys.rotation_seconds = 3600
+        assert await service.reseal_secrets(batch_size=1) == 2
+
+        key_ids = {chunk.data_key_id for chunk in repository.chunks}
+        assert len(key_ids) == 1 and old_key_id not in key_ids and None not in key_ids
+        assert [await service.unseal_chunk_data(chunk.data, chunk.data_key_id) for chunk in repository.chunks] == [
+            "first",
+            "second",
+        ]
+    finally:
+        service.kdf_pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_reseal_requires_resealable_repository() -> None:
+    """
+    Тестирует перешифрование в хранилище без пакетного перешифрования.
+    Ожидается понятная ошибка вместо `AttributeError`.
+    """
+    data_keys = make_service(InMemoryDataKeyRepository(), [Fernet.generate_key()])
+    service = SecretService(
+        "salt", InMemorySecretRepository(), WorkerPool("kdf", 1, 4), Pbkdf2Kdf(iterations=1000), data_keys
+    )
+    try:
+        with pytest.raises(RuntimeError, match="does not support re-encrypting secrets"):
+            await service.reseal_secrets()
+    finally:
+        service.kdf_pool.shutdown()
@@ -0,0 +1,44 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+
+
+@pytest.mark.anyio
+async def test_healthz() -> None:
+    """
+    Тестирует проверку работоспособности.
+    Ожидается ответ 200 без обращения к хранилищам.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/healthz")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+@pytest.mark.anyio
+async def test_readyz_reports_indexes_and_pools(setup_service: None) -> None:
+    """
+    Тестирует проверку готовности.
+    Ожидается ответ 200 с состоянием индексов и пулов, а пока индексы не проверены — 503.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/readyz")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "ready"
+        assert body["indexes"]["status"] in ("ready", "skipped")
+        assert set(body["pools"]) == {"mongo", "kdf", "hash"}
+
+        index_initializer = app.state.index_initializer
+        status = index_initializer.status
+        index_initializer.status = "pending"
+        try:
+            response = await ac.get("/readyz")
+        finally:
+            index_initializer.status = status
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
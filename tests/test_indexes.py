@@ -0,0 +1,82 @@
+from typing import Optional
+
+import pytest
+
+from app.core.indexes import INDEX_SCHEMA_VERSION, SCHEMA_DOCUMENT_ID, IndexInitializer
+
+
+class FakeSchemaCollection:
+    """
+    Коллекция `schema_meta` в памяти.
+    """
+
+    def __init__(self) -> None:
+        self.documents = {}
+
+    async def find_one(self, query: dict) -> Optional[dict]:
+        return self.documents.get(query["_id"])
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False) -> None:
+        document = self.documents.setdefault(query["_id"], {"_id": query["_id"]})
+        document.update(update["$set"])
+        document["version"] = max(document.get("version", 0), update["$max"]["version"])
+
+
+class CountingRepository:
+    """
+    Репозиторий, считающий вызовы инициализации индексов.
+    """
+
+    def __init__(self, failures: int = 0) -> None:
+        self.calls = 0
+        self.failures = failures
+
+    async def initialize_indexes(self) -> None:
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("MongoDB is unavailable")
+
+
+@pytest.mark.anyio
+async def test_index_initializer_runs_once_per_schema_version() -> None:
+    """
+    Тестирует однократную инициализацию индексов.
+    Ожидается, что после записи версии схемы повторный запуск не обращается к индексам, а новая версия — обращается.
+    """
+    schema = FakeSchemaCollection()
+    repository = CountingRepository()
+
+    first = IndexInitializer({"schema_meta": schema}, [repository])
+    await first.run()
+    second = IndexInitializer({"schema_meta": schema}, [repository])
+    await second.run()
+
+    assert (first.status, second.status) == ("ready", "skipped")
+    assert second.ready and repository.calls == 1
+    assert schema.documents[SCHEMA_DOCUMENT_ID]["version"] == INDEX_SCHEMA_VERSION
+
+    await IndexInitializer({"schema_meta": schema}, [repository], version=INDEX_SCHEMA_VERSION + 1).run()
+    await IndexInitializer({"schema_meta": schema}, [repository]).run()
+    assert repository.calls == 2
+    assert schema.documents[SCHEMA_DOCUMENT_ID]["version"] == INDEX_SCHEMA_VERSION + 1
+
+
+@pytest.mark.anyio
+async def test_index_initializer_retries_in_background() -> None:
+    """
+    Тестирует повтор фоновой инициализации после ошибки.
+    Ожидается, что ошибка видна в состоянии, а инициализация повторяется до успеха.
+    """
+    repository = CountingRepository(failures=2)
+    initializer = IndexInitializer(None, [repository])
+
+    with pytest.raises(ConnectionError):
+        await initializer.run()
+    assert not initializer.ready
+    assert initializer.stats()["error"] == "ConnectionError: MongoDB is unavailable"
+
+    await initializer.run_until_ready(retry_interval=0)
+
+    assert initializer.ready and initializer.error is None
+    assert repository.calls == 3
@@ -0,0 +1,70 @@
+from base64 import urlsafe_b64encode
+
+import pytest
+
+from app.utils.crypto_utils import generate_key_from_passphrase
+from app.utils.kdf import KDFS, Argon2idKdf, Kdf, Pbkdf2Kdf, ScryptKdf, create_kdf
+
+FAST_PARAMS = {
+    "pbkdf2-sha256": {"iterations": 1000},
+    "scrypt": {"n": 2**10, "r": 8, "p": 1},
+    "argon2id": {"iterations": 1, "memory_cost": 1024, "lanes": 1},
+}
+
+
+@pytest.mark.parametrize("name", sorted(KDFS))
+def test_kdf_derives_fernet_key(name: str):
+    """
+    Тестирует вывод ключа каждым алгоритмом.
+    Проверяет длину ключа, то, что `derive` кодирует результат `derive_raw`,
+    и то, что одинаковые входные данные дают одинаковый ключ.
+    """
+    kdf = create_kdf(name, FAST_PARAMS[name])
+
+    key = kdf.derive(b"my_secret_passphrase", b"my_secret_salt00")
+
+    assert len(key) == 44
+    assert key == urlsafe_b64encode(kdf.derive_raw(b"my_secret_passphrase", b"my_secret_salt00"))
+    assert key == kdf.derive(b"my_secret_passphrase", b"my_secret_salt00")
+    assert key != kdf.derive(b"wrong_passphrase", b"my_secret_salt00")
+
+
+def test_kdf_params_change_key():
+    """
+    Тестирует, что параметры стоимости влияют на ключ.
+    """
+    passphrase, salt = b"my_secret_passphrase", b"my_secret_salt00"
+
+    assert ScryptKdf(n=2**10).derive(passphrase, salt) != ScryptKdf(n=2**11).derive(passphrase, salt)
+    assert Argon2idKdf(iterations=1, memory_cost=1024).derive(passphrase, salt) != Argon2idKdf(
+        iterations=2, memory_cost=1024
+    ).derive(passphrase, salt)
+
+
+def test_pbkdf2_kdf_defaults():
+    """
+    Тестирует, что PBKDF2 по умолчанию использует прежнее число итераций и выводит прежний ключ.
+    """
+    assert Pbkdf2Kdf().params == {"iterations": 100000}
+    assert Pbkdf2Kdf(iterations=1000).derive(b"passphrase", b"salt") == generate_key_from_passphrase(
+        b"passphrase", b"salt", 1000
+    )
+
+
+def test_kdf_requires_derive_raw():
+    """
+    Тестирует, что базовый класс нельзя использовать без реализации `derive_raw`.
+    """
+    with pytest.raises(TypeError):
+        Kdf()
+
+
+def test_create_kdf_rejects_unknown_algorithm_and_params():
+    """
+    Тестирует отказ при неизвестном алгоритме или неизвестном параметре.
+    """
+    with pytest.raises(ValueError):
+        create_kdf("md5", {})
+
+    with pytest.raises(ValueError):
+        create_kdf("scrypt", {"iterations": 10})
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import MONGODB_URI, STORAGE_BACKEND, TEST_DATABASE_NAME
+from app.repositories.maintenance import delete_in_batches
+from app.repositories.secret_repository import SecretRepository
+from app.utils.secret_ids import SecretIdPool, decode_secret_id
+
+pytestmark = pytest.mark.skipif(STORAGE_BACKEND != "mongo", reason="Maintenance jobs work on MongoDB collections")
+
+
+@pytest.fixture
+async def db():
+    """
+    Тестовая база данных с пустыми коллекциями секретов и частей.
+    """
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db = client[f"{TEST_DATABASE_NAME}_maintenance"]
+    yield db
+    await db["secrets"].delete_many({})
+    await db["secret_chunks"].delete_many({})
+    client.close()
+
+
+@pytest.mark.anyio
+async def test_delete_in_batches(db) -> None:
+    """
+    Тестирует удаление пачками.
+    Ожидается, что каждая пачка удаляет не больше `batch_size` документов, а неподходящие документы остаются.
+    """
+    await db["secrets"].insert_many([{"secret_key": str(i), "keep": i >= 25} for i in range(30)])
+
+    batches = [deleted async for deleted in delete_in_batches(db["secrets"], {"keep": False}, batch_size=10)]
+
+    assert batches == [10, 10, 5]
+    assert await db["secrets"].count_documents({}) == 5
+
+
+@pytest.mark.anyio
+async def test_purge_expired(db) -> None:
+    """
+    Тестирует удаление просроченных секретов и частей.
+    Ожидается, что удаляются только документы с истекшим временем.
+    """
+    now = datetime.now(timezone.utc)
+    await db["secrets"].insert_many(
+        [{"secret_key": str(i), "expiration": now + timedelta(minutes=-1 if i < 7 else 1)} for i in range(10)]
+    )
+    await db["secret_chunks"].insert_one({"secret_key": "0", "n": 0, "expiration": now - timedelta(minutes=1)})
+
+    deleted = [batch async for batch in SecretRepository(db).purge_expired(batch_size=3)]
+
+    assert deleted == [("secrets", 3), ("secrets", 3), ("secrets", 1), ("secret_chunks", 1)]
+    assert await db["secrets"].count_documents({}) == 3
+
+
+@pytest.mark.anyio
+async def test_purge_orphan_chunks(db) -> None:
+    """
+    Тестирует удаление частей секретов, документа которых нет.
+    Ожидается, что части выданного секрета удаляются, а части существующего секрета и идущей загрузки остаются.
+    """
+    expiration = datetime.now(timezone.utc) + timedelta(minutes=1)
+    two_hours_ago = datetime.now(timezone.utc) - timedelta(hours=2)
+    await db["secrets"].insert_one({"secret_key": "alive", "expiration": expiration})
+    await db["secret_chunks"].insert_many(
+        [
+            {"_id": ObjectId.from_datetime(two_hours_ago - timedelta(seconds=1)), "secret_key": "alive", "n": 0},
+            {"_id": ObjectId.from_datetime(two_hours_ago), "secret_key": "burned", "n": 0},
+            {"secret_key": "burned", "n": 1},
+            {"secret_key": "uploading", "n": 0},
+        ]
+    )
+
+    deleted = [count async for count in SecretRepository(db).purge_orphan_chunks(batch_size=1)]
+
+    assert sum(deleted) == 2
+    assert sorted(await db["secret_chunks"].distinct("secret_key")) == ["alive", "uploading"]
+
+
+@pytest.mark.anyio
+async def test_purge_orphan_chunks_with_binary_keys(db) -> None:
+    """
+    Тестирует удаление частей секретов с двоичными ключами рядом с частями секретов с ключами UUID.
+    Ожидается, что перебираются оба типа ключей и удаляются только части выданных секретов.
+    """
+    ids = SecretIdPool(2)
+    alive, burned = decode_secret_id(ids.next()), decode_secret_id(ids.next())
+    two_hours_ago = datetime.now(timezone.utc) - timedelta(hours=2)
+    await db["secrets"].insert_one({"secret_key": alive, "expiration": datetime.now(timezone.utc)})
+    await db["secret_chunks"].insert_many(
+        [
+            {"_id": ObjectId.from_datetime(two_hours_ago - timedelta(seconds=2)), "secret_key": alive, "n": 0},
+            {"_id": ObjectId.from_datetime(two_hours_ago - timedelta(seconds=1)), "secret_key": burned, "n": 0},
+            {"_id": ObjectId.from_datetime(two_hours_ago), "secret_key": "burned-uuid", "n": 0},
+        ]
+    )
+
+    deleted = [count async for count in SecretRepository(db).purge_orphan_chunks(batch_size=1)]
+
+    assert sum(deleted) == 2
+    assert await db["secret_chunks"].distinct("secret_key") == [alive]
@@ -0,0 +1,132 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.models.secret import Secret, SecretChunk
+from app.models.user import UserRequest
+from app.repositories.memory_secret_repository import InMemorySecretRepository
+from app.repositories.memory_user_repository import InMemoryUserRepository
+
+
+def make_secret(secret_key: str, expires_in: float = 60) -> Secret:
+    return Secret(
+        secret_key=secret_key,
+        secret="token",
+        expiration=datetime.now(timezone.utc) + timedelta(seconds=expires_in),
+    )
+
+
+@pytest.mark.anyio
+async def test_memory_secret_repository_create_get_delete() -> None:
+    """
+    Тестирует сохранение, получение и удаление секрета.
+    Ожидается, что при конкурентном удалении `True` вернет ровно один вызов.
+    """
+    repository = InMemorySecretRepository()
+    await repository.create(make_secret("key"))
+
+    assert (await repository.get("key")).secret == "token"
+    assert await asyncio.gather(*[repository.delete("key") for _ in range(5)]) == [True] + [False] * 4
+    assert await repository.get("key") is None
+
+
+@pytest.mark.anyio
+async def test_memory_secret_repository_delete_verified() -> None:
+    """
+    Тестирует выдачу секрета по хешу верификатора.
+    Ожидается, что при неверном хеше секрет остается, а при верном выдается и удаляется.
+    """
+    repository = InMemorySecretRepository()
+    await repository.create(make_secret("key").model_copy(update={"verifier_hash": "hash"}))
+
+    assert await repository.delete_verified("key", "other") is None
+    assert (await repository.delete_verified("key", "hash")).secret == "token"
+    assert await repository.delete_verified("key", "hash") is None
+
+
+@pytest.mark.anyio
+async def test_memory_secret_repository_unique_keys() -> None:
+    """
+    Тестирует уникальность ключей секретов.
+    Ожидается ошибка при повторе ключа и индекс повторяющегося секрета в результате пакетной вставки.
+    """
+    repository = InMemorySecretRepository()
+    await repository.create(make_secret("key"))
+
+    with pytest.raises(DuplicateKeyError):
+        await repository.create(make_secret("key"))
+    assert await repository.create_many([make_secret("other"), make_secret("key")]) == {1}
+    assert await repository.get("other") is not None
+
+
+@pytest.mark.anyio
+async def test_memory_secret_repository_expiration() -> None:
+    """
+    Тестирует удаление просроченных секретов и их частей.
+    Ожидается, что записи перестают читаться сразу после времени истечения.
+    """
+    repository = InMemorySecretRepository()
+    await repository.create(make_secret("expired", expires_in=-1))
+    await repository.create(make_secret("alive"))
+    await repository.create_chunk(
+        SecretChunk(secret_key="expired", n=0, data="data", expiration=datetime.now(timezone.utc) - timedelta(1))
+    )
+
+    assert await repository.get("expired") is None
+    assert await repository.get("alive") is not None
+    assert [chunk async for chunk in repository.iter_chunks("expired")] == []
+    assert await repository.delete("expired") is False
+
+
+@pytest.mark.anyio
+async def test_memory_secret_repository_chunks() -> None:
+    """
+    Тестирует сохранение и чтение частей секрета.
+    Ожидается, что части возвращаются по порядку номеров, а повтор номера части запрещен.
+    """
+    repository = InMemorySecretRepository()
+    expiration = datetime.now(timezone.utc) + timedelta(minutes=1)
+    for n in (2, 0, 1):
+        await repository.create_chunk(
+            SecretChunk(secret_key="key", n=n, data=str(n), expiration=expiration, data_key_id="k" if n else None)
+        )
+
+    with pytest.raises(DuplicateKeyError):
+        await repository.create_chunk(SecretChunk(secret_key="key", n=0, data="0", expiration=expiration))
+    assert [chunk async for chunk in repository.iter_chunks("key")] == [("0", None), ("1", "k"), ("2", "k")]
+
+    await repository.delete_chunks("key")
+    assert [chunk async for chunk in repository.iter_chunks("key")] == []
+
+
+@pytest.mark.anyio
+async def test_memory_user_repository() -> None:
+    """
+    Тестирует сохранение и получение пользователя.
+    Ожидается, что пользователю присваивается идентификатор, а повтор имени пользователя запрещен.
+    """
+    repository = InMemoryUserRepository()
+    await repository.create_user(UserRequest(username="user", password="Password1#"))
+
+    user = await repository.get_user("user")
+    assert user.id and user.password == "Password1#"
+    assert await repository.get_user("unknown") is None
+    with pytest.raises(DuplicateKeyError):
+        await repository.create_user(UserRequest(username="user", password="Password1#"))
+
+
+@pytest.mark.anyio
+async def test_memory_secret_repository_record_failed_attempt() -> None:
+    """
+    Тестирует учет неверных кодовых фраз.
+    Ожидается, что счетчик растет для существующего секрета и равен 0 для удаленного.
+    """
+    repository = InMemorySecretRepository()
+    secret = make_secret("key")
+    await repository.create(secret)
+
+    assert [await repository.record_failed_attempt(secret) for _ in range(2)] == [1, 2]
+    await repository.delete("key")
+    assert await repository.record_failed_attempt(secret) == 0
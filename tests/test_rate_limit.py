@@ -0,0 +1,33 @@
+from unittest.mock import patch
+
+from app.utils.rate_limit import SlidingWindowCounter
+
+
+def test_sliding_window_counter_limits_attempts():
+    """
+    Тестирует ограничение числа попыток в окне.
+    Ожидается, что попытка сверх лимита отклоняется со временем до повтора, а другие ключи не затрагиваются.
+    """
+    counter = SlidingWindowCounter(limit=3, window=60, max_keys=10)
+
+    with patch("app.utils.rate_limit.time.monotonic", return_value=600.0):
+        assert [counter.hit("key") for _ in range(3)] == [0, 0, 0]
+        assert counter.hit("key") == 60
+        assert counter.hit("other") == 0
+
+
+def test_sliding_window_counter_weights_previous_window():
+    """
+    Тестирует учет попыток предыдущего окна.
+    Ожидается, что попытки предыдущего окна учитываются пропорционально оставшейся части окна.
+    """
+    counter = SlidingWindowCounter(limit=4, window=60, max_keys=10)
+
+    with patch("app.utils.rate_limit.time.monotonic", return_value=659.0):
+        assert [counter.hit("key") for _ in range(4)] == [0, 0, 0, 0]
+    with patch("app.utils.rate_limit.time.monotonic", return_value=675.0):
+        assert [counter.hit("key") for _ in range(2)] == [0, 45]
+    with patch("app.utils.rate_limit.time.monotonic", return_value=705.0):
+        assert [counter.hit("key") for _ in range(3)] == [0, 0, 15]
+    with patch("app.utils.rate_limit.time.monotonic", return_value=900.0):
+        assert counter.hit("key") == 0
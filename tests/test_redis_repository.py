@@ -0,0 +1,143 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.models.secret import Secret, SecretChunk, SecretEnvelope
+from app.repositories.redis_secret_repository import RedisSecretRepository
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_client():
+    """
+    Клиент хранилища с протоколом Redis в памяти процесса.
+    """
+    return fakeredis.FakeAsyncRedis()
+
+
+def make_secret(secret_key: str, expires_in: float = 60) -> Secret:
+    return Secret(
+        secret_key=secret_key,
+        secret="token",
+        expiration=datetime.now(timezone.utc) + timedelta(seconds=expires_in),
+        envelope=SecretEnvelope(version=2, kdf="scrypt", params={"n": 16384}, salt="c2FsdA=="),
+    )
+
+
+@pytest.mark.anyio
+async def test_redis_secret_repository_create_get_delete(redis_client) -> None:
+    """
+    Тестирует сохранение, получение и удаление секрета.
+    Ожидается, что секрет сохраняется с конвертом, а при конкурентном удалении `True` вернет ровно один вызов.
+    """
+    repository = RedisSecretRepository(redis_client)
+    secret = make_secret("key")
+    await repository.create(secret)
+
+    assert await repository.get("key") == secret
+    assert await asyncio.gather(*[repository.delete("key") for _ in range(5)]) == [True] + [False] * 4
+    assert await repository.get("key") is None
+
+
+@pytest.mark.anyio
+async def test_redis_secret_repository_delete_verified(redis_client) -> None:
+    """
+    Тестирует выдачу секрета по хешу верификатора.
+    Ожидается, что при неверном хеше секрет остается, а при верном выдается и удаляется.
+    """
+    repository = RedisSecretRepository(redis_client)
+    await repository.create(make_secret("key").model_copy(update={"verifier_hash": "hash"}))
+
+    assert await repository.delete_verified("key", "other") is None
+    assert (await repository.delete_verified("key", "hash")).secret == "token"
+    assert await repository.get("key") is None
+
+
+@pytest.mark.anyio
+async def test_redis_secret_repository_ttl(redis_client) -> None:
+    """
+    Тестирует время жизни секрета.
+    Ожидается, что ключу задано время жизни до истечения секрета, а просроченный секрет не читается.
+    """
+    repository = RedisSecretRepository(redis_client)
+    await repository.create(make_secret("key", expires_in=60))
+    await repository.create(make_secret("expired", expires_in=-1))
+
+    assert 55_000 < await redis_client.pttl("secret:key") <= 60_000
+    assert await repository.get("expired") is None
+
+
+@pytest.mark.anyio
+async def test_redis_secret_repository_create_many(redis_client) -> None:
+    """
+    Тестирует пакетное сохранение секретов.
+    Ожидается индекс повторяющегося секрета в результате, а остальные секреты сохраняются.
+    """
+    repository = RedisSecretRepository(redis_client)
+    await repository.create(make_secret("key"))
+
+    with pytest.raises(DuplicateKeyError):
+        await repository.create(make_secret("key"))
+    assert await repository.create_many([make_secret("first"), make_secret("key"), make_secret("second")]) == {1}
+    assert await repository.get("first") is not None and await repository.get("second") is not None
+
+
+@pytest.mark.anyio
+async def test_redis_secret_repository_chunks(redis_client) -> None:
+    """
+    Тестирует сохранение и чтение частей секрета.
+    Ожидается, что части возвращаются по порядку пачками вместе с ключом данных, повтор номера части запрещен,
+    а удаление очищает все части.
+    """
+    repository = RedisSecretRepository(redis_client)
+    expiration = datetime.now(timezone.utc) + timedelta(minutes=1)
+    data_key_ids = [f"key{n}" if n % 2 else None for n in range(10)]
+    for n in range(10):
+        await repository.create_chunk(
+            SecretChunk(secret_key="key", n=n, data=str(n), expiration=expiration, data_key_id=data_key_ids[n])
+        )
+
+    with pytest.raises(DuplicateKeyError):
+        await repository.create_chunk(SecretChunk(secret_key="key", n=0, data="0", expiration=expiration))
+    assert [chunk async for chunk in repository.iter_chunks("key", batch_size=3)] == [
+        (str(n), data_key_ids[n]) for n in range(10)
+    ]
+    assert await redis_client.pttl("secret_chunks:key") > 0
+
+    await repository.delete_chunks("key")
+    assert [chunk async for chunk in repository.iter_chunks("key")] == []
+
+
+@pytest.mark.anyio
+async def test_redis_secret_repository_record_failed_attempt(redis_client) -> None:
+    """
+    Тестирует учет неверных кодовых фраз.
+    Ожидается, что счетчик растет и истекает вместе с секретом.
+    """
+    repository = RedisSecretRepository(redis_client)
+    secret = make_secret("key")
+    await repository.create(secret)
+
+    assert [await repository.record_failed_attempt(secret) for _ in range(2)] == [1, 2]
+    assert await redis_client.pttl("secret_failures:key") > 0
+
+
+@pytest.mark.anyio
+async def test_redis_secret_repository_clear_all(redis_client) -> None:
+    """
+    Тестирует удаление всех секретов и их частей.
+    Ожидается, что ключи других приложений в том же хранилище не удаляются.
+    """
+    repository = RedisSecretRepository(redis_client)
+    await repository.create_many([make_secret(str(i)) for i in range(25)])
+    await repository.create_chunk(
+        SecretChunk(secret_key="key", n=0, data="0", expiration=datetime.now(timezone.utc) + timedelta(minutes=1))
+    )
+    await redis_client.set("other", "value")
+
+    await repository.clear_all(batch_size=10)
+
+    assert await redis_client.keys() == [b"other"]
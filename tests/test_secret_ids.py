@@ -0,0 +1,46 @@
+import uuid
+
+from app.utils.secret_ids import (
+    BASE62_ALPHABET,
+    SECRET_ID_BYTES,
+    SECRET_ID_LENGTH,
+    SecretIdPool,
+    decode_secret_id,
+    encode_secret_id,
+)
+
+
+def test_encode_decode_roundtrip() -> None:
+    """
+    Тестирует запись идентификатора base62 и обратное преобразование.
+    Ожидается строка фиксированной длины из символов base62 и исходные байты после декодирования.
+    """
+    for raw in (bytes(SECRET_ID_BYTES), b"\xff" * SECRET_ID_BYTES, uuid.uuid4().bytes):
+        secret_key = encode_secret_id(raw)
+
+        assert len(secret_key) == SECRET_ID_LENGTH
+        assert set(secret_key) <= set(BASE62_ALPHABET)
+        assert decode_secret_id(secret_key) == raw
+
+
+def test_decode_rejects_other_keys() -> None:
+    """
+    Тестирует декодирование строк, которые не являются идентификатором base62.
+    Ожидается `None` для ключа UUID, строки с посторонними символами и числа больше 128 бит.
+    """
+    assert decode_secret_id(str(uuid.uuid4())) is None
+    assert decode_secret_id("-" * SECRET_ID_LENGTH) is None
+    assert decode_secret_id("z" * SECRET_ID_LENGTH) is None
+
+
+def test_pool_returns_unique_ids() -> None:
+    """
+    Тестирует выдачу идентификаторов из пула за несколько заполнений.
+    Ожидается, что все идентификаторы различны и декодируются.
+    """
+    pool = SecretIdPool(8)
+
+    ids = [pool.next() for _ in range(20)]
+
+    assert len(set(ids)) == 20
+    assert all(decode_secret_id(secret_key) is not None for secret_key in ids)
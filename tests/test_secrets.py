@@ -1,11 +1,25 @@
-from typing import Dict
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
 
 import pytest
+from fastapi import HTTPException
 from httpx import ASGITransport, AsyncClient
 from motor.motor_asyncio import AsyncIOMotorClient
 
-from app.core.config import MONGODB_URI, TEST_DATABASE_NAME, TTL_INDEX_SECONDS
+from app.core.config import MAX_TTL_SECONDS, MONGODB_URI, SALT, STORAGE_BACKEND, TEST_DATABASE_NAME, TTL_INDEX_SECONDS
+from app.exceptions import PoolSaturatedError
 from app.main import app
+from app.models.secret import Secret
+from app.repositories.secret_repository import SecretRepository
+from app.services.secret_service import SecretService
+from app.utils.crypto_utils import encrypt, generate_key_from_passphrase
+from app.utils.kdf import ScryptKdf
+from app.utils.rate_limit import SlidingWindowCounter
+from app.utils.secret_ids import SECRET_ID_LENGTH, SecretIdPool, decode_secret_id
+
+mongo_only = pytest.mark.skipif(STORAGE_BACKEND != "mongo", reason="Checks MongoDB indexes")
 
 
 @pytest.fixture
@@ -158,11 +172,13 @@ async def test_generate_get_and_verify_secret_deletion(
     assert response.json() == {"detail": "Secret not found"}
 
 
+@mongo_only
 @pytest.mark.anyio
 async def test_ttl_index_creation() -> None:
     """
     Тестирует создание TTL индекса для коллекции в MongoDB.
-    Ожидается, что индекс с полем expiration_1 будет создан с правильным временем жизни.
+    Ожидается, что индекс с полем expiration_1 будет удалять документы сразу по наступлении времени из поля
+    expiration, так как оно уже содержит абсолютное время истечения.
     """
     client = AsyncIOMotorClient(MONGODB_URI)
     db = client[TEST_DATABASE_NAME]
@@ -173,5 +189,553 @@ async def test_ttl_index_creation() -> None:
     assert "expiration_1" in indexes
 
     ttl_seconds = indexes["expiration_1"].get("expireAfterSeconds")
-    assert ttl_seconds == int(TTL_INDEX_SECONDS)
+    assert ttl_seconds == 0
+    client.close()
+
+
+@pytest.mark.anyio
+async def test_concurrent_get_secret_returns_secret_once(
+    setup_service: None, secret_data: Dict[str, Dict[str, str]], authenticated_user: str
+) -> None:
+    """
+    Тестирует конкурентное получение одного и того же секрета.
+    Ожидается, что секрет будет выдан ровно одному запросу, а остальные получат ошибку 404.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        generate_response = await ac.post(
+            "/generate", json=secret_data["correct"], headers={"Authorization": f"Bearer {authenticated_user}"}
+        )
+        secret_key = generate_response.json()["secret_key"]
+
+        responses = await asyncio.gather(
+            *[
+                ac.post(
+                    f"/secrets/{secret_key}",
+                    json={"passphrase": secret_data["correct"]["passphrase"]},
+                    headers={"Authorization": f"Bearer {authenticated_user}"},
+                )
+                for _ in range(3)
+            ]
+        )
+
+    status_codes = sorted(response.status_code for response in responses)
+    assert status_codes == [200, 404, 404]
+
+
+@mongo_only
+@pytest.mark.anyio
+async def test_secret_key_index_creation(setup_service: None) -> None:
+    """
+    Тестирует создание уникального индекса по ключу секрета в MongoDB.
+    Ожидается, что индекс secret_key_1 будет создан с ограничением уникальности.
+    """
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db = client[TEST_DATABASE_NAME]
+    collection = db["secrets"]
+
+    indexes = await collection.index_information()
+
+    assert "secret_key_1" in indexes
+    assert indexes["secret_key_1"].get("unique") is True
+    client.close()
+
+
+@pytest.mark.anyio
+async def test_generate_secret_uses_unique_salt(
+    setup_service: None, secret_data: Dict[str, Dict[str, str]], authenticated_user: str
+) -> None:
+    """
+    Тестирует, что каждый секрет шифруется с собственной случайной солью.
+    Ожидается, что у двух секретов с одинаковой кодовой фразой будут разные соли в конвертах.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        secret_keys = []
+        for _ in range(2):
+            response = await ac.post(
+                "/generate", json=secret_data["correct"], headers={"Authorization": f"Bearer {authenticated_user}"}
+            )
+            secret_keys.append(response.json()["secret_key"])
+
+    repository = app.state.secret_service.repository
+    first, second = [await repository.get(secret_key) for secret_key in secret_keys]
+
+    assert first.envelope.version == 2
+    assert first.envelope.salt != second.envelope.salt
+
+
+@pytest.mark.anyio
+async def test_get_legacy_secret_without_envelope(
+    setup_service: None, secret_data: Dict[str, Dict[str, str]], authenticated_user: str
+) -> None:
+    """
+    Тестирует получение секрета, сохраненного до появления конверта (с общей солью).
+    Ожидается успешный ответ с секретом.
+    """
+    service = app.state.secret_service
+    key = generate_key_from_passphrase(secret_data["correct"]["passphrase"].encode(), SALT.encode())
+    await service.repository.create(
+        Secret(
+            secret_key="legacy_secret_key",
+            secret=encrypt(secret_data["correct"]["secret"], key),
+            expiration=datetime.now(timezone.utc) + timedelta(seconds=int(TTL_INDEX_SECONDS)),
+        )
+    )
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post(
+            "/secrets/legacy_secret_key",
+            json={"passphrase": secret_data["correct"]["passphrase"]},
+            headers={"Authorization": f"Bearer {authenticated_user}"},
+        )
+    assert response.status_code == 200
+    assert response.json() == {"secret": secret_data["correct"]["secret"]}
+
+
+@pytest.mark.anyio
+async def test_generate_secret_uses_base62_key(setup_service: None, authenticated_user: str) -> None:
+    """
+    Тестирует формат ключа нового секрета.
+    Ожидается ключ base62 из 22 символов, который в MongoDB хранится 16 байтами.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post(
+            "/generate",
+            json={"secret": "test_secret", "passphrase": "test_passphrase"},
+            headers={"Authorization": f"Bearer {authenticated_user}"},
+        )
+    secret_key = response.json()["secret_key"]
+
+    assert len(secret_key) == SECRET_ID_LENGTH
+    assert decode_secret_id(secret_key) is not None
+
+
+@mongo_only
+@pytest.mark.anyio
+async def test_secret_key_stored_as_binary() -> None:
+    """
+    Тестирует хранение ключей секретов в MongoDB.
+    Ожидается, что ключ base62 хранится 16 байтами, ключ UUID — строкой, и оба секрета находятся по своим ключам.
+    """
+    client = AsyncIOMotorClient(MONGODB_URI)
+    collection = client[TEST_DATABASE_NAME]["secrets"]
+    repository = SecretRepository(client[TEST_DATABASE_NAME])
+    expiration = datetime.now(timezone.utc) + timedelta(minutes=1)
+    secret_keys = [SecretIdPool(1).next(), str(uuid.uuid4())]
+    for secret_key in secret_keys:
+        await repository.create(Secret(secret_key=secret_key, secret="secret", expiration=expiration))
+
+    stored = [await collection.find_one({"secret_key": {"$in": [decode_secret_id(key) or key]}}) for key in secret_keys]
+    found = [await repository.get(secret_key) for secret_key in secret_keys]
+    await collection.delete_many({})
     client.close()
+
+    assert stored[0]["secret_key"] == decode_secret_id(secret_keys[0])
+    assert stored[1]["secret_key"] == secret_keys[1]
+    assert [secret.secret_key for secret in found] == secret_keys
+
+
+@pytest.mark.anyio
+async def test_get_secret_with_uuid_key(
+    setup_service: None, secret_data: Dict[str, Dict[str, str]], authenticated_user: str
+) -> None:
+    """
+    Тестирует получение секрета, сохраненного с ключом в формате UUID.
+    Ожидается успешный ответ с секретом.
+    """
+    service = app.state.secret_service
+    secret = await service.encrypt_secret(secret_data["correct"]["secret"], secret_data["correct"]["passphrase"])
+    secret_key = str(uuid.uuid4())
+    await service.repository.create(secret.model_copy(update={"secret_key": secret_key}))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post(
+            f"/secrets/{secret_key}",
+            json={"passphrase": secret_data["correct"]["passphrase"]},
+            headers={"Authorization": f"Bearer {authenticated_user}"},
+        )
+    assert response.status_code == 200
+    assert response.json() == {"secret": secret_data["correct"]["secret"]}
+
+
+@pytest.mark.anyio
+async def test_get_secret_created_with_other_kdf(
+    setup_service: None, secret_data: Dict[str, Dict[str, str]], authenticated_user: str
+) -> None:
+    """
+    Тестирует получение секрета, созданного с другой функцией вывода ключа.
+    Ожидается, что секрет расшифруется по параметрам из своего конверта после смены KDF сервиса.
+    """
+    service = app.state.secret_service
+    default_kdf = service.kdf
+    service.kdf = ScryptKdf(n=2**10)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            generate_response = await ac.post(
+                "/generate", json=secret_data["correct"], headers={"Authorization": f"Bearer {authenticated_user}"}
+            )
+    finally:
+        service.kdf = default_kdf
+    secret_key = generate_response.json()["secret_key"]
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post(
+            f"/secrets/{secret_key}",
+            json={"passphrase": secret_data["correct"]["passphrase"]},
+            headers={"Authorization": f"Bearer {authenticated_user}"},
+        )
+    assert response.status_code == 200
+    assert response.json() == {"secret": secret_data["correct"]["secret"]}
+
+
+@pytest.mark.anyio
+async def test_get_secret_with_base64_envelope(
+    setup_service: None, secret_data: Dict[str, Dict[str, str]], authenticated_user: str
+) -> None:
+    """
+    Тестирует получение секрета с конвертом первой версии, где значение хранится в виде двойного base64.
+    Ожидается успешный ответ с секретом.
+    """
+    service = app.state.secret_service
+    envelope = service.create_envelope().model_copy(update={"version": 1})
+    key = await service.generate_key(secret_data["correct"]["passphrase"], envelope)
+    await service.repository.create(
+        Secret(
+            secret_key="base64_secret_key",
+            secret=encrypt(secret_data["correct"]["secret"], key),
+            expiration=datetime.now(timezone.utc) + timedelta(seconds=int(TTL_INDEX_SECONDS)),
+            envelope=envelope,
+        )
+    )
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post(
+            "/secrets/base64_secret_key",
+            json={"passphrase": secret_data["correct"]["passphrase"]},
+            headers={"Authorization": f"Bearer {authenticated_user}"},
+        )
+    assert response.status_code == 200
+    assert response.json() == {"secret": secret_data["correct"]["secret"]}
+
+
+@pytest.mark.anyio
+async def test_stream_secret_roundtrip(setup_service: None, authenticated_user: str) -> None:
+    """
+    Тестирует загрузку и получение большого секрета потоком.
+    Ожидается, что секрет будет разбит на части, восстановлен без изменений и удален после получения.
+    """
+    service = app.state.secret_service
+    default_chunk_size = service.chunk_size
+    service.chunk_size = 1024
+    payload = bytes(range(256)) * 20
+    headers = {"Authorization": f"Bearer {authenticated_user}"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            generate_response = await ac.post(
+                "/generate/stream", content=payload, headers={**headers, "X-Passphrase": "test_passphrase"}
+            )
+            secret_key = generate_response.json()["secret_key"]
+
+            wrong_response = await ac.post(
+                f"/secrets/{secret_key}/stream", json={"passphrase": "wrong_passphrase"}, headers=headers
+            )
+            plain_response = await ac.post(
+                f"/secrets/{secret_key}", json={"passphrase": "test_passphrase"}, headers=headers
+            )
+            response = await ac.post(
+                f"/secrets/{secret_key}/stream", json={"passphrase": "test_passphrase"}, headers=headers
+            )
+            repeated_response = await ac.post(
+                f"/secrets/{secret_key}/stream", json={"passphrase": "test_passphrase"}, headers=headers
+            )
+    finally:
+        service.chunk_size = default_chunk_size
+
+    assert generate_response.status_code == 200
+    assert wrong_response.status_code == 400
+    assert plain_response.status_code == 400
+    assert response.status_code == 200
+    assert response.content == payload
+    assert repeated_response.status_code == 404
+    assert [chunk async for chunk in service.repository.iter_chunks(secret_key)] == []
+
+
+@pytest.mark.anyio
+async def test_stream_secret_too_large(setup_service: None, authenticated_user: str) -> None:
+    """
+    Тестирует загрузку секрета больше допустимого размера.
+    Ожидается ошибка с кодом 413.
+    """
+    service = app.state.secret_service
+    default_max_stream_size = service.max_stream_size
+    service.max_stream_size = 1024
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post(
+                "/generate/stream",
+                content=b"x" * 2048,
+                headers={"Authorization": f"Bearer {authenticated_user}", "X-Passphrase": "test_passphrase"},
+            )
+    finally:
+        service.max_stream_size = default_max_stream_size
+
+    assert response.status_code == 413
+
+
+@pytest.mark.anyio
+async def test_generate_secrets_batch(setup_service: None, authenticated_user: str) -> None:
+    """
+    Тестирует пакетную генерацию секретов.
+    Ожидается ключ для каждого элемента пакета, и каждый секрет должен расшифровываться своей кодовой фразой.
+    """
+    items = [{"secret": f"batch_secret_{i}", "passphrase": f"batch_passphrase_{i}"} for i in range(3)]
+    headers = {"Authorization": f"Bearer {authenticated_user}"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/generate/batch", json={"items": items}, headers=headers)
+        results = response.json()["items"]
+        secret_responses = [
+            await ac.post(f"/secrets/{result['secret_key']}", json={"passphrase": item["passphrase"]}, headers=headers)
+            for item, result in zip(items, results)
+        ]
+
+    assert response.status_code == 200
+    assert all(result["error"] is None for result in results)
+    assert [secret_response.json() for secret_response in secret_responses] == [
+        {"secret": item["secret"]} for item in items
+    ]
+
+
+@pytest.mark.anyio
+async def test_generate_secrets_batch_reports_busy_items(setup_service: None, authenticated_user: str) -> None:
+    """
+    Тестирует частичный отказ пакетной генерации.
+    Ожидается, что элемент, для которого пул вывода ключей переполнен, вернет ошибку, а остальные будут сохранены.
+    """
+    service = app.state.secret_service
+    calls = 0
+    encrypt_secret = service.encrypt_secret
+
+    async def flaky_encrypt_secret(secret: str, passphrase: str, ttl_seconds: Optional[int] = None) -> Secret:
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise PoolSaturatedError("kdf")
+        return await encrypt_secret(secret, passphrase, ttl_seconds)
+
+    service.encrypt_secret = flaky_encrypt_secret
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post(
+                "/generate/batch",
+                json={"items": [{"secret": "s", "passphrase": "p"}] * 3},
+                headers={"Authorization": f"Bearer {authenticated_user}"},
+            )
+    finally:
+        del service.encrypt_secret
+
+    results = response.json()["items"]
+    assert response.status_code == 200
+    assert [result["error"] for result in results] == [None, "Service is busy", None]
+    assert results[1]["secret_key"] is None
+
+
+@pytest.mark.anyio
+async def test_generate_secrets_batch_empty(setup_service: None, authenticated_user: str) -> None:
+    """
+    Тестирует пакетную генерацию с пустым списком секретов.
+    Ожидается ошибка валидации с кодом 422.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post(
+            "/generate/batch", json={"items": []}, headers={"Authorization": f"Bearer {authenticated_user}"}
+        )
+
+    assert response.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_generate_secret_with_ttl(setup_service: None, authenticated_user: str) -> None:
+    """
+    Тестирует генерацию секрета с собственным временем жизни.
+    Ожидается, что время истечения секрета соответствует `ttl_seconds`, а время жизни больше MAX_TTL_SECONDS
+    отклоняется с ошибкой 422.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post(
+            "/generate",
+            json={"secret": "secret", "passphrase": "passphrase", "ttl_seconds": 60},
+            headers={"Authorization": f"Bearer {authenticated_user}"},
+        )
+        too_long_response = await ac.post(
+            "/generate",
+            json={"secret": "secret", "passphrase": "passphrase", "ttl_seconds": int(MAX_TTL_SECONDS) + 1},
+            headers={"Authorization": f"Bearer {authenticated_user}"},
+        )
+
+    assert response.status_code == 200
+    secret = await app.state.secret_service.repository.get(response.json()["secret_key"])
+    expiration = secret.expiration.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)
+    assert timedelta(seconds=55) < expiration <= timedelta(seconds=60)
+    assert too_long_response.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_get_expired_secret(
+    setup_service: None, secret_data: Dict[str, Dict[str, str]], authenticated_user: str
+) -> None:
+    """
+    Тестирует получение просроченного секрета, который хранилище еще не удалило.
+    Ожидается ошибка с кодом 404.
+    """
+    service = app.state.secret_service
+    secret = await service.encrypt_secret(secret_data["correct"]["secret"], secret_data["correct"]["passphrase"])
+    secret.expiration = datetime.now(timezone.utc) - timedelta(seconds=1)
+    await service.repository.create(secret)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post(
+            f"/secrets/{secret.secret_key}",
+            json={"passphrase": secret_data["correct"]["passphrase"]},
+            headers={"Authorization": f"Bearer {authenticated_user}"},
+        )
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Secret not found"}
+
+
+@pytest.mark.anyio
+async def test_secret_burned_after_failed_attempts(
+    setup_service: None, secret_data: Dict[str, Dict[str, str]], authenticated_user: str
+) -> None:
+    """
+    Тестирует удаление секрета после нескольких неверных кодовых фраз.
+    Ожидается, что после исчерпания лимита неверных попыток секрет не выдается даже с верной кодовой фразой.
+    """
+    service = app.state.secret_service
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        generate_response = await ac.post(
+            "/generate", json=secret_data["correct"], headers={"Authorization": f"Bearer {authenticated_user}"}
+        )
+        secret_key = generate_response.json()["secret_key"]
+
+        for _ in range(service.max_failed_attempts):
+            response = await ac.post(
+                f"/secrets/{secret_key}",
+                json={"passphrase": secret_data["incorrect_passphrase"]["passphrase"]},
+                headers={"Authorization": f"Bearer {authenticated_user}"},
+            )
+            assert response.status_code == 400
+
+        response = await ac.post(
+            f"/secrets/{secret_key}",
+            json={"passphrase": secret_data["correct"]["passphrase"]},
+            headers={"Authorization": f"Bearer {authenticated_user}"},
+        )
+
+    assert response.status_code == 404
+    assert await service.repository.get(secret_key) is None
+
+
+@pytest.mark.anyio
+async def test_failed_attempts_are_shared_between_workers(
+    setup_service: None, secret_data: Dict[str, Dict[str, str]]
+) -> None:
+    """
+    Тестирует учет неверных кодовых фраз несколькими процессами приложения с общим хранилищем.
+    Ожидается, что секрет удаляется после `max_failed_attempts` неверных кодовых фраз в сумме.
+    """
+    service = app.state.secret_service
+    other_worker = SecretService(SALT, service.repository, service.kdf_pool, service.kdf, service.data_keys)
+    secret_key = await service.generate_secret(secret_data["correct"]["secret"], secret_data["correct"]["passphrase"])
+
+    for attempt in range(service.max_failed_attempts):
+        worker = (service, other_worker)[attempt % 2]
+        with pytest.raises(HTTPException) as e:
+            await worker.get_secret(secret_key, secret_data["incorrect_passphrase"]["passphrase"])
+        assert e.value.status_code == 400
+
+    assert await service.repository.get(secret_key) is None
+
+
+@pytest.mark.anyio
+async def test_get_secret_rate_limited(
+    setup_service: None, secret_data: Dict[str, Dict[str, str]], authenticated_user: str
+) -> None:
+    """
+    Тестирует ограничение числа попыток получения секрета.
+    Ожидается ошибка 429 с заголовком Retry-After, при этом вывод ключа для отклоненной попытки не выполняется.
+    """
+    service = app.state.secret_service
+    secret_attempts = service.secret_attempts
+    service.secret_attempts = SlidingWindowCounter(limit=1, window=60, max_keys=10)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            generate_response = await ac.post(
+                "/generate", json=secret_data["correct"], headers={"Authorization": f"Bearer {authenticated_user}"}
+            )
+            secret_key = generate_response.json()["secret_key"]
+
+            await ac.post(
+                f"/secrets/{secret_key}",
+                json={"passphrase": secret_data["incorrect_passphrase"]["passphrase"]},
+                headers={"Authorization": f"Bearer {authenticated_user}"},
+            )
+            submitted = service.kdf_pool.stats()["submitted"]
+            response = await ac.post(
+                f"/secrets/{secret_key}",
+                json={"passphrase": secret_data["correct"]["passphrase"]},
+                headers={"Authorization": f"Bearer {authenticated_user}"},
+            )
+    finally:
+        service.secret_attempts = secret_attempts
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    assert service.kdf_pool.stats()["submitted"] == submitted
+
+
+@pytest.mark.anyio
+async def test_client_secret_roundtrip(setup_service: None, authenticated_user: str) -> None:
+    """
+    Тестирует сохранение и получение секрета, зашифрованного на клиенте.
+    Ожидается, что шифротекст возвращается без изменений ровно один раз, а вывод ключа на сервере не выполняется.
+    """
+    service = app.state.secret_service
+    headers = {"Authorization": f"Bearer {authenticated_user}"}
+    submitted = service.kdf_pool.stats()["submitted"]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        generate_response = await ac.post(
+            "/generate/client", json={"ciphertext": "client-ciphertext", "verifier": "v" * 32}, headers=headers
+        )
+        secret_key = generate_response.json()["secret_key"]
+
+        response = await ac.post(f"/secrets/{secret_key}/client", json={"verifier": "v" * 32}, headers=headers)
+        repeated_response = await ac.post(f"/secrets/{secret_key}/client", json={"verifier": "v" * 32}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.json() == {"ciphertext": "client-ciphertext"}
+    assert repeated_response.status_code == 404
+    assert service.kdf_pool.stats()["submitted"] == submitted
+
+
+@pytest.mark.anyio
+async def test_client_secret_with_incorrect_verifier(setup_service: None, authenticated_user: str) -> None:
+    """
+    Тестирует получение секрета, зашифрованного на клиенте, с неверным верификатором и по кодовой фразе.
+    Ожидается ошибка 400 в обоих случаях, а секрет остается и выдается по верному верификатору.
+    """
+    headers = {"Authorization": f"Bearer {authenticated_user}"}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        generate_response = await ac.post(
+            "/generate/client", json={"ciphertext": "client-ciphertext", "verifier": "v" * 32}, headers=headers
+        )
+        secret_key = generate_response.json()["secret_key"]
+
+        wrong_response = await ac.post(f"/secrets/{secret_key}/client", json={"verifier": "w" * 32}, headers=headers)
+        passphrase_response = await ac.post(f"/secrets/{secret_key}", json={"passphrase": "v" * 32}, headers=headers)
+        response = await ac.post(f"/secrets/{secret_key}/client", json={"verifier": "v" * 32}, headers=headers)
+
+    assert wrong_response.status_code == 400
+    assert wrong_response.json() == {"detail": "Invalid input data"}
+    assert passphrase_response.status_code == 400
+    assert response.status_code == 200
@@ -0,0 +1,78 @@
+import asyncio
+from typing import Optional
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.models.user import UserRequest
+from app.repositories.user_repository import UserRepository
+
+
+class FakeUsersCollection:
+    """
+    Коллекция пользователей в памяти, считающая запросы к базе данных.
+    """
+
+    def __init__(self) -> None:
+        self.users = {}
+        self.find_calls = 0
+        self.find_started = asyncio.Event()
+        self.release_find: Optional[asyncio.Event] = None
+
+    async def find_one(self, query: dict) -> Optional[dict]:
+        self.find_calls += 1
+        user = self.users.get(query["username"])
+        self.find_started.set()
+        if self.release_find is not None:
+            await self.release_find.wait()
+        return dict(user) if user else None
+
+    async def insert_one(self, document: dict) -> None:
+        if document["username"] in self.users:
+            raise DuplicateKeyError("duplicate key", code=11000)
+        self.users[document["username"]] = {**document, "_id": "id"}
+
+
+@pytest.fixture
+def users() -> FakeUsersCollection:
+    return FakeUsersCollection()
+
+
+@pytest.mark.anyio
+async def test_get_user_is_cached(users: FakeUsersCollection) -> None:
+    """
+    Тестирует кэширование найденного и отсутствующего пользователя.
+    Ожидается, что повторные запросы не обращаются к базе данных, а создание пользователя сбрасывает
+    закэшированное отсутствие.
+    """
+    repository = UserRepository({"users": users})
+
+    assert await repository.get_user("user") is None
+    assert await repository.get_user("user") is None
+    assert users.find_calls == 1
+
+    await repository.create_user(UserRequest(username="user", password="Password1#"))
+    assert (await repository.get_user("user")).id == "id"
+    assert (await repository.get_user("user")).username == "user"
+    assert users.find_calls == 2
+
+    with pytest.raises(DuplicateKeyError):
+        await repository.create_user(UserRequest(username="user", password="Password1#"))
+
+
+@pytest.mark.anyio
+async def test_get_user_does_not_cache_result_read_before_create(users: FakeUsersCollection) -> None:
+    """
+    Тестирует чтение пользователя, выполняющееся одновременно с его созданием.
+    Ожидается, что отсутствие пользователя, прочитанное до вставки, не попадет в кэш.
+    """
+    repository = UserRepository({"users": users})
+    users.release_find = asyncio.Event()
+
+    lookup = asyncio.create_task(repository.get_user("user"))
+    await users.find_started.wait()
+    await repository.create_user(UserRequest(username="user", password="Password1#"))
+    users.release_find.set()
+
+    assert await lookup is None
+    assert await repository.get_user("user") is not None
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.workers import WorkerPool
+from app.exceptions import PoolSaturatedError
+
+
+@pytest.mark.anyio
+async def test_worker_pool_runs_function() -> None:
+    """
+    Тестирует выполнение функции в пуле исполнителей.
+    Ожидается, что результат функции будет возвращен вызывающему коду.
+    """
+    pool = WorkerPool(name="test", max_workers=2, max_pending=2)
+
+    result = await pool.run(pow, 2, 10)
+
+    assert result == 1024
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_worker_pool_rejects_when_saturated() -> None:
+    """
+    Тестирует отказ пула при переполнении.
+    Когда все исполнители заняты и очередь ожидания заполнена, ожидается `PoolSaturatedError`.
+    """
+    pool = WorkerPool(name="test", max_workers=1, max_pending=0)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(pool.run(release.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(PoolSaturatedError):
+        await pool.run(pow, 2, 10)
+
+    release.set()
+    await running
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+    pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_worker_pool_drain_waits_for_running_tasks() -> None:
+    """
+    Тестирует плавную остановку пула.
+    Ожидается, что выполняющаяся задача завершается, а новые задачи во время остановки отклоняются.
+    """
+    pool = WorkerPool(name="test", max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(pool.run(release.wait))
+    await asyncio.sleep(0)
+    draining = asyncio.ensure_future(pool.drain(timeout=5))
+    await asyncio.sleep(0)
+
+    with pytest.raises(PoolSaturatedError):
+        await pool.run(pow, 2, 10)
+
+    release.set()
+    assert await draining is True
+    assert await running is True
+    assert pool.stats()["draining"] is True
+
+
+@pytest.mark.anyio
+async def test_worker_pool_drain_timeout() -> None:
+    """
+    Тестирует остановку пула по истечении времени ожидания.
+    Ожидается `False`, если задача не завершилась, и отказ задаче, ожидающей исполнителя.
+    """
+    pool = WorkerPool(name="test", max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(pool.run(release.wait))
+    queued = asyncio.ensure_future(pool.run(pow, 2, 10))
+    await asyncio.sleep(0)
+
+    assert await pool.drain(timeout=0.05) is False
+    with pytest.raises(PoolSaturatedError):
+        await queued
+
+    release.set()
+    assert await running is True